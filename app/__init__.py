@@ -1,3 +1,6 @@
+import os
+import time
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
@@ -6,45 +9,82 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_migrate import Migrate
 from .config import Config
-
-from .main_routes import main_bp
-from .admin.routes import admin_bp
+from .cache import cache
+from .page_cache import page_cache
+from .compression import compression
+from .images import images
+from .uploads import uploads
+from .assets import assets
+from .metrics import metrics
+from .tasks import tasks
+from .database import RoutingSession, configure as configure_database
+from .ratelimit import configure as configure_ratelimit
 
 
-db = SQLAlchemy()
+# Сессия с маршрутизацией чтения на реплику (см. app/database.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
 limiter = Limiter(key_func=get_remote_address)
 migrate = Migrate()
+# init-db и flask db находят миграции из любого рабочего каталога
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'migrations')
 
-def create_app():
-    app = Flask(__name__)
+# create_app не обращается к БД и диску: схема и администратор создаются
+# командами flask init-db / flask create-admin, поэтому фабрику можно
+# вызывать в мастере gunicorn (--preload) и во всех воркерах.
+def create_app(config=None, instance_path=None):
+    # config - словарь поверх Config (тесты, бенчмарк); расширения читают
+    # настройки в init_app, поэтому менять их после create_app поздно
+    started = time.perf_counter()
+    app = Flask(__name__, instance_path=instance_path)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
 
     # Инициализация расширений
+    configure_database(app)
     db.init_app(app)
     login_manager.init_app(app)
+    login_manager.login_view = 'admin.login'
     csrf.init_app(app)
+    configure_ratelimit(app)
     limiter.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR)
+    cache.init_app(app)
+    page_cache.init_app(app)
+    compression.init_app(app)
+    images.init_app(app)
+    uploads.init_app(app)
+    assets.init_app(app)
+    metrics.init_app(app)
+    tasks.init_app(app)
 
     # Регистрация blueprints
     from .main_routes import main_bp
     from .admin.routes import admin_bp
+    from .api import api_bp
 
     app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
     app.register_blueprint(admin_bp, url_prefix='/panel')
 
-    # Создание администратора по умолчанию
-    with app.app_context():
-        # Импорт моделей необходим для create_all
-        from . import models
-        db.create_all()
-        from .models import Admin
-        if not Admin.query.first():
-            admin = Admin(username='admin')
-            admin.set_password('Tdutif_85')
-            db.session.add(admin)
-            db.session.commit()
-
-    return app
\ No newline at end of file
+    # CLI: flask init-db, create-admin, startup-time, freeze, sitemap, search,
+    # tasks, templates, catalog
+    from . import commands, freeze, sitemap, catalog_io
+    from .search import search
+    from .analytics import analytics
+    from . import templating
+    commands.init_app(app)
+    freeze.init_app(app)
+    sitemap.init_app(app)
+    search.init_app(app)
+    analytics.init_app(app)
+    templating.init_app(app)
+    catalog_io.init_app(app)
+
+    app.extensions['startup_seconds'] = time.perf_counter() - started
+    app.logger.debug('create_app: %.1f мс',
+                     app.extensions['startup_seconds'] * 1000)
+    return app
@@ -1,17 +1,28 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request
+from flask import Blueprint, render_template, redirect, url_for, flash, current_app, request, \
+    abort
 from flask_login import login_required, current_user, login_user, logout_user
-from werkzeug.utils import secure_filename
 
-from app import db
+from app import db, limiter
+from app.cache import cache
+from app.tasks import tasks
+from app.uploads import uploads
+from app.metrics import metrics
+from app.pagination import paginate, page_args
 from app.forms import LoginForm, AboutForm, ContactForm, SolutionForm, PortfolioForm
-from app.models import Admin, AboutContent, ContactInfo, Solution, PortfolioItem
-import os
-import uuid
+from app.models import Admin, AboutContent, ContactInfo, Solution, PortfolioItem, Order
+from app.analytics import top_pages, daily_views
+from app.sitemap import PAGE_TITLES
+import hmac
 
 admin_bp = Blueprint('admin', __name__)
 
 
+def _login_limit():
+    return current_app.config.get('RATELIMIT_LOGIN', '5 per minute;20 per hour')
+
+
 @admin_bp.route('/login', methods=['GET', 'POST'])
+@limiter.limit(_login_limit, methods=['POST'])
 def login():
     if current_user.is_authenticated:
         return redirect(url_for('admin.dashboard'))
@@ -36,7 +47,36 @@ def logout():
 @admin_bp.route('/')
 @login_required
 def dashboard():
-    return render_template('admin/dashboard.html')
+    # Только чтение из БД: буферы воркеров пишет их фоновый поток, поэтому
+    # последние ANALYTICS_FLUSH_INTERVAL секунд просмотров могут не попасть
+    days = current_app.config.get('ANALYTICS_DASHBOARD_DAYS', 30)
+    trend = daily_views(days)
+    return render_template('admin/dashboard.html', active_admin='dashboard',
+                           days=days, trend=trend,
+                           flush_interval=current_app.config.get(
+                               'ANALYTICS_FLUSH_INTERVAL', 30),
+                           max_daily=max([views for _, views in trend] or [0]),
+                           total_views=sum(views for _, views in trend),
+                           today_views=trend[-1][1] if trend else 0,
+                           top=top_pages(days),
+                           top_solutions=top_pages(days, detail_kind='solution'),
+                           top_projects=top_pages(days, detail_kind='portfolio'),
+                           orders_count=Order.query.count(),
+                           recent_orders=Order.query.order_by(Order.id.desc()).limit(10).all(),
+                           page_titles=PAGE_TITLES)
+
+
+# Метрики Prometheus: для администратора или по токену METRICS_TOKEN
+@admin_bp.route('/metrics')
+def metrics_view():
+    token = current_app.config.get('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    authorized = current_user.is_authenticated or (
+        token and hmac.compare_digest(authorization, f'Bearer {token}'))
+    if not authorized:
+        abort(401)
+    return current_app.response_class(
+        metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 
 @admin_bp.route('/about', methods=['GET', 'POST'])
@@ -53,21 +93,26 @@ def manage_about():
         content.content = form.content.data
 
         # Обработка загрузки изображения
+        new_image = False
         if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'],
-                                    unique_filename)
-            form.image.data.save(filepath)
-            if content.image_path:  # Удаляем старое изображение
-                old_path = os.path.join(current_app.config['UPLOAD_FOLDER'],
-                                        content.image_path)
-                if os.path.exists(old_path):
-                    os.remove(old_path)
-            content.image_path = unique_filename
+            image, new_image = uploads.save(form.image.data,
+                                            form.image.data.filename)
+            old_image = content.image_path
+            content.image_path = image
+        else:
+            old_image = None
 
         db.session.add(content)
         db.session.commit()
+        # Варианты нового изображения и удаление старого - в фоне,
+        # после коммита, чтобы страница не ссылалась на удалённый файл
+        if new_image:
+            tasks.enqueue('process_upload', filepath=uploads.path(image),
+                          filename=image)
+        # delete_upload не тронет файл, если на него ссылается другая запись
+        if old_image and old_image != content.image_path:
+            tasks.enqueue('delete_upload', filename=old_image)
+        cache.bump('about', section)
         flash('Изменения сохранены!', 'success')
         return redirect(url_for('admin.manage_about', section=section))
 
@@ -92,6 +137,7 @@ def manage_contacts():
         form.populate_obj(contacts)
         db.session.add(contacts)
         db.session.commit()
+        cache.bump('contacts')
         flash('Контактная информация обновлена!', 'success')
         return redirect(url_for('admin.manage_contacts'))
 
@@ -102,37 +148,41 @@ def manage_contacts():
 @admin_bp.route('/solutions', methods=['GET', 'POST'])
 @login_required
 def manage_solutions():
-    solutions = Solution.query.all()
+    page = paginate(Solution.query, (Solution.id,), *page_args('ADMIN_PAGE_SIZE'))
     form = SolutionForm()
 
     if form.validate_on_submit():
-        solution = Solution(name=form.name.data,
+        solution = Solution(name=form.name.data, slug=form.slug.data,
             description=form.description.data, price=form.price.data,
             delivery_days=form.delivery_days.data, is_new=form.is_new.data,
             is_popular=form.is_popular.data, category=form.category.data)
 
+        new_image = False
         if form.image.data:
-            filename = secure_filename(form.image.data.filename)
-            unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'],
-                                    unique_filename)
-            form.image.data.save(filepath)
-            solution.image_path = unique_filename
+            solution.image_path, new_image = uploads.save(
+                form.image.data, form.image.data.filename)
 
         db.session.add(solution)
         db.session.commit()
+        # Для уже известного содержимого варианты готовы
+        if new_image:
+            tasks.enqueue('process_upload',
+                          filepath=uploads.path(solution.image_path),
+                          filename=solution.image_path)
+        cache.bump('solution', solution.slug)
         flash('Решение добавлено!', 'success')
         return redirect(url_for('admin.manage_solutions'))
 
-    return render_template('admin/solutions.html', solutions=solutions,
-                           form=form)
+    return render_template('admin/solutions.html', solutions=page.items,
+                           page=page, form=form)
 
 
 # Портфолио
 @admin_bp.route('/portfolio', methods=['GET', 'POST'])
 @login_required
 def manage_portfolio():
-    portfolio_items = PortfolioItem.query.all()
+    page = paginate(PortfolioItem.query, (PortfolioItem.id,),
+                    *page_args('ADMIN_PAGE_SIZE'))
     form = PortfolioForm()
 
     if form.validate_on_submit():
@@ -140,26 +190,31 @@ def manage_portfolio():
             category=form.category.data, package=form.package.data,
             duration=form.duration.data, geo=form.geo.data, images=[],
             # Будут обработаны ниже
-            features=[f.strip() for f in form.features.data.split('\n') if
+            image_alt=form.image_alt.data or None,
+            summary=form.summary.data or None,
+            features=[f.strip() for f in (form.features.data or '').split('\n') if
                       f.strip()], testimonial=form.testimonial.data,
             client=form.client.data, live_url=form.live_url.data,
             slug=form.slug.data)
 
         # Обработка загрузки изображений
-        if form.images.data:
-            for img in form.images.data:
-                if img.filename:
-                    filename = secure_filename(img.filename)
-                    unique_filename = f"{uuid.uuid4().hex}_{filename}"
-                    filepath = os.path.join(
-                        current_app.config['UPLOAD_FOLDER'], unique_filename)
-                    img.save(filepath)
-                    portfolio_item.images.append(unique_filename)
+        new_images = []
+        for img in form.images.data or []:
+            # Пустое поле формы приходит как FileStorage без имени
+            if img and img.filename:
+                filename, new = uploads.save(img, img.filename)
+                portfolio_item.images.append(filename)
+                if new:
+                    new_images.append(filename)
 
         db.session.add(portfolio_item)
         db.session.commit()
+        for filename in new_images:
+            tasks.enqueue('process_upload', filepath=uploads.path(filename),
+                          filename=filename)
+        cache.bump('portfolio', portfolio_item.slug)
         flash('Проект добавлен в портфолио!', 'success')
         return redirect(url_for('admin.manage_portfolio'))
 
     return render_template('admin/portfolio.html',
-                           portfolio_items=portfolio_items, form=form)
\ No newline at end of file
+                           portfolio_items=page.items, page=page, form=form)
\ No newline at end of file
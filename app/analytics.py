@@ -0,0 +1,172 @@
+# Счётчик просмотров публичных страниц с отложенной записью.
+# Просмотры main_bp (и отдельно каждого решения / проекта по slug)
+# копятся в памяти воркера и пишутся в PageView пачкой upsert'ов по
+# таймеру или при накоплении ANALYTICS_FLUSH_THRESHOLD ключей. Запись
+# выполняет фоновый поток, так что запрос не ждёт БД; при остановке
+# воркера остаток сбрасывается (atexit и worker_exit в gunicorn.conf.py).
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+from flask import request
+from sqlalchemy import func
+
+from . import db
+from .models import PageView
+
+
+logger = logging.getLogger(__name__)
+
+BOT_MARKERS = ('bot', 'crawl', 'spider', 'slurp', 'preview')
+# Ключ WSGI environ для внутренних запросов (экспорт freeze), не считающихся
+# просмотрами
+SKIP_ENVIRON = 'app.analytics.skip'
+DEFAULT_EXCLUDE = ('main.favicon', 'main.sitemap_xml', 'main.sitemap_shard',
+                   'main.portfolio_cards')
+DETAIL_KINDS = {'main.package_details': 'solution',
+                'main.portfolio_detail': 'portfolio'}
+
+
+class Analytics:
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ANALYTICS_ENABLED', True)
+        self.interval = app.config.get('ANALYTICS_FLUSH_INTERVAL', 30)
+        self.threshold = app.config.get('ANALYTICS_FLUSH_THRESHOLD', 500)
+        self.exclude = set(app.config.get('ANALYTICS_EXCLUDE', DEFAULT_EXCLUDE))
+        app.extensions['analytics'] = self
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def _after_request(self, response):
+        endpoint = request.endpoint
+        if request.method != 'GET' or response.status_code not in (200, 304) \
+                or not endpoint or not endpoint.startswith('main.') \
+                or endpoint in self.exclude \
+                or request.environ.get(SKIP_ENVIRON):
+            return response
+        agent = request.user_agent.string.lower()
+        if any(marker in agent for marker in BOT_MARKERS):
+            return response
+        slug = ''
+        if endpoint in DETAIL_KINDS and request.view_args:
+            slug = next(iter(request.view_args.values()), '')
+        self.record(endpoint, slug)
+        return response
+
+    def record(self, endpoint, slug=''):
+        self._ensure_flusher()
+        with self._lock:
+            self._counts[(date.today(), endpoint, slug)] += 1
+            pending = len(self._counts)
+        if pending >= self.threshold:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        # Поток не переживает fork: запускаем в каждом воркере при первом
+        # просмотре
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            thread = threading.Thread(target=self._run, daemon=True,
+                                      name='analytics-flush')
+            thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return sum(self._counts.values())
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        try:
+            with self._flush_lock, self.app.app_context():
+                _upsert(counts)
+        except Exception:
+            # Просмотры не теряем: вернутся в буфер до следующей попытки
+            logger.exception('Не удалось записать просмотры')
+            with self._lock:
+                self._counts.update(counts)
+            return 0
+        return sum(counts.values())
+
+
+def _upsert(counts):
+    rows = [{'day': day, 'endpoint': endpoint, 'slug': slug, 'views': views}
+            for (day, endpoint, slug), views in counts.items()]
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(PageView)
+        statement = statement.on_conflict_do_update(
+            index_elements=['day', 'endpoint', 'slug'],
+            set_={'views': PageView.views + statement.excluded.views})
+        db.session.execute(statement, rows)
+    else:
+        for row in rows:
+            updated = (PageView.query
+                       .filter_by(day=row['day'], endpoint=row['endpoint'],
+                                  slug=row['slug'])
+                       .update({PageView.views: PageView.views + row['views']}))
+            if not updated:
+                db.session.add(PageView(**row))
+    db.session.commit()
+
+
+def top_pages(days=30, limit=10, detail_kind=None):
+    # [(endpoint, slug, views)] за последние days дней
+    since = date.today() - timedelta(days=days - 1)
+    total = func.sum(PageView.views)
+    query = (db.session.query(PageView.endpoint, PageView.slug, total)
+             .filter(PageView.day >= since))
+    if detail_kind:
+        endpoint = next(e for e, kind in DETAIL_KINDS.items() if kind == detail_kind)
+        query = query.filter(PageView.endpoint == endpoint)
+    return (query.group_by(PageView.endpoint, PageView.slug)
+            .order_by(total.desc())
+            .limit(limit)
+            .all())
+
+
+def daily_views(days=30):
+    # [(date, views)] за каждый из последних days дней, включая пустые
+    since = date.today() - timedelta(days=days - 1)
+    rows = dict(db.session.query(PageView.day, func.sum(PageView.views))
+                .filter(PageView.day >= since)
+                .group_by(PageView.day)
+                .all())
+    return [(since + timedelta(days=offset), rows.get(since + timedelta(days=offset), 0))
+            for offset in range(days)]
+
+
+analytics = Analytics()
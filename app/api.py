@@ -0,0 +1,278 @@
+# JSON API каталога: keyset-пагинация (?after=<курсор>&limit=N, как на
+# HTML-страницах), выбор полей (?fields=id,name), фильтры в SQL,
+# ETag / Last-Modified, поиск.
+# Списки отдаются объектом {'items': [...], 'next': курсор, 'prev': курсор};
+# /api/solutions раньше возвращал голый массив - клиенты читают 'items'.
+# Карточка проекта по умолчанию содержит те же поля, что и список;
+# полная запись (features, testimonial, ...) - через ?fields=.
+# Готовые тела ответов кэшируются по версии контента в отдельном
+# ограниченном хранилище; в ключ входят только известные API параметры.
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import Blueprint, request, url_for, current_app
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import BadRequest
+
+from . import limiter
+from .cache import LRUStore, cache, content_changed
+from .models import Solution, PortfolioItem
+from .pagination import paginate, page_args
+from .search import search as search_index
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+api_bp = Blueprint('api', __name__)
+
+
+def _api_limit():
+    return current_app.config.get('RATELIMIT_API', '120 per minute')
+
+
+# Один лимит на клиента для всех маршрутов API
+limiter.limit(_api_limit)(api_bp)
+
+# Параметры, от которых зависит ответ; остальные (utm_* и т.п.) не
+# попадают в ключ кэша
+QUERY_ARGS = frozenset(('after', 'before', 'limit', 'fields', 'category',
+                        'tag', 'q', 'kind', 'page', 'per_page'))
+
+responses = LRUStore()
+
+
+@api_bp.record_once
+def _configure(state):
+    config = state.app.config
+    responses.max_entries = config.get('API_CACHE_MAX_ENTRIES', 256)
+    responses.ttl = config.get('CACHE_TTL', 300)
+    responses.clear()
+
+
+def _purge(sender, **kwargs):
+    responses.clear()
+
+
+content_changed.connect(_purge, weak=False)
+
+# Поле ответа -> колонки, которые нужно загрузить
+SOLUTION_FIELDS = {
+    'id': ('id',), 'slug': ('slug',), 'name': ('name',),
+    'description': ('description',), 'image': ('image_path',),
+    'price': ('price',), 'delivery_days': ('delivery_days',),
+    'tags': ('is_new', 'is_popular'), 'category': ('category',),
+}
+SOLUTION_DEFAULT_FIELDS = ('id', 'name', 'description', 'image', 'price',
+                           'delivery_days', 'tags', 'category')
+
+PROJECT_FIELDS = {
+    'id': ('id',), 'slug': ('slug',), 'title': ('title',),
+    'category': ('category',), 'package': ('package',),
+    'duration': ('duration',), 'geo': ('geo',), 'images': ('images',),
+    'features': ('features',), 'testimonial': ('testimonial',),
+    'client': ('client',), 'live_url': ('live_url',),
+}
+PROJECT_LIST_FIELDS = ('id', 'slug', 'title', 'category', 'package', 'geo',
+                       'images')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def _upload_url():
+    # Один вызов url_for на ответ вместо вызова на каждую строку
+    return url_for('static', filename='uploads/')
+
+
+def _solution_value(solution, field, upload_url):
+    if field == 'image':
+        return upload_url + solution.image_path if solution.image_path else None
+    if field == 'tags':
+        return ['new'] if solution.is_new else \
+            ['popular'] if solution.is_popular else []
+    return getattr(solution, field)
+
+
+def _project_value(project, field, upload_url):
+    if field == 'images':
+        return [upload_url + image for image in project.images or []]
+    return getattr(project, field)
+
+
+def _parse_fields(allowed, default):
+    raw = request.args.get('fields')
+    if not raw:
+        return list(default)
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ApiError(f"Неизвестные поля: {', '.join(unknown)}")
+    return fields
+
+
+def _load_only(model, allowed, fields):
+    columns = {'id'}
+    for field in fields:
+        columns.update(allowed[field])
+    return load_only(*[getattr(model, column) for column in sorted(columns)])
+
+
+def _list_page(query, model, allowed, fields, value):
+    try:
+        page = paginate(query.options(_load_only(model, allowed, fields)),
+                        (model.id,), *page_args('API_PAGE_SIZE'))
+    except BadRequest:
+        raise ApiError('Некорректный курсор') from None
+
+    upload_url = _upload_url()
+    items = [{field: value(row, field, upload_url) for field in fields}
+             for row in page.items]
+    return {'items': items, 'next': page.next_cursor, 'prev': page.prev_cursor}
+
+
+def _cache_key():
+    args = sorted((key, value) for key, value in request.args.items(multi=True)
+                  if key in QUERY_ARGS)
+    return cache.current_version, request.path, tuple(args)
+
+
+def _cached_json(build, endpoint=None, cursor_arg='after'):
+    # Тело и ETag строятся один раз на версию контента и набор параметров
+    key = _cache_key()
+    cached = responses.get(key)
+    try:
+        if cached is None:
+            payload = build()
+            body = dumps(payload)
+            cached = (body, hashlib.sha1(body).hexdigest(),
+                      payload.get('next'), payload.get('prev'))
+            responses.set(key, cached)
+    except ApiError as exc:
+        return current_app.response_class(dumps({'error': exc.message}),
+                                          status=exc.status,
+                                          mimetype='application/json')
+
+    body, etag, next_cursor, prev_cursor = cached
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Время изменения версии контента (mtime общего файла при
+    # CACHE_BACKEND=file), одинаковое во всех воркерах
+    response.last_modified = datetime.fromtimestamp(cache.last_modified,
+                                                    timezone.utc)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('API_CACHE_MAX_AGE', 0)
+    response.cache_control.must_revalidate = True
+    if endpoint:
+        links = []
+        for rel, cursor, arg in (('next', next_cursor, cursor_arg),
+                                 ('prev', prev_cursor, 'before')):
+            if cursor is None:
+                continue
+            args = {key: value for key, value in request.args.items()
+                    if key in QUERY_ARGS and key not in ('after', 'before')}
+            args[arg] = cursor
+            links.append(f'<{url_for(endpoint, **args)}>; rel="{rel}"')
+        if links:
+            response.headers['Link'] = ', '.join(links)
+    return response.make_conditional(request)
+
+
+@api_bp.route('/api/solutions')
+def solutions():
+    def build():
+        fields = _parse_fields(SOLUTION_FIELDS, SOLUTION_DEFAULT_FIELDS)
+        query = Solution.query
+        category = request.args.get('category')
+        if category:
+            query = query.filter(Solution.category == category)
+        tag = request.args.get('tag')
+        if tag == 'new':
+            query = query.filter(Solution.is_new.is_(True))
+        elif tag == 'popular':
+            query = query.filter(Solution.is_popular.is_(True))
+        elif tag:
+            raise ApiError(f'Неизвестный тег: {tag}')
+        return _list_page(query, Solution, SOLUTION_FIELDS, fields,
+                          _solution_value)
+
+    return _cached_json(build, 'api.solutions')
+
+
+@api_bp.route('/api/projects')
+def projects():
+    def build():
+        fields = _parse_fields(PROJECT_FIELDS, PROJECT_LIST_FIELDS)
+        query = PortfolioItem.query
+        category = request.args.get('category')
+        if category:
+            query = query.filter(PortfolioItem.category == category)
+        return _list_page(query, PortfolioItem, PROJECT_FIELDS, fields,
+                          _project_value)
+
+    return _cached_json(build, 'api.projects')
+
+
+@api_bp.route('/api/projects/<int:project_id>')
+def project(project_id):
+    def build():
+        fields = _parse_fields(PROJECT_FIELDS, PROJECT_LIST_FIELDS)
+        item = (PortfolioItem.query
+                .options(_load_only(PortfolioItem, PROJECT_FIELDS, fields))
+                .filter(PortfolioItem.id == project_id)
+                .first())
+        if item is None:
+            raise ApiError('Проект не найден', status=404)
+        upload_url = _upload_url()
+        return {field: _project_value(item, field, upload_url)
+                for field in fields}
+
+    return _cached_json(build)
+
+
+SEARCH_KINDS = {'solution': 'main.package_details', 'portfolio': 'main.portfolio_detail'}
+
+
+@api_bp.route('/api/search')
+def search():
+    def build():
+        query = request.args.get('q', '').strip()
+        if not query:
+            raise ApiError('Пустой запрос')
+        kind = request.args.get('kind')
+        if kind and kind not in SEARCH_KINDS:
+            raise ApiError(f'Неизвестный тип: {kind}')
+        config = current_app.config
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = request.args.get('per_page', config.get('API_PAGE_SIZE', 20),
+                                    type=int)
+        per_page = max(1, min(per_page, config.get('PAGE_SIZE_MAX', 100)))
+
+        total, hits = search_index.query(query, kind, (page - 1) * per_page,
+                                         per_page)
+        items = []
+        for hit in hits:
+            args = {'package_slug': hit.slug} if hit.kind == 'solution' \
+                else {'slug': hit.slug}
+            items.append({'kind': hit.kind, 'slug': hit.slug, 'title': hit.title,
+                          'excerpt': hit.excerpt, 'score': hit.score,
+                          'url': url_for(SEARCH_KINDS[hit.kind], **args)})
+        return {'items': items, 'total': total, 'page': page,
+                'per_page': per_page,
+                'next': page + 1 if page * per_page < total else None}
+
+    return _cached_json(build, 'api.search', cursor_arg='page')
@@ -0,0 +1,244 @@
+# Статика с хешем в имени и заранее сжатыми копиями (.gz / .br).
+# flask assets build -> static/dist/<путь>.<hash>.<ext> + manifest.json;
+# url_for('static', filename='css/style.css') отдаёт имя с хешем,
+# а обработчик static выбирает сжатую копию по Accept-Encoding.
+# Для каждой страницы build также собирает урезанную таблицу стилей
+# css/pages/<шаблон>.css и критический CSS первого экрана (dist/pages.json):
+# base.html встраивает его в <head>, а остальное грузит без блокировки.
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+import click
+from flask import current_app, g, has_request_context, request, \
+    send_from_directory, before_render_template
+from flask.cli import with_appcontext
+
+from .critical_css import page_styles
+from .uploads import uploads
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DIST_FOLDER = 'dist'
+PAGES_FOLDER = 'css/pages'
+# Порядок предпочтения кодировок
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class AssetManifest:
+    """Соответствие исходного имени файла имени с хешем."""
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+        self.files = {}
+        self.hashed = set()
+
+    def refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            with open(self.path, encoding='utf-8') as f:
+                self._load(json.load(f))
+            self._stamp = stamp
+
+    def _load(self, files):
+        self.files = files
+        self.hashed = set(files.values())
+
+
+class PageStyles(AssetManifest):
+    """Критический CSS и имя таблицы стилей для каждого шаблона страницы."""
+
+    def _load(self, pages):
+        self.files = pages
+
+
+class Assets:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.manifest = None
+        self.pages = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('ASSETS_ENABLED', True)
+        self.folders = app.config.get('ASSET_FOLDERS', ('css', 'js'))
+        self.max_age = app.config.get('ASSET_MAX_AGE', 365 * 24 * 3600)
+        self.manifest = AssetManifest(
+            os.path.join(app.static_folder, DIST_FOLDER, 'manifest.json'))
+        self.critical = app.config.get('ASSETS_CRITICAL_CSS', True)
+        self.pages = PageStyles(
+            os.path.join(app.static_folder, DIST_FOLDER, 'pages.json'))
+
+        app.url_defaults(self._inject_hashed_name)
+        before_render_template.connect(_remember_template, app)
+        app.jinja_env.globals['page_stylesheet'] = page_stylesheet
+        app.view_functions['static'] = serve_static
+        app.cli.add_command(assets_cli)
+        app.extensions['assets'] = self
+
+    def _inject_hashed_name(self, endpoint, values):
+        if not self.enabled or endpoint != 'static':
+            return
+        self.manifest.refresh()
+        hashed = self.manifest.files.get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+
+assets = Assets()
+
+
+def _remember_template(sender, template, context, **extra):
+    # Первый шаблон запроса - страница; остальные (фрагменты) её не меняют
+    if has_request_context():
+        g.setdefault('page_template', template.name)
+
+
+def page_stylesheet():
+    """{'critical': ..., 'stylesheet': ...} для текущей страницы или None."""
+    if not assets.enabled or not assets.critical or not has_request_context():
+        return None
+    assets.pages.refresh()
+    return assets.pages.files.get(g.get('page_template'))
+
+
+def serve_static(filename):
+    static_folder = current_app.static_folder
+    assets.manifest.refresh()
+    if uploads.is_immutable(filename):
+        # Загрузки названы по хешу содержимого - тоже кэшируются навсегда
+        response = send_from_directory(static_folder, filename,
+                                       max_age=assets.max_age)
+        response.cache_control.immutable = True
+        return response
+    if filename not in assets.manifest.hashed:
+        return current_app.send_static_file(filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(
+                os.path.join(static_folder, filename + suffix)):
+            response = send_from_directory(static_folder, filename + suffix,
+                                           mimetype=mimetype,
+                                           max_age=assets.max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(static_folder, filename,
+                                       mimetype=mimetype,
+                                       max_age=assets.max_age)
+
+    # Имя меняется вместе с содержимым - файл можно кэшировать навсегда
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+def _fingerprint(source, static_folder):
+    with open(source, 'rb') as f:
+        data = f.read()
+    relpath = os.path.relpath(source, static_folder).replace(os.sep, '/')
+    return relpath, _write_hashed(data, relpath, static_folder)
+
+
+def _write_hashed(data, relpath, static_folder):
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = os.path.splitext(relpath)
+    hashed = f'{DIST_FOLDER}/{stem}.{digest}{ext}'
+    target = os.path.join(static_folder, *hashed.split('/'))
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+        with open(target + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(target + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+    return hashed
+
+
+def _build_page_styles(static_folder, files):
+    config = current_app.config
+    stylesheet_name = config.get('ASSETS_CRITICAL_STYLESHEET', 'css/style.css')
+    with open(os.path.join(static_folder, stylesheet_name), encoding='utf-8') as f:
+        stylesheet = f.read()
+    scripts = []
+    for relpath in files:
+        if relpath.endswith('.js'):
+            with open(os.path.join(static_folder, relpath), encoding='utf-8') as f:
+                scripts.append(f.read())
+
+    limit = config.get('ASSETS_CRITICAL_MAX_BYTES', 14 * 1024)
+    sections = config.get('ASSETS_CRITICAL_SECTIONS', 1)
+    pages, oversized = {}, []
+    styles = page_styles(current_app.jinja_env, stylesheet, scripts,
+                         sections=sections, max_bytes=limit,
+                         exclude=config.get('ASSETS_CRITICAL_EXCLUDE', ('admin/',)))
+    for name, style in sorted(styles.items()):
+        relpath = f'{PAGES_FOLDER}/{os.path.splitext(name)[0]}.css'
+        files[relpath] = _write_hashed(style.stylesheet.encode('utf-8'), relpath,
+                                       static_folder)
+        # CSS встраивается в <style>: закрывающий тег внутри него недопустим
+        pages[name] = {'critical': style.critical.replace('</', '<\\/'),
+                       'stylesheet': relpath}
+        size = len(style.critical.encode('utf-8'))
+        note = f' (секций: {style.sections})' if style.sections < sections else ''
+        click.echo(f'{name}: критический {size} Б{note}, страница '
+                   f'{len(style.stylesheet.encode("utf-8"))} Б')
+        if size > limit:
+            oversized.append(name)
+    if oversized:
+        # Даже без секций контента не влезает: растёт base.html / style.css
+        raise click.ClickException(
+            f'Критический CSS больше {limit} Б: {", ".join(oversized)}')
+    return pages
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+@click.group('assets')
+def assets_cli():
+    """Статические файлы с хешем в имени."""
+
+
+@assets_cli.command('build')
+@with_appcontext
+def build_command():
+    """Создаёт копии css/js с хешем, сжатые версии и CSS страниц."""
+    static_folder = current_app.static_folder
+    files = {}
+    for folder in assets.folders:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(static_folder, folder)):
+            for name in filenames:
+                relpath, hashed = _fingerprint(os.path.join(dirpath, name),
+                                               static_folder)
+                files[relpath] = hashed
+                click.echo(f'{relpath} -> {hashed}')
+
+    pages = _build_page_styles(static_folder, files) if assets.critical else None
+    # Манифест раньше pages.json: css/pages/* должны разрешаться в имена
+    # с хешем, как только страницы начнут на них ссылаться
+    _write_json(assets.manifest.path, files)
+    if pages is not None:
+        _write_json(assets.pages.path, pages)
+    if brotli is None:
+        click.echo('brotli не установлен: созданы только .gz', err=True)
@@ -0,0 +1,223 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from blinker import Namespace
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+_signals = Namespace()
+# Сигнал об изменении контента в админке: sender - вид сущности
+# ('solution', 'portfolio', 'about', 'contacts'), key - slug/раздел
+content_changed = _signals.signal('content-changed')
+
+_MISSING = object()
+
+
+class LRUStore:
+    """Потокобезопасное хранилище с вытеснением по LRU и TTL."""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalVersion:
+    """Версия контента в памяти процесса (один воркер / разработка)."""
+
+    def __init__(self):
+        self._value = 0
+        self._changed_at = time.time()
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self._value
+
+    def changed_at(self):
+        return self._changed_at
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            self._changed_at = time.time()
+            return self._value
+
+
+class FileVersion:
+    """Версия контента в файле, общем для всех воркеров gunicorn.
+
+    Файл перечитывается только при изменении (inode, mtime, размер), поэтому
+    проверка на каждом запросе стоит один stat(). bump() пишет новое значение
+    во временный файл и подменяет им общий через os.replace() под блокировкой
+    соседнего .lock-файла, так что читатель видит либо старое, либо новое
+    значение целиком, а новый inode выдаёт изменение даже при той же длине
+    и грубом mtime. mtime файла - общее для всех время последнего изменения
+    (Last-Modified, отставание реплики).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+        self._value = 0
+        self._changed_at = time.time()
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._create()
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            try:
+                with open(self.path) as f:
+                    self._value = int(f.read().strip())
+            except (OSError, ValueError):
+                return
+            self._stamp = stamp
+            self._changed_at = st.st_mtime
+
+    def _write_temp(self, value):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path),
+                                        prefix='.version-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(value))
+        return tmp_path
+
+    def _create(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # link() не перезаписывает файл, появившийся в другом воркере
+        tmp_path = self._write_temp(0)
+        try:
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    def get(self):
+        self._refresh()
+        return self._value
+
+    def changed_at(self):
+        self._refresh()
+        return self._changed_at
+
+    def bump(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Блокировка на отдельном файле: inode самого файла версии меняется
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path) as f:
+                        value = int(f.read().strip()) + 1
+                except (OSError, ValueError):
+                    value = 1
+                os.replace(self._write_temp(value), self.path)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        self._refresh()
+        return value
+
+
+class ContentCache:
+    """Read-through кэш каталога, привязанный к глобальной версии контента.
+
+    Ключи хранятся вместе с версией, поэтому после bump() в любом воркере
+    старые записи становятся недостижимыми и вытесняются по LRU/TTL.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.store = LRUStore()
+        self.version = LocalVersion()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.store = LRUStore(app.config.get('CACHE_MAX_ENTRIES', 1024),
+                              app.config.get('CACHE_TTL', 300))
+        if app.config.get('CACHE_BACKEND', 'file') == 'file':
+            path = app.config.get('CACHE_VERSION_FILE') or os.path.join(
+                app.instance_path, 'content.version')
+            self.version = FileVersion(path)
+        else:
+            self.version = LocalVersion()
+        app.extensions['content_cache'] = self
+
+    @property
+    def current_version(self):
+        return self.version.get()
+
+    @property
+    def last_modified(self):
+        return self.version.changed_at()
+
+    def get_or_load(self, key, loader):
+        if not self.enabled:
+            return loader()
+        full_key = (self.version.get(), key)
+        value = self.store.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.store.set(full_key, value)
+        return value
+
+    def bump(self, kind=None, key=None):
+        version = self.version.bump()
+        self.store.clear()
+        content_changed.send(kind, key=key, version=version)
+        return version
+
+
+cache = ContentCache()
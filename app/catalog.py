@@ -0,0 +1,96 @@
+# Загрузчики каталога для публичных страниц.
+# В кэш кладутся не ORM-объекты, а неизменяемые снимки (namedtuple): их
+# безопасно отдавать в разные запросы и потоки, а правка атрибута не
+# попадёт ни в кэш, ни в следующий commit сессии.
+from collections import namedtuple
+
+from .cache import cache
+from .pagination import paginate
+from .models import Solution, PortfolioItem, AboutContent, ContactInfo
+
+
+SolutionData = namedtuple(
+    'SolutionData', 'id name slug description short_description image_path '
+                    'price delivery_days is_new is_popular category')
+PortfolioData = namedtuple(
+    'PortfolioData', 'id title slug category package duration geo images '
+                     'image_alt summary features testimonial client live_url')
+AboutData = namedtuple('AboutData', 'section content image_path')
+ContactData = namedtuple('ContactData', 'email phone address telegram github')
+
+
+def _snapshot(row, data_type):
+    # JSON-списки превращаются в кортежи, чтобы снимок был неизменяемым
+    if row is None:
+        return None
+    values = (getattr(row, field) for field in data_type._fields)
+    return data_type._make(tuple(value) if isinstance(value, list) else value
+                           for value in values)
+
+
+def _solutions_by_category():
+    # Один запрос на все решения, разбивка по категориям - в памяти
+    def load():
+        solutions = tuple(_snapshot(solution, SolutionData) for solution
+                          in Solution.query.order_by(Solution.id))
+        grouped = {}
+        for solution in solutions:
+            grouped.setdefault(solution.category, []).append(solution)
+        return solutions, {category: tuple(items)
+                           for category, items in grouped.items()}
+
+    return cache.get_or_load(('solutions', None), load)
+
+
+def get_solutions(category=None):
+    solutions, grouped = _solutions_by_category()
+    if category is None:
+        return solutions
+    return grouped.get(category, ())
+
+
+def get_solution(slug):
+    return cache.get_or_load(
+        ('solution', slug),
+        lambda: _snapshot(Solution.query.filter_by(slug=slug).first(),
+                          SolutionData))
+
+
+def get_portfolio_items():
+    return cache.get_or_load(
+        ('portfolio', None),
+        lambda: tuple(_snapshot(item, PortfolioData) for item
+                      in PortfolioItem.query.order_by(PortfolioItem.id)))
+
+
+def get_portfolio_page(after=None, before=None, limit=12):
+    # Одна страница портфолио в порядке id; кэшируется по курсору
+    def load():
+        page = paginate(PortfolioItem.query, (PortfolioItem.id,),
+                        after, before, limit)
+        return page._replace(items=tuple(_snapshot(item, PortfolioData)
+                                         for item in page.items))
+
+    return cache.get_or_load(('portfolio_page', after, before, limit), load)
+
+
+def get_portfolio_item(slug):
+    return cache.get_or_load(
+        ('portfolio_item', slug),
+        lambda: _snapshot(PortfolioItem.query.filter_by(slug=slug).first(),
+                          PortfolioData))
+
+
+def get_about_sections():
+    # Все разделы "Обо мне" одним запросом: {section: AboutData}
+    def load():
+        return {content.section: _snapshot(content, AboutData)
+                for content in AboutContent.query}
+
+    return cache.get_or_load(('about', None), load)
+
+
+def get_contact_info():
+    return cache.get_or_load(
+        ('contacts', None),
+        lambda: _snapshot(ContactInfo.query.first(), ContactData))
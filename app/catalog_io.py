@@ -0,0 +1,377 @@
+# Массовый импорт и экспорт каталога (решения и портфолио).
+# flask catalog export solution solutions.jsonl
+# flask catalog import portfolio items.csv --media-dir ./photos --dry-run
+# Файлы JSONL / CSV читаются и пишутся построчно, в памяти держится только
+# текущая пачка из CATALOG_BATCH_SIZE строк. Строки сопоставляются с БД по
+# slug: существующие обновляются (только переданные колонки), новые
+# вставляются - два запроса на пачку. Изображения (путь относительно
+# --media-dir или http(s)-адрес) параллельно копируются в UPLOAD_FOLDER
+# под именем с хешем содержимого, так что повторный импорт не плодит копий.
+import csv
+import json
+import os
+import posixpath
+import re
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, update
+
+from . import db
+from .cache import cache
+from .forms import SLUG_PATTERN
+from .models import Solution, PortfolioItem
+from .tasks import tasks
+from .uploads import uploads
+
+
+MODELS = {'solution': Solution, 'portfolio': PortfolioItem}
+# Примеры работ для пустого портфолио: `flask catalog seed`
+SEED_FILE = os.path.join(os.path.dirname(__file__), 'seed', 'portfolio.jsonl')
+SEED_MEDIA_DIR = os.path.join(os.path.dirname(__file__), 'static', 'projects')
+# Колонки со ссылками на изображения: строка или список строк
+MEDIA_FIELDS = {'solution': ('image_path',), 'portfolio': ('images',)}
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'on', 'да'}
+# Те же правила, что в формах админки: slug входит в URL страниц
+SLUG_RE = re.compile(SLUG_PATTERN)
+
+
+class RowError(ValueError):
+    pass
+
+
+def _columns(model):
+    return [column for column in model.__table__.columns if column.key != 'id']
+
+
+def _required(columns):
+    # NOT NULL без значения по умолчанию: без них новую запись не вставить
+    return [key for key, column in columns.items()
+            if not column.nullable and column.default is None
+            and column.server_default is None]
+
+
+def _detect_format(file, fmt):
+    if fmt != 'auto':
+        return fmt
+    name = getattr(file, 'name', '') or ''
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    raise click.UsageError('Не удалось определить формат, укажите --format')
+
+
+# ----- экспорт -----
+
+def _export_rows(model, batch_size):
+    columns = _columns(model)
+    query = (select(*columns).order_by(model.id)
+             .execution_options(yield_per=batch_size))
+    for row in db.session.execute(query):
+        yield dict(zip((column.key for column in columns), row))
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return '' if value is None else value
+
+
+# ----- импорт -----
+
+def _read_rows(file, fmt):
+    # (номер строки, словарь) без чтения файла целиком
+    if fmt == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, RowError(f'некорректный JSON: {exc}')
+            continue
+        yield number, row if isinstance(row, dict) else RowError('ожидался объект')
+
+
+def _coerce(column, value, from_text):
+    if value is None:
+        return None
+    if isinstance(column.type, db.Boolean):
+        return value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+    if isinstance(column.type, db.Integer):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise RowError(f'{column.key}: ожидалось целое число') from None
+    if isinstance(column.type, db.JSON):
+        if from_text and isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                # Список через «|» удобнее набирать в таблице
+                return [part.strip() for part in value.split('|') if part.strip()]
+        return value
+    return str(value)
+
+
+def _prepare(row, columns, from_text):
+    values = {}
+    for key, value in row.items():
+        column = columns.get(key)
+        # Пустая ячейка CSV - значение не передано, старое не затирается
+        if column is None or (from_text and value == ''):
+            continue
+        values[key] = _coerce(column, value, from_text)
+        if values[key] is None and not column.nullable:
+            raise RowError(f'{key}: значение обязательно')
+    slug = values.get('slug')
+    if not slug:
+        raise RowError('нет slug')
+    if len(slug) > 200 or not SLUG_RE.match(slug):
+        raise RowError(f'slug {slug!r}: только латиница в нижнем регистре, '
+                       'цифры и дефисы')
+    return values
+
+
+def _media_references(kind, values):
+    for field in MEDIA_FIELDS[kind]:
+        value = values.get(field)
+        for reference in value if isinstance(value, list) else [value]:
+            if reference:
+                yield reference
+
+
+def _ingest(reference, media_dir, upload_folder, allowed, timeout, dry_run):
+    # -> (имя в UPLOAD_FOLDER, скопирован ли новый файл)
+    if '/' not in reference and os.path.isfile(os.path.join(upload_folder, reference)):
+        return reference, False
+    remote = reference.startswith(('http://', 'https://'))
+    name = posixpath.basename(urllib.parse.urlparse(reference).path) if remote \
+        else os.path.basename(reference)
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    if extension not in allowed:
+        raise RowError(f'{reference}: недопустимый тип файла')
+    if remote:
+        if dry_run:
+            return reference, False
+        with urllib.request.urlopen(reference, timeout=timeout) as response:
+            return uploads.save(response, name)
+    path = os.path.join(media_dir, reference)
+    if not os.path.isfile(path):
+        raise RowError(f'{reference}: файл не найден')
+    if dry_run:
+        return reference, False
+    with open(path, 'rb') as f:
+        return uploads.save(f, name)
+
+
+class Importer:
+    def __init__(self, kind, media_dir, workers, dry_run):
+        config = current_app.config
+        self.kind = kind
+        self.model = MODELS[kind]
+        self.columns = {column.key: column for column in _columns(self.model)}
+        self.required = _required(self.columns)
+        self.media_dir = media_dir
+        self.upload_folder = config['UPLOAD_FOLDER']
+        self.allowed = config.get('ALLOWED_EXTENSIONS', ())
+        self.timeout = config.get('CATALOG_MEDIA_TIMEOUT', 30)
+        self.workers = workers
+        self.dry_run = dry_run
+        self.stats = {'inserted': 0, 'updated': 0, 'errors': 0, 'media': 0}
+        self.new_files = []
+
+    def run(self, rows, batch_size, from_text):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                self._batch(batch, executor, from_text)
+                yield self.stats
+
+    def _error(self, number, error):
+        self.stats['errors'] += 1
+        click.echo(f'Строка {number}: {error}', err=True)
+
+    def _batch(self, batch, executor, from_text):
+        # Повтор slug в пачке: побеждает последняя строка
+        prepared = {}
+        for number, row in batch:
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                values = _prepare(row, self.columns, from_text)
+            except RowError as exc:
+                self._error(number, exc)
+                continue
+            prepared[values['slug']] = (number, values)
+
+        references = {reference for _, values in prepared.values()
+                      for reference in _media_references(self.kind, values)}
+        media = dict(zip(references, executor.map(self._ingest_safely, references)))
+        rows = []
+        for number, values in prepared.values():
+            failed = next((media[reference] for reference
+                           in _media_references(self.kind, values)
+                           if isinstance(media[reference], Exception)), None)
+            if failed is not None:
+                self._error(number, failed)
+                continue
+            for field in MEDIA_FIELDS[self.kind]:
+                value = values.get(field)
+                if isinstance(value, list):
+                    values[field] = [media[reference][0] for reference in value if reference]
+                elif value:
+                    values[field] = media[value][0]
+            rows.append((number, values))
+        for result in media.values():
+            if not isinstance(result, Exception) and result[1]:
+                self.new_files.append(result[0])
+                self.stats['media'] += 1
+        if rows:
+            self._write(rows)
+
+    def _ingest_safely(self, reference):
+        # Ошибка одного файла отбрасывает только его строку
+        try:
+            return _ingest(reference, self.media_dir, self.upload_folder,
+                           self.allowed, self.timeout, self.dry_run)
+        except (RowError, OSError) as exc:
+            return exc if isinstance(exc, RowError) else RowError(f'{reference}: {exc}')
+
+    def _write(self, rows):
+        # rows - [(номер строки, значения)]
+        model = self.model
+        existing = dict(db.session.execute(
+            select(model.slug, model.id).where(
+                model.slug.in_([values['slug'] for _, values in rows]))
+        ).all())
+        inserts, updates = [], []
+        for number, values in rows:
+            if values['slug'] in existing:
+                # Обновляются только переданные колонки
+                updates.append({'id': existing[values['slug']], **values})
+                continue
+            missing = [key for key in self.required if key not in values]
+            if missing:
+                self._error(number, f"нет обязательных полей: {', '.join(missing)}")
+                continue
+            inserts.append(values)
+        if inserts:
+            db.session.execute(insert(model), inserts)
+        if updates:
+            db.session.execute(update(model), updates)
+        if self.dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        self.stats['inserted'] += len(inserts)
+        self.stats['updated'] += len(updates)
+
+
+@click.group('catalog')
+def catalog_cli():
+    """Массовый импорт и экспорт каталога."""
+
+
+@catalog_cli.command('export')
+@click.argument('kind', type=click.Choice(sorted(MODELS)))
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'jsonl', 'csv']),
+              default='auto', show_default=True)
+@with_appcontext
+def export_command(kind, output, fmt):
+    """Выгружает решения или проекты портфолио в JSONL / CSV."""
+    fmt = 'jsonl' if fmt == 'auto' and output.name == '<stdout>' \
+        else _detect_format(output, fmt)
+    model = MODELS[kind]
+    rows = _export_rows(model, current_app.config.get('CATALOG_BATCH_SIZE', 500))
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(output, [column.key for column in _columns(model)])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({key: _csv_value(value) for key, value in row.items()})
+            count += 1
+    else:
+        for row in rows:
+            output.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+            count += 1
+    click.echo(f'Выгружено записей: {count}', err=True)
+
+
+@catalog_cli.command('import')
+@click.argument('kind', type=click.Choice(sorted(MODELS)))
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(['auto', 'jsonl', 'csv']),
+              default='auto', show_default=True)
+@click.option('--media-dir', type=click.Path(file_okay=False, exists=True),
+              default='.', show_default=True,
+              help='Каталог, относительно которого указаны пути изображений.')
+@click.option('--batch-size', type=click.IntRange(1), default=None,
+              help='Строк в пачке (по умолчанию CATALOG_BATCH_SIZE).')
+@click.option('--workers', type=click.IntRange(1), default=None,
+              help='Потоков копирования изображений (CATALOG_MEDIA_WORKERS).')
+@click.option('--dry-run', is_flag=True,
+              help='Проверить файл без записи в БД и UPLOAD_FOLDER.')
+@with_appcontext
+def import_command(kind, source, fmt, media_dir, batch_size, workers, dry_run):
+    """Загружает решения или проекты портфолио из JSONL / CSV (upsert по slug)."""
+    if source.name == '<stdin>' and fmt == 'auto':
+        raise click.UsageError('Для stdin укажите --format')
+    fmt = _detect_format(source, fmt)
+    config = current_app.config
+    importer = Importer(kind, media_dir,
+                        workers or config.get('CATALOG_MEDIA_WORKERS', 8), dry_run)
+    rows = _read_rows(source, fmt)
+    for stats in importer.run(rows, batch_size or config.get('CATALOG_BATCH_SIZE', 500),
+                              from_text=fmt == 'csv'):
+        click.echo(f"добавлено {stats['inserted']}, обновлено {stats['updated']}, "
+                   f"изображений {stats['media']}, ошибок {stats['errors']}", err=True)
+
+    stats = importer.stats
+    if dry_run:
+        click.echo('Пробный запуск: изменения не сохранены.')
+    elif stats['inserted'] or stats['updated']:
+        for filename in importer.new_files:
+            tasks.enqueue('process_upload',
+                          filepath=os.path.join(importer.upload_folder, filename),
+                          filename=filename)
+        # Один сигнал вместо сигнала на каждую строку: без ключа sitemap
+        # сверяется целиком, FTS5-индекс пересобирается, а индексы в памяти
+        # воркеров - при следующем поиске по новой версии кэша
+        cache.bump(kind)
+        if not config.get('SITEMAP_BASE_URL'):
+            click.echo('Sitemap не обновлён: не задан SITEMAP_BASE_URL.', err=True)
+    click.echo(f"Итого: добавлено {stats['inserted']}, обновлено {stats['updated']}, "
+               f"изображений {stats['media']}, ошибок {stats['errors']}")
+    if stats['errors']:
+        raise SystemExit(1)
+
+
+@catalog_cli.command('seed')
+@click.pass_context
+@with_appcontext
+def seed_command(ctx):
+    """Загружает примеры работ в портфолио (повторный запуск обновляет их)."""
+    with open(SEED_FILE, encoding='utf-8') as source:
+        ctx.invoke(import_command, kind='portfolio', source=source, fmt='jsonl',
+                   media_dir=SEED_MEDIA_DIR, batch_size=None, workers=None,
+                   dry_run=False)
+
+
+def init_app(app):
+    app.cli.add_command(catalog_cli)
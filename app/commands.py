@@ -0,0 +1,85 @@
+# Команды обслуживания: схема БД, администратор, замер времени старта.
+import os
+import statistics
+import subprocess
+import sys
+
+import click
+from flask.cli import with_appcontext
+
+from . import db
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Создаёт или обновляет схему БД миграциями."""
+    from flask_migrate import upgrade
+    from sqlalchemy import inspect
+    tables = set(inspect(db.engine).get_table_names())
+    if 'admin' in tables and 'alembic_version' not in tables:
+        # Схема создана старым init-db через create_all, без метки версии
+        raise click.ClickException(
+            'БД создана без миграций: отметьте её текущую ревизию командой '
+            'flask db stamp <ревизия> и повторите init-db.')
+    upgrade()
+    click.echo('Схема БД обновлена.')
+    # Поисковый индекс FTS5 - тоже часть БД; запросы его не создают
+    from .search import search
+    count = search.rebuild()
+    click.echo(f'Проиндексировано документов: {count} '
+               f'({search.backend.name})')
+
+
+@click.command('create-admin')
+@click.option('--username', default='admin', show_default=True)
+@click.option('--password', envvar='ADMIN_PASSWORD', prompt=True,
+              hide_input=True, confirmation_prompt=True)
+@with_appcontext
+def create_admin_command(username, password):
+    """Создаёт администратора, если его ещё нет."""
+    from .models import Admin
+    if Admin.query.filter_by(username=username).first():
+        click.echo(f'Администратор {username} уже существует.')
+        return
+    admin = Admin(username=username)
+    admin.set_password(password)
+    db.session.add(admin)
+    db.session.commit()
+    click.echo(f'Администратор {username} создан.')
+
+
+STARTUP_SCRIPT = (
+    'import time; started = time.perf_counter(); '
+    'from app import create_app; create_app(); '
+    'print(time.perf_counter() - started)'
+)
+
+
+@click.command('startup-time')
+@click.option('--runs', default=5, show_default=True,
+              help='Количество холодных запусков.')
+@click.option('--max-ms', type=float, default=None,
+              help='Порог медианы; при превышении код возврата 1.')
+def startup_time_command(runs, max_ms):
+    """Замеряет холодный импорт и create_app() в отдельных процессах."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT],
+                                cwd=root, check=True, capture_output=True,
+                                text=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]) * 1000)
+
+    median = statistics.median(timings)
+    click.echo(f'min {min(timings):.1f} мс, медиана {median:.1f} мс, '
+               f'max {max(timings):.1f} мс')
+    if max_ms is not None and median > max_ms:
+        click.echo(f'Медиана превышает порог {max_ms:.1f} мс', err=True)
+        raise SystemExit(1)
+
+
+def init_app(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(create_admin_command)
+    app.cli.add_command(startup_time_command)
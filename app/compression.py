@@ -0,0 +1,120 @@
+# Сжатие ответов на лету: brotli (если установлен) или gzip по
+# Accept-Encoding. Обычные ответы сжимаются целиком, если они не меньше
+# COMPRESS_MIN_SIZE; результат для ответов с ETag (кэш страниц, API)
+# запоминается, так что повторный HIT не сжимается заново. Потоковые
+# ответы сжимаются по частям со сбросом после каждой, поэтому <head>
+# доходит до браузера сразу. Статика из static/dist уже сжата заранее
+# (Content-Encoding выставлен) и здесь не трогается.
+import zlib
+
+from flask import request
+from werkzeug.wsgi import ClosingIterator
+
+from .cache import LRUStore
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULT_MIMETYPES = ('text/html', 'text/css', 'text/plain', 'text/xml',
+                     'application/json', 'application/javascript',
+                     'application/xml', 'image/svg+xml')
+
+
+class _GzipCompressor:
+    # Интерфейс brotli.Compressor поверх zlib
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class Compression:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.store = LRUStore()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES))
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 5)
+        self.encodings = (['br'] if brotli is not None else []) + ['gzip']
+        self.store = LRUStore(app.config.get('COMPRESS_CACHE_ENTRIES', 256))
+        app.extensions['compression'] = self
+        if self.enabled:
+            app.after_request(self._after_request)
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            return brotli.Compressor(quality=self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def _compress(self, data, encoding):
+        compressor = self._compressor(encoding)
+        return compressor.process(data) + compressor.finish()
+
+    def _after_request(self, response):
+        # HEAD проходит тот же путь, что и GET: заголовки (Content-Encoding,
+        # Content-Length) должны совпадать, тело отбросит werkzeug
+        if response.direct_passthrough \
+                or response.status_code < 200 or response.status_code in (204, 206, 304) \
+                or 'Content-Encoding' in response.headers \
+                or response.mimetype not in self.mimetypes:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        etag, _ = response.get_etag()
+        if response.is_streamed:
+            # Исходный поток закрывается, даже если сжатый не начали читать
+            # (HEAD, обрыв соединения)
+            chunks = response.response
+            close = getattr(chunks, 'close', None)
+            response.response = ClosingIterator(self._stream(chunks, encoding),
+                                                close)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            key = (etag, encoding)
+            compressed = self.store.get(key) if etag else None
+            if compressed is None:
+                compressed = self._compress(body, encoding)
+                if etag:
+                    self.store.set(key, compressed)
+            response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # Сжатое представление не побайтно равно исходному; для
+            # If-None-Match слабого сравнения достаточно
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _stream(self, chunks, encoding):
+        compressor = self._compressor(encoding)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+compression = Compression()
@@ -0,0 +1,159 @@
+import os
+from dotenv import load_dotenv
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+# Корень проекта: .env и build/ лежат рядом с main.py
+rootdir = os.path.dirname(basedir)
+load_dotenv(os.path.join(rootdir, '.env'))
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    # Относительный путь SQLite считается от каталога instance
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Пул соединений и SQLite (WAL, ожидание блокировки в мс)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') != '0'
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', '1') != '0'
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+
+    # Реплика для чтения публичных страниц и API; после изменений DATABASE_REPLICA_LAG
+    # секунд чтение идёт с основной БД
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    DATABASE_REPLICA_BLUEPRINTS = ('main', 'api')
+    DATABASE_REPLICA_LAG = int(os.environ.get('DATABASE_REPLICA_LAG', 10))
+
+    # Ограничение частоты запросов: счётчики общие для всех воркеров
+    # (по умолчанию sqlite:///<instance>/ratelimit.db, см. app/ratelimit.py)
+    RATELIMIT_STORAGE_URI = os.environ.get('RATELIMIT_STORAGE_URI')
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    RATELIMIT_LOGIN = os.environ.get('RATELIMIT_LOGIN', '5 per minute;20 per hour')
+    RATELIMIT_API = os.environ.get('RATELIMIT_API', '120 per minute')
+    RATELIMIT_ORDER = os.environ.get('RATELIMIT_ORDER', '5 per minute')
+
+    # Внутри app/static: загрузки отдаёт маршрут static с immutable-кэшем
+    UPLOAD_FOLDER = os.path.join(basedir, 'static/uploads')
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp'}
+    MAX_CONTENT_LENGTH = 2 * 1024 * 1024  # 2MB
+    # Загрузки названы по хешу содержимого; `flask uploads gc` удаляет файлы
+    # без ссылок из БД, но не моложе UPLOAD_GC_GRACE секунд
+    UPLOAD_GC_GRACE = int(os.environ.get('UPLOAD_GC_GRACE', 3600))
+
+    # Кэш каталога: file - общая для воркеров версия в файле, local - в
+    # памяти процесса (только один воркер; gunicorn.conf.py это проверяет)
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', '1') != '0'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'file')
+    CACHE_VERSION_FILE = os.environ.get('CACHE_VERSION_FILE')
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 300))
+
+    # Кэш готовых страниц (ETag / 304)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') != '0'
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 300))
+    PAGE_CACHE_MAX_AGE = int(os.environ.get('PAGE_CACHE_MAX_AGE', 0))
+
+    # Потоковая отдача страниц (render_page) и сжатие ответов на лету;
+    # brotli используется, если установлен, иначе gzip
+    STREAM_TEMPLATES = os.environ.get('STREAM_TEMPLATES', '1') != '0'
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 8192))
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') != '0'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+    COMPRESS_CACHE_ENTRIES = int(os.environ.get('COMPRESS_CACHE_ENTRIES', 256))
+
+    # Статический экспорт (flask freeze)
+    FREEZE_DESTINATION = os.environ.get('FREEZE_DESTINATION',
+                                        os.path.join(rootdir, 'build'))
+    FREEZE_BASE_URL = os.environ.get('FREEZE_BASE_URL', 'https://localhost')
+    FREEZE_JOURNAL = os.environ.get('FREEZE_JOURNAL')
+
+    # Адаптивные варианты изображений (нужен Pillow, для AVIF - Pillow >= 11.2)
+    IMAGE_VARIANTS_ENABLED = os.environ.get('IMAGE_VARIANTS_ENABLED', '1') != '0'
+    IMAGE_VARIANT_WIDTHS = (480, 960, 1440)
+    IMAGE_VARIANT_FORMATS = ('avif', 'webp')
+    IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 75))
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+    # Статика с хешем в имени (flask assets build); для .br нужен brotli
+    ASSETS_ENABLED = os.environ.get('ASSETS_ENABLED', '1') != '0'
+    ASSET_FOLDERS = ('css', 'js')
+    ASSET_MAX_AGE = 365 * 24 * 3600
+    # Критический CSS первого экрана и урезанный CSS каждой страницы
+    # (первые ASSETS_CRITICAL_SECTIONS секций считаются первым экраном, при
+    # превышении ASSETS_CRITICAL_MAX_BYTES - меньше; сборка падает, если не
+    # влезает и без секций). Шаблоны из ASSETS_CRITICAL_EXCLUDE пропускаются
+    ASSETS_CRITICAL_CSS = os.environ.get('ASSETS_CRITICAL_CSS', '1') != '0'
+    ASSETS_CRITICAL_STYLESHEET = 'css/style.css'
+    ASSETS_CRITICAL_SECTIONS = int(os.environ.get('ASSETS_CRITICAL_SECTIONS', 1))
+    ASSETS_CRITICAL_MAX_BYTES = int(os.environ.get('ASSETS_CRITICAL_MAX_BYTES', 14 * 1024))
+    ASSETS_CRITICAL_EXCLUDE = ('admin/',)
+
+    # JSON API: Cache-Control max-age и число готовых ответов в памяти
+    API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 0))
+    API_CACHE_MAX_ENTRIES = int(os.environ.get('API_CACHE_MAX_ENTRIES', 256))
+
+    # Карта сайта: внешний адрес и лимит URL в одном файле
+    SITEMAP_BASE_URL = os.environ.get('SITEMAP_BASE_URL')
+    SITEMAP_FOLDER = os.environ.get('SITEMAP_FOLDER')
+    SITEMAP_MAX_URLS = int(os.environ.get('SITEMAP_MAX_URLS', 50000))
+
+    # Метрики (/panel/metrics) и журнал медленных запросов
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 500))
+    METRICS_PROFILE_SAMPLE_RATE = float(os.environ.get('METRICS_PROFILE_SAMPLE_RATE', 0))
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.environ.get('METRICS_N_PLUS_ONE_THRESHOLD', 3))
+    # Общий каталог серий воркеров (по умолчанию instance/metrics)
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+    # Поиск: auto - FTS5, если SQLite собран с ним, иначе индекс в памяти
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    SEARCH_MAX_TERMS = int(os.environ.get('SEARCH_MAX_TERMS', 10))
+
+    # Размер страниц списков (keyset-пагинация) и верхний предел ?limit=
+    PORTFOLIO_PAGE_SIZE = int(os.environ.get('PORTFOLIO_PAGE_SIZE', 12))
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 25))
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 20))
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 100))
+
+    # Массовый импорт каталога (flask catalog import): строк в пачке,
+    # потоков и таймаут загрузки изображений
+    CATALOG_BATCH_SIZE = int(os.environ.get('CATALOG_BATCH_SIZE', 500))
+    CATALOG_MEDIA_WORKERS = int(os.environ.get('CATALOG_MEDIA_WORKERS', 8))
+    CATALOG_MEDIA_TIMEOUT = int(os.environ.get('CATALOG_MEDIA_TIMEOUT', 30))
+
+    # Фоновые задачи: очередь в отдельной SQLite-базе (по умолчанию
+    # instance/tasks.db); TASK_WORKERS=0 - только `flask tasks worker`
+    TASK_DATABASE = os.environ.get('TASK_DATABASE')
+    TASK_WORKERS = int(os.environ.get('TASK_WORKERS', 2))
+    TASK_MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', 5))
+    TASK_RETRY_DELAY = int(os.environ.get('TASK_RETRY_DELAY', 10))
+    TASKS_EAGER = os.environ.get('TASKS_EAGER') == '1'
+
+    # Уведомления о заказах: telegram (Bot API) или stub (лог); для telegram
+    # обязателен числовой TELEGRAM_CHAT_ID
+    TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
+    TELEGRAM_CHAT_ID = os.environ.get('TELEGRAM_CHAT_ID')
+    NOTIFY_TRANSPORT = os.environ.get('NOTIFY_TRANSPORT',
+                                      'telegram' if TELEGRAM_BOT_TOKEN else 'stub')
+    NOTIFY_TIMEOUT = int(os.environ.get('NOTIFY_TIMEOUT', 10))
+
+    # Просмотры страниц: буфер в памяти, запись пачкой раз в интервал
+    ANALYTICS_ENABLED = os.environ.get('ANALYTICS_ENABLED', '1') != '0'
+    ANALYTICS_FLUSH_INTERVAL = int(os.environ.get('ANALYTICS_FLUSH_INTERVAL', 30))
+    ANALYTICS_FLUSH_THRESHOLD = int(os.environ.get('ANALYTICS_FLUSH_THRESHOLD', 500))
+    ANALYTICS_DASHBOARD_DAYS = 30
+
+    # Шаблоны: общий кэш байткода и кэш фрагментов {% cache %}
+    TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') != '0'
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    TEMPLATE_FRAGMENT_CACHE = os.environ.get('TEMPLATE_FRAGMENT_CACHE', '1') != '0'
+    TEMPLATE_FRAGMENT_MAX_ENTRIES = int(os.environ.get('TEMPLATE_FRAGMENT_MAX_ENTRIES', 512))
+    TEMPLATE_FRAGMENT_TTL = int(os.environ.get('TEMPLATE_FRAGMENT_TTL', 300))
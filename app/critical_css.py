@@ -0,0 +1,331 @@
+# Критический CSS и урезанные таблицы стилей для каждой страницы.
+# По исходникам шаблона (вместе с extends / include / import) и скриптов
+# собирается множество классов, id и тегов, которые может содержать
+# страница; из таблицы стилей остаются правила, у которых каждая часть
+# селектора встречается в этом множестве (псевдоклассы и атрибуты не
+# проверяются - лишнее правило лучше потерянного). Критический CSS -
+# то же самое, но только для разметки первого экрана: базовый шаблон до
+# блока content и первые `sections` секций страницы. Если критический CSS
+# не укладывается в max_bytes, секций берётся меньше, вплоть до нуля.
+import re
+from collections import namedtuple
+
+
+# prelude - селектор или at-правило; body - текст блока без скобок
+# (None у @import / @charset); children - вложенные правила @media / @supports
+Rule = namedtuple('Rule', 'prelude body children')
+# Стили страницы; sections - сколько секций вошло в критический CSS
+PageStyles = namedtuple('PageStyles', 'critical stylesheet sections')
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_STRING_RE = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+_SPACE_RE = re.compile(r'\s*([{};])\s*')
+_COLON_RE = re.compile(r'\s*:\s*')
+_GROUP_RE = re.compile(r'@(?:-\w+-)?(?:media|supports|document|layer|container)\b')
+_KEYFRAMES_RE = re.compile(r'@(?:-\w+-)?keyframes\s+(\S+)')
+_ANIMATION_RE = re.compile(r'animation(?:-name)?:([^;}]*)')
+
+_PSEUDO_RE = re.compile(r'::?[\w-]+(?:\([^)]*\))?')
+_ATTRIBUTE_RE = re.compile(r'\[[^\]]*\]')
+_COMBINATOR_RE = re.compile(r'\s*[>+~]\s*|\s+')
+_TAG_RE = re.compile(r'^(?:[a-zA-Z][\w-]*|\*)')
+
+_TOKEN_RE = re.compile(r'-?[A-Za-z_][\w-]*')
+_PREFIX_RE = re.compile(r'(-?[A-Za-z_][\w-]*)(?:\{\{|\$\{)')
+_CLASS_ATTR_RE = re.compile(r'''\b(?:class|cls|className)\s*[=:]\s*(["'`])(.*?)\1''')
+_CLASS_LIST_RE = re.compile(r'classList\.\w+\(([^)]*)\)')
+_ID_ATTR_RE = re.compile(r'''\bid\s*=\s*(["'])(.*?)\1''')
+_ELEMENT_RE = re.compile(r'<([a-zA-Z][a-zA-Z0-9-]*)')
+
+_EXTENDS_RE = re.compile(r'''{%-?\s*extends\s+(["'])(.+?)\1''')
+_INCLUDE_RE = re.compile(r'''{%-?\s*(?:include|import|from)\s+(["'])(.+?)\1''')
+_BLOCK_RE = re.compile(r'{%-?\s*(?:block\s+(\w+)|endblock)\b[^%]*%}')
+_CONTENT_START_RE = re.compile(r'{%-?\s*block\s+content\b')
+_SECTION_END_RE = re.compile(r'</section\s*>', re.I)
+
+
+# ----- разбор и вывод CSS -----
+
+def parse(text):
+    rules, _ = _parse(_COMMENT_RE.sub('', text), 0)
+    return rules
+
+
+def _parse(text, pos):
+    rules = []
+    start = pos
+    while pos < len(text):
+        char = text[pos]
+        if char in '"\'':
+            pos = _skip_string(text, pos)
+            continue
+        if char == '{':
+            prelude = ' '.join(text[start:pos].split())
+            if _GROUP_RE.match(prelude):
+                children, pos = _parse(text, pos + 1)
+                rules.append(Rule(prelude, None, children))
+            else:
+                end = _matching_brace(text, pos)
+                rules.append(Rule(prelude, _minify(text[pos + 1:end]), None))
+                pos = end + 1
+            start = pos
+            continue
+        if char == '}':
+            return rules, pos + 1
+        if char == ';' and text[start:pos].lstrip().startswith('@'):
+            rules.append(Rule(' '.join(text[start:pos].split()), None, None))
+            start = pos + 1
+        pos += 1
+    return rules, pos
+
+
+def _skip_string(text, pos):
+    quote = text[pos]
+    pos += 1
+    while pos < len(text) and text[pos] != quote:
+        pos += 2 if text[pos] == '\\' else 1
+    return pos + 1
+
+
+def _matching_brace(text, pos):
+    depth = 0
+    while pos < len(text):
+        char = text[pos]
+        if char in '"\'':
+            pos = _skip_string(text, pos)
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if not depth:
+                return pos
+        pos += 1
+    return pos
+
+
+def _minify(body):
+    # Пробелы сжимаются только вне строк ('', "")
+    parts = _STRING_RE.split(body)
+    for index in range(0, len(parts), 2):
+        part = ' '.join(parts[index].split())
+        parts[index] = _COLON_RE.sub(':', _SPACE_RE.sub(r'\1', part))
+    return ''.join(parts).strip().rstrip(';')
+
+
+def serialize(rules):
+    out = []
+    for rule in rules:
+        if rule.children is not None:
+            out.append(f'{rule.prelude}{{{serialize(rule.children)}}}')
+        elif rule.body is None:
+            out.append(f'{rule.prelude};')
+        else:
+            out.append(f'{rule.prelude}{{{rule.body}}}')
+    return ''.join(out)
+
+
+# ----- используемые селекторы -----
+
+class Usage:
+    """Классы, id и теги, которые встречаются в разметке страницы."""
+
+    def __init__(self, other=None):
+        self.classes = set(other.classes) if other else set()
+        # Начала классов вида badge-{{ kind }}: подходит любой badge-*
+        self.prefixes = set(other.prefixes) if other else set()
+        self.ids = set(other.ids) if other else set()
+        self.tags = set(other.tags) if other else {'html', 'head', 'body'}
+
+    def scan(self, source):
+        for _, value in _CLASS_ATTR_RE.findall(source):
+            self.classes.update(_TOKEN_RE.findall(value))
+            self.prefixes.update(_PREFIX_RE.findall(value))
+        for args in _CLASS_LIST_RE.findall(source):
+            for literal in _STRING_RE.findall(args):
+                self.classes.update(_TOKEN_RE.findall(literal))
+        for _, value in _ID_ATTR_RE.findall(source):
+            self.ids.update(_TOKEN_RE.findall(value))
+            self.prefixes.update(_PREFIX_RE.findall(value))
+        self.tags.update(tag.lower() for tag in _ELEMENT_RE.findall(source))
+
+    def has(self, name, names):
+        return name in names or any(name.startswith(prefix)
+                                    for prefix in self.prefixes)
+
+    def matches(self, selector):
+        plain = _ATTRIBUTE_RE.sub('', _PSEUDO_RE.sub('', selector))
+        for compound in _COMBINATOR_RE.split(plain.strip()):
+            if not compound:
+                continue
+            tag = _TAG_RE.match(compound)
+            if tag and tag.group() != '*' and tag.group().lower() not in self.tags:
+                return False
+            for name in re.findall(r'\.(-?[\w-]+)', compound):
+                if not self.has(name, self.classes):
+                    return False
+            for name in re.findall(r'#(-?[\w-]+)', compound):
+                if not self.has(name, self.ids):
+                    return False
+        return True
+
+
+def _split_selectors(prelude):
+    # Запятые внутри :is(...) / :not(...) не разделяют селекторы
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:index].strip())
+            start = index + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def prune(rules, usage):
+    kept = _filter(rules, usage)
+    animations = set()
+    _collect_animations(kept, animations)
+    return _drop_keyframes(kept, animations)
+
+
+def _filter(rules, usage):
+    kept = []
+    for rule in rules:
+        if rule.children is not None:
+            children = _filter(rule.children, usage)
+            if children:
+                kept.append(rule._replace(children=children))
+        elif rule.body is None or rule.prelude.startswith('@'):
+            # @import, @font-face, @keyframes (лишние уберёт _drop_keyframes)
+            kept.append(rule)
+        else:
+            selectors = [selector for selector in _split_selectors(rule.prelude)
+                         if usage.matches(selector)]
+            if selectors:
+                kept.append(rule._replace(prelude=','.join(selectors)))
+    return kept
+
+
+def _collect_animations(rules, names):
+    for rule in rules:
+        if rule.children is not None:
+            _collect_animations(rule.children, names)
+        elif rule.body and not _KEYFRAMES_RE.match(rule.prelude):
+            for value in _ANIMATION_RE.findall(rule.body):
+                names.update(_TOKEN_RE.findall(value))
+
+
+def _drop_keyframes(rules, names):
+    kept = []
+    for rule in rules:
+        if rule.children is not None:
+            children = _drop_keyframes(rule.children, names)
+            if children:
+                kept.append(rule._replace(children=children))
+            continue
+        match = _KEYFRAMES_RE.match(rule.prelude)
+        if match is None or match.group(1) in names:
+            kept.append(rule)
+    return kept
+
+
+# ----- шаблоны -----
+
+def _source(env, name):
+    return env.loader.get_source(env, name)[0]
+
+
+def _chain(env, name):
+    # [(имя, исходник)] от страницы до корневого шаблона
+    chain = []
+    while name and all(name != seen for seen, _ in chain):
+        source = _source(env, name)
+        chain.append((name, source))
+        match = _EXTENDS_RE.search(source)
+        name = match.group(2) if match else None
+    return chain
+
+
+def _with_includes(env, source, seen=None):
+    seen = set() if seen is None else seen
+    sources = [source]
+    for _, name in _INCLUDE_RE.findall(source):
+        if name not in seen:
+            seen.add(name)
+            sources.extend(_with_includes(env, _source(env, name), seen))
+    return sources
+
+
+def _block(source, name):
+    # Текст блока с учётом вложенных блоков; None, если блока нет
+    start, depth = None, 0
+    for match in _BLOCK_RE.finditer(source):
+        if match.group(1) is not None:
+            if start is None and match.group(1) == name:
+                start = match.end()
+            elif start is not None:
+                depth += 1
+        elif start is not None:
+            if not depth:
+                return source[start:match.start()]
+            depth -= 1
+    return None
+
+
+def _above_the_fold(content, sections):
+    end = 0
+    for _ in range(sections):
+        match = _SECTION_END_RE.search(content, end)
+        if match is None:
+            return content
+        end = match.end()
+    return content[:end]
+
+
+def page_styles(env, stylesheet, scripts=(), layout='base.html', sections=1,
+                max_bytes=None, exclude=()):
+    """{шаблон: PageStyles} для страниц на основе layout.
+
+    exclude - префиксы шаблонов, которым стили страницы не нужны (admin/).
+    """
+    rules = parse(stylesheet)
+    common = Usage()
+    for script in scripts:
+        common.scan(script)
+
+    pages = {}
+    names = env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        if name == layout or name.rsplit('/', 1)[-1].startswith('_') \
+                or name.startswith(tuple(exclude)):
+            continue
+        chain = _chain(env, name)
+        if chain[-1][0] != layout:
+            continue
+
+        full = Usage(common)
+        for _, source in chain:
+            for part in _with_includes(env, source):
+                full.scan(part)
+
+        root = chain[-1][1]
+        match = _CONTENT_START_RE.search(root)
+        content = next((block for block in (_block(source, 'content')
+                                            for _, source in chain)
+                        if block is not None), '')
+        head = root[:match.start()] if match else root
+        for count in range(sections, -1, -1):
+            fold = Usage()
+            for source in (head, _above_the_fold(content, count)):
+                for part in _with_includes(env, source):
+                    fold.scan(part)
+            critical = serialize(prune(rules, fold))
+            if max_bytes is None or len(critical.encode('utf-8')) <= max_bytes:
+                break
+
+        pages[name] = PageStyles(critical, serialize(prune(rules, full)), count)
+    return pages
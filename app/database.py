@@ -0,0 +1,121 @@
+# Настройка движков БД и маршрутизация чтения на реплику.
+# configure() собирает SQLALCHEMY_ENGINE_OPTIONS (размер пула, pre-ping,
+# recycle) и bind 'replica' из DATABASE_REPLICA_URL; для SQLite на
+# каждом соединении включаются WAL и busy_timeout.
+# RoutingSession отправляет SELECT из публичных blueprint'ов на реплику,
+# всё остальное (запись, flush, сырой SQL, админка, CLI, фоновые потоки) -
+# на основную БД. Чтение своих записей: после коммита запрос дочитывает с
+# основной БД, сессия администратора - ещё DATABASE_REPLICA_LAG секунд,
+# а после любого изменения контента на основную БД идут все, чтобы кэш
+# страниц не заполнился данными отстающей реплики. Время изменения берётся
+# из общего файла версии (CACHE_BACKEND=file), поэтому переключаются все
+# воркеры, а не только сохранивший; с CACHE_BACKEND=local - только он.
+import sqlite3
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, \
+    request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql import Select
+
+from .cache import cache
+
+
+REPLICA = 'replica'
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+
+def _engine_options(config, uri):
+    url = make_url(uri)
+    options = {'pool_pre_ping': config.get('DB_POOL_PRE_PING', True)}
+    in_memory = url.get_backend_name() == 'sqlite' and \
+        url.database in (None, '', ':memory:')
+    if not in_memory:
+        # У SQLite в памяти свой пул без этих параметров
+        options.update(pool_size=config.get('DB_POOL_SIZE', 5),
+                       max_overflow=config.get('DB_MAX_OVERFLOW', 10),
+                       pool_timeout=config.get('DB_POOL_TIMEOUT', 30),
+                       pool_recycle=config.get('DB_POOL_RECYCLE', 1800))
+    return options
+
+
+def configure(app):
+    # Только заполняет конфиг до db.init_app: create_app не обращается к БД
+    config = app.config
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if uri:
+        options = _engine_options(config, uri)
+        options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    replica = config.get('DATABASE_REPLICA_URL')
+    if replica:
+        binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(REPLICA, {'url': replica,
+                                   **_engine_options(config, replica)})
+        config['SQLALCHEMY_BINDS'] = binds
+
+    app.extensions['database'] = {
+        'wal': config.get('SQLITE_WAL', True),
+        'busy_timeout': config.get('SQLITE_BUSY_TIMEOUT', 5000),
+    }
+    if not event.contains(Engine, 'connect', _on_connect):
+        event.listen(Engine, 'connect', _on_connect)
+    if not event.contains(Session, 'after_commit', _after_commit):
+        event.listen(Session, 'after_commit', _after_commit)
+
+
+def _on_connect(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    settings = current_app.extensions.get('database', {}) \
+        if has_app_context() else {}
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.get('busy_timeout', 5000))}")
+        if settings.get('wal', True):
+            # Для базы в памяти SQLite молча оставит режим memory
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute('PRAGMA synchronous = NORMAL')
+    except sqlite3.OperationalError:
+        # Реплика может быть доступна только для чтения
+        pass
+    finally:
+        cursor.close()
+
+
+def _after_commit(db_session):
+    if not has_request_context():
+        return
+    g.db_primary = True
+    if request.blueprint == 'admin':
+        lag = current_app.config.get('DATABASE_REPLICA_LAG', 10)
+        session[PRIMARY_UNTIL_KEY] = time.time() + lag
+
+
+def _use_replica():
+    if not has_request_context() or g.get('db_primary'):
+        return False
+    config = current_app.config
+    blueprints = config.get('DATABASE_REPLICA_BLUEPRINTS', ('main', 'api'))
+    if request.blueprint not in blueprints:
+        return False
+    now = time.time()
+    lag = config.get('DATABASE_REPLICA_LAG', 10)
+    if now - cache.last_modified < lag:
+        return False
+    # Сессию читаем, только если есть cookie, чтобы не трогать анонимов
+    if config.get('SESSION_COOKIE_NAME', 'session') in request.cookies \
+            and session.get(PRIMARY_UNTIL_KEY, 0) > now:
+        return False
+    return True
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and isinstance(clause, Select) \
+                and REPLICA in self._db.engines and _use_replica():
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
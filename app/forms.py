@@ -1,6 +1,36 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, TextAreaField, FileField, SelectField, IntegerField, BooleanField
-from wtforms.validators import DataRequired, Email, Length
+from wtforms import StringField, PasswordField, TextAreaField, FileField, \
+    MultipleFileField, SelectField, IntegerField, BooleanField
+from wtforms.validators import DataRequired, Email, Length, Optional, Regexp, \
+    ValidationError
+
+from .models import PORTFOLIO_CATEGORIES, Solution, PortfolioItem
+from .uploads import uploads
+
+
+# slug входит в URL страниц, поиска, sitemap и статического экспорта
+SLUG_PATTERN = r'^[a-z0-9]+(?:-[a-z0-9]+)*$'
+SLUG_MESSAGE = 'Только латиница в нижнем регистре, цифры и дефисы'
+
+
+class AllowedUpload:
+    # Те же ALLOWED_EXTENSIONS, что проверяет uploads.save, но с ошибкой в форме
+    def __call__(self, form, field):
+        files = field.data if isinstance(field.data, list) else [field.data]
+        for storage in files:
+            filename = getattr(storage, 'filename', None)
+            if filename and not uploads.allowed(filename):
+                raise ValidationError(f'Недопустимый тип файла: {filename}')
+
+
+class UniqueSlug:
+    # slug уникален в БД: проверяем до сохранения файлов и коммита
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, form, field):
+        if self.model.query.filter_by(slug=field.data).first() is not None:
+            raise ValidationError('Такой URL-идентификатор уже занят')
 
 class LoginForm(FlaskForm):
     username = StringField('Логин', validators=[DataRequired(), Length(min=4, max=80)])
@@ -13,7 +43,7 @@ class AboutForm(FlaskForm):
         ('tools', 'Инструменты и технологии')
     ], validators=[DataRequired()])
     content = TextAreaField('Содержание', validators=[DataRequired()])
-    image = FileField('Изображение')
+    image = FileField('Изображение', validators=[AllowedUpload()])
 
 class ContactForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
@@ -24,8 +54,12 @@ class ContactForm(FlaskForm):
 
 class SolutionForm(FlaskForm):
     name = StringField('Название решения', validators=[DataRequired()])
+    # Без slug у решения нет страницы, ссылок в поиске и в sitemap
+    slug = StringField('URL-идентификатор', validators=[
+        DataRequired(), Length(max=200),
+        Regexp(SLUG_PATTERN, message=SLUG_MESSAGE), UniqueSlug(Solution)])
     description = TextAreaField('Описание', validators=[DataRequired()])
-    image = FileField('Изображение')
+    image = FileField('Изображение', validators=[AllowedUpload()])
     price = IntegerField('Цена', validators=[DataRequired()])
     delivery_days = IntegerField('Срок разработки (дни)', validators=[DataRequired()])
     is_new = BooleanField('Новинка')
@@ -37,13 +71,24 @@ class SolutionForm(FlaskForm):
 
 class PortfolioForm(FlaskForm):
     title = StringField('Название проекта', validators=[DataRequired()])
-    category = StringField('Категория', validators=[DataRequired()])
+    category = SelectField('Категория', choices=PORTFOLIO_CATEGORIES)
     package = StringField('Пакет', validators=[DataRequired()])
     duration = StringField('Срок разработки', validators=[DataRequired()])
     geo = StringField('Локация', validators=[DataRequired()])
-    images = FileField('Изображения', render_kw={'multiple': True})
+    images = MultipleFileField('Изображения', validators=[AllowedUpload()])
+    image_alt = StringField('Alt-текст обложки', validators=[Optional(), Length(max=300)])
+    summary = StringField('Описание для карточки', validators=[Optional(), Length(max=300)])
     features = TextAreaField('Особенности (каждая с новой строки)')
     testimonial = TextAreaField('Отзыв клиента')
     client = StringField('Имя клиента')
     live_url = StringField('Ссылка на сайт')
-    slug = StringField('URL-идентификатор', validators=[DataRequired()])
\ No newline at end of file
+    slug = StringField('URL-идентификатор', validators=[
+        DataRequired(), Length(max=200),
+        Regexp(SLUG_PATTERN, message=SLUG_MESSAGE), UniqueSlug(PortfolioItem)])
+
+class OrderForm(FlaskForm):
+    name = StringField('Имя', validators=[DataRequired(), Length(max=100)])
+    contact = StringField('Телефон, email или Telegram',
+                          validators=[DataRequired(), Length(max=200)])
+    package = StringField('Пакет', validators=[Optional(), Length(max=100)])
+    message = TextAreaField('Задача', validators=[Optional(), Length(max=5000)])
@@ -0,0 +1,317 @@
+# Экспорт публичной части сайта в статические файлы ("заморозка").
+# Результат раздаётся nginx напрямую, например:
+#     location / {
+#         try_files $uri/after-$arg_after.html $uri/before-$arg_before.html
+#                   $uri $uri/index.html @flask;
+#     }
+# Страницы с курсором (/portfolio?after=...) сохраняются как
+# portfolio/after-<курсор>.html, так что пагинация и бесконечная прокрутка
+# работают без Flask. Flask при этом обслуживает только /panel.
+#
+# Манифест (список выгруженных файлов) лежит рядом с журналом изменений:
+# по нему удаляются страницы удалённых и переименованных записей. Журнал
+# ведётся только после первого полного экспорта.
+import json
+import os
+import shutil
+from urllib.parse import parse_qsl
+
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+
+from .analytics import SKIP_ENVIRON
+from .cache import content_changed
+from .catalog import get_solutions, get_portfolio_items, get_portfolio_page
+from .sitemap import shard_numbers
+
+
+# Страницы без параметров
+FIXED_PAGES = ['main.index', 'main.solutions', 'main.portfolio', 'main.about',
+               'main.contacts', 'main.privacy', 'main.choose_freelancer',
+               'main.sitemap_html', 'main.favicon']
+
+# Какие страницы затрагивает изменение сущности каждого вида
+AFFECTED_PAGES = {
+    'solution': ['main.solutions', 'main.sitemap_html', 'main.sitemap_xml'],
+    'portfolio': ['main.portfolio', 'main.sitemap_html', 'main.sitemap_xml'],
+    'about': ['main.about'],
+    'contacts': ['main.contacts'],
+}
+
+
+def _journal_path(app):
+    return app.config.get('FREEZE_JOURNAL') or os.path.join(
+        app.instance_path, 'freeze.journal')
+
+
+def _manifest_path(app):
+    return os.path.splitext(_journal_path(app))[0] + '.manifest'
+
+
+def _read_manifest(app, output):
+    # -> {url: файл} прошлого экспорта в output; None, если его не было
+    try:
+        with open(_manifest_path(app), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('output') != os.path.abspath(output):
+        return None
+    return manifest['files']
+
+
+def _write_manifest(app, output, files):
+    data = {'output': os.path.abspath(output), 'files': files}
+    _write_file(_manifest_path(app),
+                json.dumps(data, ensure_ascii=False, indent=1).encode('utf-8'))
+
+
+def _record_change(sender, key=None, **kwargs):
+    # Запоминаем изменённые сущности для инкрементального экспорта.
+    # Пока сайт ни разу не экспортировали, журнал никому не нужен.
+    if not os.path.exists(_manifest_path(current_app)):
+        return
+    path = _journal_path(current_app)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'kind': sender, 'key': key}) + '\n')
+
+
+def _read_journal(app):
+    path = _journal_path(app)
+    processing = path + '.processing'
+    # Журнал забирается переименованием: изменения, записанные во время
+    # экспорта, попадут уже в новый журнал и в следующий запуск
+    taken = path + '.taken'
+    try:
+        os.replace(path, taken)
+    except FileNotFoundError:
+        taken = None
+    # Остаток прерванного или неудачного экспорта дополняется новыми
+    # изменениями
+    if taken:
+        with open(taken, encoding='utf-8') as src, \
+                open(processing, 'a', encoding='utf-8') as dst:
+            dst.write(src.read())
+        os.remove(taken)
+    if not os.path.exists(processing):
+        return processing, []
+    with open(processing, encoding='utf-8') as f:
+        changes = [json.loads(line) for line in f if line.strip()]
+    return processing, changes
+
+
+def _write_journal(path, changes):
+    if not changes:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    _write_file(path, ''.join(json.dumps(change) + '\n'
+                              for change in changes).encode('utf-8'))
+
+
+def _portfolio_pages():
+    # Страницы портфолио по курсорам (вперёд и назад) и фрагменты карточек
+    # для бесконечной прокрутки - те же ссылки, что выводит portfolio.html
+    config = current_app.config
+    limit = max(1, min(config.get('PORTFOLIO_PAGE_SIZE', 20),
+                       config.get('PAGE_SIZE_MAX', 100)))
+    pages = []
+    page = get_portfolio_page(None, None, limit)
+    while page.next_cursor:
+        after = page.next_cursor
+        pages += [('main.portfolio', {'after': after}),
+                  ('main.portfolio_cards', {'after': after})]
+        page = get_portfolio_page(after, None, limit)
+        if page.prev_cursor:
+            pages.append(('main.portfolio', {'before': page.prev_cursor}))
+    return pages
+
+
+def _sitemap_pages():
+    # Только уже собранные `flask sitemap build` файлы
+    numbers = shard_numbers(current_app)
+    pages = [('main.sitemap_shard', {'number': number}) for number in numbers]
+    return [('main.sitemap_xml', {})] + pages if numbers else pages
+
+
+def _all_pages():
+    pages = [(endpoint, {}) for endpoint in FIXED_PAGES]
+    pages += [('main.package_details', {'package_slug': solution.slug})
+              for solution in get_solutions() if solution.slug]
+    pages += [('main.portfolio_detail', {'slug': item.slug})
+              for item in get_portfolio_items() if item.slug]
+    return pages + _portfolio_pages() + _sitemap_pages()
+
+
+def _affected_pages(changes):
+    kinds = {change['kind'] for change in changes}
+    if None in kinds:
+        # Неизвестное изменение - экспортируем всё
+        return _all_pages()
+    pages = [(endpoint, {}) for kind in kinds
+             for endpoint in AFFECTED_PAGES.get(kind, [])]
+    for change in changes:
+        kind, key = change['kind'], change['key']
+        if kind == 'solution' and key:
+            pages.append(('main.package_details', {'package_slug': key}))
+        elif kind == 'portfolio' and key:
+            pages.append(('main.portfolio_detail', {'slug': key}))
+    if kinds & {'solution', 'portfolio'}:
+        pages += _sitemap_pages()
+    if 'portfolio' in kinds:
+        pages += _portfolio_pages()
+    return pages
+
+
+def _urls(pages):
+    urls = []
+    for endpoint, values in pages:
+        url = url_for(endpoint, **values)
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def _target_path(url):
+    # Путь файла относительно каталога экспорта
+    path, _, query = url.partition('?')
+    parts = [part for part in path.split('/') if part]
+    if query:
+        # /portfolio?after=X -> portfolio/after-X.html
+        name = '_'.join(f'{key}-{value}' for key, value in parse_qsl(query))
+        return '/'.join(parts + [name + '.html'])
+    if not parts:
+        return 'index.html'
+    if '.' in parts[-1]:
+        return '/'.join(parts)
+    return '/'.join(parts + ['index.html'])
+
+
+def _write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove_file(output, relpath):
+    # Удаляет файл и опустевшие каталоги над ним (но не сам output)
+    path = os.path.join(output, *relpath.split('/'))
+    if os.path.exists(path):
+        os.remove(path)
+    folder = os.path.dirname(path)
+    while os.path.abspath(folder) != os.path.abspath(output):
+        try:
+            os.rmdir(folder)
+        except OSError:
+            break
+        folder = os.path.dirname(folder)
+
+
+def _copy_static(source, target):
+    copied = 0
+    for root, dirs, files in os.walk(source):
+        target_dir = os.path.join(target, os.path.relpath(root, source))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_dir, name)
+            src_stat = os.stat(src)
+            if os.path.exists(dst):
+                dst_stat = os.stat(dst)
+                if (dst_stat.st_size == src_stat.st_size
+                        and dst_stat.st_mtime >= src_stat.st_mtime):
+                    continue
+            shutil.copy2(src, dst)
+            copied += 1
+    return copied
+
+
+def freeze_pages(app, urls, output, base_url):
+    # -> (записанные url, [(url, статус), ...] для ошибок)
+    client = app.test_client()
+    # Экспорт обходит все страницы - это не просмотры посетителей
+    client.environ_base[SKIP_ENVIRON] = True
+    written, errors = [], []
+    for url in urls:
+        response = client.get(url, base_url=base_url)
+        if response.status_code != 200:
+            errors.append((url, response.status_code))
+            continue
+        _write_file(os.path.join(output, *_target_path(url).split('/')),
+                    response.get_data())
+        written.append(url)
+    return written, errors
+
+
+@click.command('freeze')
+@click.option('--output', '-o', default=None,
+              help='Каталог для экспорта (по умолчанию FREEZE_DESTINATION).')
+@click.option('--base-url', default=None,
+              help='Внешний адрес сайта для абсолютных ссылок.')
+@click.option('--incremental', is_flag=True,
+              help='Экспортировать только страницы, изменённые в админке.')
+@with_appcontext
+def freeze_command(output, base_url, incremental):
+    """Экспортирует публичные страницы в статические файлы."""
+    app = current_app._get_current_object()
+    output = output or app.config['FREEZE_DESTINATION']
+    base_url = base_url or app.config['FREEZE_BASE_URL']
+
+    journal, changes = _read_journal(app)
+    if not shard_numbers(app):
+        click.echo('Sitemap не собран (flask sitemap build), sitemap.xml '
+                   'не выгружается.', err=True)
+    manifest = _read_manifest(app, output)
+    if incremental and manifest is None:
+        click.echo('Полного экспорта в этот каталог ещё не было, '
+                   'экспортируются все страницы.')
+        incremental = False
+
+    with app.test_request_context(base_url=base_url):
+        current = _urls(_all_pages())
+        if incremental:
+            if not changes:
+                click.echo('Изменений нет.')
+                return
+            affected = set(_urls(_affected_pages(changes)))
+            # Новые адреса (например, после переименования) тоже выгружаются
+            urls = [url for url in current if url in affected or url not in manifest]
+        else:
+            urls = current
+
+    written, errors = freeze_pages(app, urls, output, base_url)
+    # Страницы, которых больше нет на сайте, удаляются из экспорта
+    previous = manifest or {}
+    stale = [url for url in previous if url not in current]
+    for url in stale:
+        _remove_file(output, previous[url])
+    files = {url: _target_path(url) for url in current
+             if url in written or url in previous}
+    _write_manifest(app, output, files)
+
+    copied = _copy_static(app.static_folder,
+                          os.path.join(output, app.static_url_path.strip('/')))
+    # Изменения, чьи страницы не выгрузились, остаются до следующего запуска
+    failed = {url for url, _ in errors}
+    pending = []
+    if failed:
+        with app.test_request_context(base_url=base_url):
+            pending = [change for change in changes
+                       if failed & set(_urls(_affected_pages([change])))]
+    _write_journal(journal, pending)
+
+    click.echo(f'Страниц: {len(written)}, удалено: {len(stale)}, '
+               f'статических файлов: {copied}')
+    for url, status in errors:
+        click.echo(f'Ошибка {status}: {url}', err=True)
+    if errors:
+        raise SystemExit(1)
+
+
+def init_app(app):
+    app.cli.add_command(freeze_command)
+    content_changed.connect(_record_change, weak=False)
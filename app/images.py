@@ -0,0 +1,253 @@
+# Адаптивные варианты изображений (WebP/AVIF нескольких ширин).
+# Варианты генерируются в пуле процессов (spawn: воркер с потоками
+# очереди задач нельзя fork'ать), их размеры записываются в
+# manifest.json, а шаблонный хелпер responsive_image() выводит
+# <picture> с srcset/sizes/width/height.
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow не установлен - отдаём оригиналы
+    Image = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+RASTER_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp'}
+SOURCE_FOLDERS = ('projects', 'images', 'uploads')
+
+
+def _supported_formats(formats):
+    if Image is None:
+        return []
+    Image.init()
+    return [fmt for fmt in formats if fmt.upper() in Image.SAVE]
+
+
+def generate_variants(source, target_dir, stem, widths, formats, quality):
+    # Выполняется в дочернем процессе, поэтому не трогает Flask
+    os.makedirs(target_dir, exist_ok=True)
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        variants = []
+        for variant_width in sorted({min(w, width) for w in widths}):
+            variant_height = round(height * variant_width / width)
+            resized = image if variant_width == width else image.resize(
+                (variant_width, variant_height), Image.LANCZOS)
+            for fmt in formats:
+                filename = f'{stem}-{variant_width}.{fmt}'
+                resized.save(os.path.join(target_dir, filename), fmt.upper(),
+                             quality=quality)
+                variants.append({'file': filename, 'width': variant_width,
+                                 'height': variant_height, 'format': fmt})
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+class VariantManifest:
+    """manifest.json с вариантами; перечитывается при изменении файла."""
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            with open(self.path, encoding='utf-8') as f:
+                self._data = json.load(f)
+            self._stamp = stamp
+
+    def get(self, key):
+        self._refresh()
+        return self._data.get(key)
+
+    def update(self, key, entry):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(self.path + '.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._stamp = None
+            self._refresh()
+            if entry is None:
+                self._data.pop(key, None)
+            else:
+                self._data[key] = entry
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+
+
+class ImagePipeline:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.manifest = None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('IMAGE_VARIANTS_ENABLED', True) \
+            and Image is not None
+        self.folder = app.config.get('IMAGE_VARIANT_FOLDER') or os.path.join(
+            app.static_folder, 'variants')
+        self.widths = app.config.get('IMAGE_VARIANT_WIDTHS', (480, 960, 1440))
+        self.formats = _supported_formats(
+            app.config.get('IMAGE_VARIANT_FORMATS', ('avif', 'webp')))
+        self.quality = app.config.get('IMAGE_VARIANT_QUALITY', 75)
+        self.workers = app.config.get('IMAGE_WORKERS', 2)
+        self.manifest = VariantManifest(os.path.join(self.folder, 'manifest.json'))
+
+        app.jinja_env.globals['responsive_image'] = responsive_image
+        app.cli.add_command(images_cli)
+        app.extensions['images'] = self
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                # fork из многопоточного воркера унёс бы в дочерний процесс
+                # захваченные блокировки (логгинг, sqlite очереди задач)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _job(self, source, key):
+        stem = os.path.splitext(key)[0].replace('/', '_')
+        return (generate_variants, source, self.folder, stem, self.widths,
+                self.formats, self.quality)
+
+    def can_process(self, filename):
+        extension = filename.rsplit('.', 1)[-1].lower()
+        return self.enabled and bool(self.formats) \
+            and extension in RASTER_EXTENSIONS
+
+    def submit(self, source, key):
+        # key - путь относительно static, например 'uploads/abc_photo.jpg'
+        if not self.can_process(key):
+            return None
+        job = self._job(source, key)
+        try:
+            future = self.executor.submit(*job)
+        except RuntimeError:
+            # Пул закрыт atexit-обработчиком concurrent.futures, а поток
+            # очереди задач ещё работает: считаем здесь, иначе задача
+            # упадёт и потратит попытку
+            future = Future()
+            try:
+                future.set_result(job[0](*job[1:]))
+            except Exception as exc:
+                future.set_exception(exc)
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return future
+
+    def _on_done(self, key, future):
+        if future.exception() is not None:
+            # Колбэк выполняется вне контекста приложения
+            logger.error('Ошибка обработки %s: %s', key, future.exception())
+            return
+        self.manifest.update(key, future.result())
+
+    def submit_upload(self, filepath, filename):
+        return self.submit(filepath, f'uploads/{filename}')
+
+    def remove(self, key):
+        # Удаляет варианты изображения и его запись в манифесте
+        entry = self.manifest.get(key) if self.manifest else None
+        if entry is None:
+            return
+        for variant in entry['variants']:
+            path = os.path.join(self.folder, variant['file'])
+            if os.path.exists(path):
+                os.remove(path)
+        self.manifest.update(key, None)
+
+
+images = ImagePipeline()
+
+
+def _srcset(entry, fmt):
+    return ', '.join(
+        f"{url_for('static', filename='variants/' + v['file'])} {v['width']}w"
+        for v in entry['variants'] if v['format'] == fmt)
+
+
+def responsive_image(path, alt='', sizes='100vw', cls=None, loading='lazy'):
+    entry = images.manifest.get(path) if images.manifest else None
+    attrs = [f'src="{escape(url_for("static", filename=path))}"',
+             f'alt="{escape(alt)}"', f'loading="{escape(loading)}"',
+             'decoding="async"']
+    if cls:
+        attrs.append(f'class="{escape(cls)}"')
+    if entry is None:
+        return Markup(f'<img {" ".join(attrs)}>')
+
+    attrs += [f'width="{entry["width"]}"', f'height="{entry["height"]}"',
+              f'sizes="{escape(sizes)}"']
+    sources = [
+        f'<source type="image/{fmt}" srcset="{escape(_srcset(entry, fmt))}" '
+        f'sizes="{escape(sizes)}">'
+        for fmt in images.formats
+        if any(v['format'] == fmt for v in entry['variants'])]
+    return Markup(f'<picture>{"".join(sources)}<img {" ".join(attrs)}></picture>')
+
+
+@click.group('images')
+def images_cli():
+    """Адаптивные варианты изображений."""
+
+
+@images_cli.command('build')
+@click.option('--force', is_flag=True, help='Пересоздать существующие варианты.')
+@with_appcontext
+def build_command(force):
+    """Генерирует варианты для static/projects, images и uploads."""
+    if not images.enabled or not images.formats:
+        raise click.ClickException('Pillow не установлен или нет доступных форматов.')
+
+    jobs = {}
+    roots = {folder: os.path.join(current_app.static_folder, folder)
+             for folder in SOURCE_FOLDERS}
+    roots['uploads'] = current_app.config['UPLOAD_FOLDER']
+    for prefix, root in roots.items():
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in filenames:
+                source = os.path.join(dirpath, name)
+                relpath = os.path.relpath(source, root).replace(os.sep, '/')
+                key = f'{prefix}/{relpath}'
+                if images.can_process(key) and (force or images.manifest.get(key) is None):
+                    jobs[key] = images.executor.submit(*images._job(source, key))
+
+    for key, future in jobs.items():
+        try:
+            images.manifest.update(key, future.result())
+            click.echo(f'OK {key}')
+        except Exception as exc:
+            click.echo(f'Ошибка {key}: {exc}', err=True)
@@ -1,9 +1,25 @@
 import os
-from flask import Blueprint, render_template, url_for, request, make_response, \
-    send_from_directory, current_app, jsonify
-from .models import Solution, PortfolioItem
+from datetime import date
+
+from flask import Blueprint, render_template, request, \
+    send_from_directory, current_app, abort, flash, redirect, url_for, jsonify
+from . import db, csrf, limiter
+from .forms import OrderForm
+from .models import Order, PORTFOLIO_CATEGORIES
+from .tasks import tasks
+from .page_cache import page_cache
+from .streaming import render_page
+from .sitemap import sitemap_response, sitemap_sections, SECTIONS
+from .pagination import page_args
+from .catalog import get_solutions, get_solution, get_portfolio_page, \
+    get_portfolio_item, get_about_sections, get_contact_info
 
 main_bp = Blueprint('main', __name__)
+# Дата последней правки текста политики: страница кэшируется и экспортируется,
+# поэтому дата рендеринга здесь не годится
+PRIVACY_UPDATED = date(2026, 10, 18)
+# {ключ: название} для фильтров и карточек портфолио
+main_bp.add_app_template_global(dict(PORTFOLIO_CATEGORIES), 'portfolio_categories')
 
 
 # Обработка favicon
@@ -16,6 +32,7 @@ def favicon():
 
 # Главная страница
 @main_bp.route('/')
+@page_cache.cached
 def index():
     return render_template('index.html', active_page='index',
                            meta_title="Нанять Full-stack разработчика в СПб - Сайты под ключ",
@@ -31,9 +48,10 @@ def index():
 
 # Магазин решений
 @main_bp.route('/resheniya')
+@page_cache.cached
 def solutions():
-    packages = Solution.query.filter_by(category='package').all()
-    modules = Solution.query.filter_by(category='module').all()
+    packages = get_solutions('package')
+    modules = get_solutions('module')
 
     return render_template('solutions.html', active_page='solutions',
                            meta_title="Магазин готовых решений для сайтов | СПб",
@@ -43,24 +61,15 @@ def solutions():
                            packages=packages, modules=modules)
 
 
-@main_bp.route('/api/solutions')
-def api_solutions():
-    solutions = Solution.query.all()
-    return jsonify([
-        {'id': sol.id, 'name': sol.name, 'description': sol.description,
-            'image': url_for('static',
-                             filename=f'uploads/{sol.image_path}') if sol.image_path else None,
-            'price': sol.price, 'delivery_days': sol.delivery_days,
-            'tags': ['new'] if sol.is_new else [
-                'popular'] if sol.is_popular else [], 'category': sol.category}
-        for sol in solutions])
-
-
 # Роуты для пакетных решений
 @main_bp.route('/resheniya/<package_slug>')
+@page_cache.cached
 def package_details(package_slug):
-    solution = Solution.query.filter_by(slug=package_slug).first_or_404()
-    return render_template(f'packages/{package_slug}.html',
+    solution = get_solution(package_slug)
+    if solution is None:
+        abort(404)
+    # Своя страница у пакетов из packages/, у остальных - общая
+    return render_template([f'packages/{package_slug}.html', 'packages/package.html'],
                            active_page='solutions',
                            meta_title=f"{solution.name} | Готовое решение для бизнеса СПб",
                            h1=solution.name, solution=solution)
@@ -68,23 +77,35 @@ def package_details(package_slug):
 
 # Портфолио (кейсы)
 @main_bp.route('/portfolio')
+@page_cache.cached
 def portfolio():
-    portfolio_items = PortfolioItem.query.all()
-    return render_template('portfolio.html', active_page='portfolio',
-                           meta_title="Портфолио Full-stack разработчика - Реальные проекты (СПб)",
-                           meta_description="Примеры моих работ: сайты и веб-приложения на "
-                                            "Python/JS, созданные для клиентов из Санкт-Петербурга."
-                                            " Full-stack решения.",
-                           meta_keywords="примеры работ, кейсы, реализованные сайты, отзывы "
-                                         "клиентов, GitHub, технологии, Flask, JavaScript, "
-                                         "бизнес-задачи",
-                           h1="Мои проекты: Full-stack разработка в СПб",
-                           portfolio_items=portfolio_items)
+    page = get_portfolio_page(*page_args('PORTFOLIO_PAGE_SIZE'))
+    return render_page('portfolio.html', active_page='portfolio',
+                       meta_title="Портфолио Full-stack разработчика - Реальные проекты (СПб)",
+                       meta_description="Примеры моих работ: сайты и веб-приложения на "
+                                        "Python/JS, созданные для клиентов из Санкт-Петербурга."
+                                        " Full-stack решения.",
+                       meta_keywords="примеры работ, кейсы, реализованные сайты, отзывы "
+                                     "клиентов, GitHub, технологии, Flask, JavaScript, "
+                                     "бизнес-задачи",
+                       h1="Мои проекты: Full-stack разработка в СПб",
+                       page=page, portfolio_items=page.items)
+
+
+# Следующая страница карточек для бесконечной прокрутки
+@main_bp.route('/fragments/portfolio')
+@page_cache.cached
+def portfolio_cards():
+    page = get_portfolio_page(*page_args('PORTFOLIO_PAGE_SIZE'))
+    return render_template('_portfolio_cards.html', page=page, fragment=True)
 
 
 @main_bp.route('/portfolio/<slug>')
+@page_cache.cached
 def portfolio_detail(slug):
-    project = PortfolioItem.query.filter_by(slug=slug).first_or_404()
+    project = get_portfolio_item(slug)
+    if project is None:
+        abort(404)
     return render_template('portfolio_detail.html', project=project,
                            active_page='portfolio',
                            meta_title=f"{project.title} | Пример работы",
@@ -95,28 +116,31 @@ def portfolio_detail(slug):
 
 # Обо мне (включая отзывы)
 @main_bp.route('/o-mne')
+@page_cache.cached
 def about():
-    biography = AboutContent.query.filter_by(section='biography').first()
-    philosophy = AboutContent.query.filter_by(section='philosophy').first()
-    tools = AboutContent.query.filter_by(section='tools').first()
-
-    return render_template('about.html', active_page='about',
-                           meta_title="Веб разработчик | Евгения Фесик - Фрилансер в СПб",
-                           meta_description="full-stack web разработчик из Санкт-Петербурга. "
-                                            "Создание сайтов и веб-приложений",
-                           meta_keywords="full-stack разработчик, Python разработчик,"
-                                         " Flask, JavaScript, создание сайтов,"
-                                         " веб-приложения, Санкт-Петербург,"
-                                         " фриланс",
-                           h1="Отзывы о моей работе в СПб",
-                           biography=biography, philosophy=philosophy,
-                           tools=tools)
+    sections = get_about_sections()
+    biography = sections.get('biography')
+    philosophy = sections.get('philosophy')
+    tools = sections.get('tools')
+
+    return render_page('about.html', active_page='about',
+                       meta_title="Веб разработчик | Евгения Фесик - Фрилансер в СПб",
+                       meta_description="full-stack web разработчик из Санкт-Петербурга. "
+                                        "Создание сайтов и веб-приложений",
+                       meta_keywords="full-stack разработчик, Python разработчик,"
+                                     " Flask, JavaScript, создание сайтов,"
+                                     " веб-приложения, Санкт-Петербург,"
+                                     " фриланс",
+                       h1="Отзывы о моей работе в СПб",
+                       biography=biography, philosophy=philosophy,
+                       tools=tools)
 
 
 # Контакты
 @main_bp.route('/kontakty')
+@page_cache.cached
 def contacts():
-    contact_info = ContactInfo.query.first()
+    contact_info = get_contact_info()
     return render_template('contacts.html', active_page='contacts',
                            meta_title="Python разработчик фрилансер в СПб - Нанять для вашего "
                                       "проекта",
@@ -132,6 +156,7 @@ def contacts():
 
 # Блог (пример)
 @main_bp.route('/blog/kak-vybrat-frilansera-dlya-sajta-v-spb')
+@page_cache.cached
 def choose_freelancer():
     return render_template('blog/choose_freelancer.html', active_page='blog',
                            meta_title="Как выбрать фрилансера для сайта в СПб: 7 ключевых критериев",
@@ -144,83 +169,72 @@ def choose_freelancer():
                            h1="Как выбрать фрилансера для создания сайта в СПб")
 
 
-@main_bp.route('/order')
+def _order_limit():
+    return current_app.config.get('RATELIMIT_ORDER', '5 per minute')
+
+
+# Форма заказа: заявка сохраняется, уведомление уходит в фоновую очередь,
+# поэтому ответ не ждёт Telegram.
+# Обычная отправка формы проверяет CSRF-токен. Без токена принимается
+# только JSON (форма на кэшируемой странице контактов): чужой сайт не
+# отправит application/json без CORS-preflight.
+@main_bp.route('/order', methods=['GET', 'POST'])
+@csrf.exempt
+@limiter.limit(_order_limit, methods=['POST'])
 def order_form():
-    return "Форма заказа в разработке", 200
+    form = OrderForm(meta={'csrf': False} if request.is_json else {})
+    wants_json = request.is_json or \
+        request.accept_mimetypes.best == 'application/json'
+
+    if form.validate_on_submit():
+        order = Order(name=form.name.data, contact=form.contact.data,
+                      package=form.package.data or None,
+                      message=form.message.data or None)
+        db.session.add(order)
+        db.session.commit()
+        tasks.enqueue('notify_order', order_id=order.id)
+        if wants_json:
+            return jsonify(ok=True, id=order.id), 201
+        flash('Спасибо! Заявка отправлена, я свяжусь с вами в ближайшее время.',
+              'success')
+        return redirect(url_for('main.order_form'))
+
+    if request.method == 'POST' and wants_json:
+        return jsonify(ok=False, errors=form.errors), 400
+    if request.method == 'GET':
+        form.package.data = request.args.get('package', '')
+    return render_template('order.html', form=form, active_page='order',
+                           packages=get_solutions('package'),
+                           meta_title="Заказать сайт | Full-stack разработчик СПб",
+                           h1="Заявка на разработку сайта")
 
 
 @main_bp.route('/privacy')
+@page_cache.cached
 def privacy():
-    return render_template('privacy.html', active_page='privacy',
-                           meta_title="Политика конфиденциальности | Full-stack разработчик",
-                           meta_description="Как мы собираем, используем и защищаем вашу информацию",
-                           hide_default_h1=True)
+    return render_page('privacy.html', active_page='privacy',
+                       meta_title="Политика конфиденциальности | Full-stack разработчик",
+                       meta_description="Как мы собираем, используем и защищаем вашу информацию",
+                       hide_default_h1=True, updated=PRIVACY_UPDATED)
 
 
 # XML Sitemap
 @main_bp.route('/sitemap.xml')
 def sitemap_xml():
-    pages = []
-
-    # Основные страницы
-    main_pages = ['main.index', 'main.solutions', 'main.portfolio',
-                  'main.about', 'main.contacts', 'main.privacy']
-
-    for page in main_pages:
-        pages.append(
-            {'url': url_for(page, _external=True), 'lastmod': '2025-08-15',
-                'changefreq': 'weekly', 'priority': '1.0'})
-
-    # Решения
-    solutions = Solution.query.all()
-    for solution in solutions:
-        pages.append({
-            'url': url_for('main.package_details', package_slug=solution.slug,
-                           _external=True), 'lastmod': '2025-08-15',
-            'changefreq': 'monthly', 'priority': '0.8'})
-
-    # Портфолио
-    portfolio_items = PortfolioItem.query.all()
-    for item in portfolio_items:
-        pages.append({'url': url_for('main.portfolio_detail', slug=item.slug,
-                                     _external=True), 'lastmod': '2025-08-15',
-            'changefreq': 'monthly', 'priority': '0.8'})
-
-    sitemap_xml = render_template('sitemap.xml', pages=pages)
-    response = make_response(sitemap_xml)
-    response.headers['Content-Type'] = 'application/xml'
-    return response
+    return sitemap_response('sitemap.xml') or abort(404)
+
+
+@main_bp.route('/sitemap-<int:number>.xml.gz')
+def sitemap_shard(number):
+    return sitemap_response(f'sitemap-{number}.xml.gz') or abort(404)
 
 
 # HTML Sitemap
 @main_bp.route('/sitemap')
+@page_cache.cached
 def sitemap_html():
-    # Словарь категорий
-    categories = {"Основные страницы": [('main.index', 'Главная'),
-        ('main.solutions', 'Магазин решений'), ('main.portfolio', 'Портфолио'),
-        ('main.about', 'Обо мне'), ('main.contacts', 'Контакты')],
-        "Пакетные решения": [], "Дополнительные модули": [], "Портфолио": [],
-        "Правовая информация": [
-            ('main.privacy', 'Политика конфиденциальности'),
-            ('main.sitemap_html', 'Карта сайта')]}
-
-    # Заполняем категории решениями
-    solutions = Solution.query.all()
-    for solution in solutions:
-        if solution.category == 'package':
-            categories["Пакетные решения"].append(
-                (f'main.package_details({solution.slug})', solution.name))
-        elif solution.category == 'module':
-            categories["Дополнительные модули"].append(
-                (f'main.package_details({solution.slug})', solution.name))
-
-    # Заполняем портфолио
-    portfolio_items = PortfolioItem.query.all()
-    for item in portfolio_items:
-        categories["Портфолио"].append(('main.portfolio_detail', item.title))
-
     return render_template('sitemap.html', active_page='sitemap',
                            meta_title="Карта сайта | Full-stack разработчик",
                            meta_description="Полный список страниц на сайте",
-                           categories=categories, hide_default_h1=True)
-
+                           categories=sitemap_sections(), icons=SECTIONS,
+                           hide_default_h1=True)
@@ -0,0 +1,346 @@
+# Метрики горячего пути: время запроса по endpoint, число и время SQL,
+# время рендеринга шаблонов, подозрения на N+1. Данные агрегируются в
+# гистограммы в памяти воркера и отдаются в формате Prometheus на
+# /panel/metrics. Медленные запросы пишутся в лог, часть из них - с
+# профилем cProfile.
+#
+# Воркеров gunicorn несколько, а /panel/metrics опрашивается через
+# балансировщик, поэтому каждый воркер раз в METRICS_FLUSH_INTERVAL секунд
+# сбрасывает свои серии в METRICS_DIR/<pid>.json, а ответ собирается из
+# файлов всех живых воркеров с меткой pid. Серии чужих воркеров отстают
+# не больше чем на METRICS_FLUSH_INTERVAL.
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from collections import Counter
+
+from flask import g, request, current_app, has_request_context, \
+    template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Профиль снимается одновременно не больше чем в одном потоке: с Python 3.12
+# cProfile работает через sys.monitoring, и второй enable() бросает ValueError
+_profile_lock = threading.Lock()
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, *extra):
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _stop_profile(profile):
+    if profile is not None:
+        profile.disable()
+        _profile_lock.release()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), list(v[0]), v[1], v[2]] for k, v in self._series.items()]
+
+    def render(self, snapshots):
+        # snapshots: {pid: snapshot()} всех воркеров
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} histogram']
+        items = sorted((tuple(label_values), pid, counts, total, count)
+                       for pid, snapshot in snapshots.items()
+                       for label_values, counts, total, count in snapshot)
+        for label_values, pid, counts, total, count in items:
+            pid_label = f'pid="{pid}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, label_values, pid_label,
+                                        f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values, pid_label, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.labels, label_values, pid_label)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def render(self, snapshots):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} counter']
+        items = sorted((tuple(label_values), pid, value)
+                       for pid, snapshot in snapshots.items()
+                       for label_values, value in snapshot)
+        for label_values, pid, value in items:
+            labels = _format_labels(self.labels, label_values, f'pid="{pid}"')
+            lines.append(f'{self.name}{labels} {value}')
+        return lines
+
+
+class Metrics:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.request_duration = Histogram(
+            'http_request_duration_seconds', 'Время обработки запроса.',
+            ('endpoint', 'method', 'status'))
+        self.sql_queries = Histogram(
+            'http_request_sql_queries', 'Число SQL-запросов на HTTP-запрос.',
+            ('endpoint',), QUERY_COUNT_BUCKETS)
+        self.sql_duration = Histogram(
+            'http_request_sql_duration_seconds', 'Время SQL на HTTP-запрос.',
+            ('endpoint',))
+        self.template_duration = Histogram(
+            'template_render_duration_seconds', 'Время рендеринга шаблона.',
+            ('template',))
+        self.n_plus_one = CounterMetric(
+            'sql_n_plus_one_total', 'Запросы с повторяющимися SQL-выражениями.',
+            ('endpoint',))
+        self.slow_requests = CounterMetric(
+            'http_slow_requests_total', 'Запросы дольше порога.', ('endpoint',))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.slow_ms = app.config.get('METRICS_SLOW_REQUEST_MS', 500)
+        self.profile_rate = app.config.get('METRICS_PROFILE_SAMPLE_RATE', 0.0)
+        self.n_plus_one_threshold = app.config.get('METRICS_N_PLUS_ONE_THRESHOLD', 3)
+        self.folder = app.config.get('METRICS_DIR') or os.path.join(
+            app.instance_path, 'metrics')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5)
+        self._flushed = 0.0
+        self._logger = app.logger
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app, weak=False)
+        template_rendered.connect(self._after_render, app, weak=False)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+        g.metrics_statements = Counter()
+        g.metrics_template_time = 0.0
+        g.metrics_render_started = []
+        g.metrics_profile = None
+        if self.profile_rate and random.random() < self.profile_rate \
+                and _profile_lock.acquire(blocking=False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Профилировщик уже включён кем-то другим - пропускаем выборку
+                _profile_lock.release()
+            else:
+                g.metrics_profile = profile
+
+    def _before_render(self, sender, template, context, **extra):
+        if 'metrics_render_started' in g:
+            g.metrics_render_started.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if g.get('metrics_render_started'):
+            elapsed = time.perf_counter() - g.metrics_render_started.pop()
+            g.metrics_template_time += elapsed
+            self.template_duration.observe(elapsed, template.name or '<string>')
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        state = g._get_current_object()
+        logger = current_app.logger
+        endpoint = request.endpoint or 'unknown'
+        method, path = request.method, request.full_path
+        status = str(response.status_code)
+
+        def finish():
+            self._finish(state, logger, started, endpoint, method, path, status)
+
+        # Потоковая страница рендерится уже после after_request, пока сервер
+        # отдаёт тело, поэтому замер закрывается вместе с ответом.
+        if response.is_streamed:
+            response.call_on_close(finish)
+        else:
+            finish()
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request не вызывался (необработанное исключение): профиль
+        # нужно выключить, иначе блокировка останется занятой
+        if 'metrics_started' in g:
+            _stop_profile(g.pop('metrics_profile', None))
+
+    def _finish(self, state, logger, started, endpoint, method, path, status):
+        profile = state.pop('metrics_profile', None)
+        _stop_profile(profile)
+
+        elapsed = time.perf_counter() - started
+        self.request_duration.observe(elapsed, endpoint, method, status)
+        self.sql_queries.observe(state.metrics_sql_count, endpoint)
+        self.sql_duration.observe(state.metrics_sql_time, endpoint)
+
+        repeated = {statement: count for statement, count in state.metrics_statements.items()
+                    if count >= self.n_plus_one_threshold}
+        if repeated:
+            self.n_plus_one.inc(endpoint)
+            for statement, count in repeated.items():
+                logger.warning('Возможный N+1 в %s: %d раз %s', endpoint, count,
+                               ' '.join(statement.split())[:200])
+
+        if elapsed * 1000 >= self.slow_ms:
+            self.slow_requests.inc(endpoint)
+            logger.warning(
+                'Медленный запрос %s %s: %.0f мс (SQL %d шт. / %.0f мс, '
+                'шаблоны %.0f мс)', method, path, elapsed * 1000,
+                state.metrics_sql_count, state.metrics_sql_time * 1000,
+                state.metrics_template_time * 1000)
+            if profile is not None:
+                stream = io.StringIO()
+                pstats.Stats(profile, stream=stream).sort_stats(
+                    'cumulative').print_stats(20)
+                logger.warning('Профиль %s:\n%s', path, stream.getvalue())
+
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def _metrics(self):
+        return (self.request_duration, self.sql_queries, self.sql_duration,
+                self.template_duration, self.n_plus_one, self.slow_requests)
+
+    def flush(self):
+        # Сбрасывает серии воркера в общий каталог; запись атомарная,
+        # чтобы соседний воркер не прочитал половину файла.
+        self._flushed = time.monotonic()
+        data = {metric.name: metric.snapshot() for metric in self._metrics()}
+        path = os.path.join(self.folder, f'{os.getpid()}.json')
+        temp = f'{path}.tmp'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(temp, 'w', encoding='utf-8') as target:
+                json.dump(data, target)
+            os.replace(temp, path)
+        except OSError as exc:
+            self._logger.warning('Не удалось сохранить метрики в %s: %s',
+                                 self.folder, exc)
+
+    def _collect(self):
+        # -> {pid: {имя метрики: snapshot}}; файлы завершившихся воркеров
+        # удаляются, иначе их счётчики висели бы до очистки каталога.
+        workers = {os.getpid(): {metric.name: metric.snapshot()
+                                 for metric in self._metrics()}}
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return workers
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext != '.json' or not stem.isdigit() or int(stem) in workers:
+                continue
+            path = os.path.join(self.folder, name)
+            if not _pid_alive(int(stem)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, encoding='utf-8') as source:
+                    workers[int(stem)] = json.load(source)
+            except (OSError, ValueError):
+                continue
+        return workers
+
+    def render(self):
+        self.flush()
+        workers = self._collect()
+        lines = []
+        for metric in self._metrics():
+            lines.extend(metric.render({pid: data.get(metric.name, [])
+                                        for pid, data in workers.items()}))
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_sql_count' in g:
+        conn.info.setdefault('metrics_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_query_started')
+    if not started or not has_request_context() or 'metrics_sql_count' not in g:
+        return
+    g.metrics_sql_time += time.perf_counter() - started.pop()
+    g.metrics_sql_count += 1
+    g.metrics_statements[statement] += 1
+
+
+metrics = Metrics()
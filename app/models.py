@@ -1,54 +1,128 @@
-from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, TextAreaField, FileField, SelectField, IntegerField, BooleanField
-from wtforms.validators import DataRequired, Email, Length, Optional
-
-class LoginForm(FlaskForm):
-    username = StringField('Логин', validators=[DataRequired(), Length(min=4, max=80)])
-    password = PasswordField('Пароль', validators=[DataRequired(), Length(min=6)])
-
-
-class AboutForm(FlaskForm):
-    section = SelectField('Раздел', choices=[
-        ('biography', 'Биография'),
-        ('philosophy', 'Философия работы'),
-        ('tools', 'Инструменты и технологии')
-    ], validators=[DataRequired()])
-    content = TextAreaField('Содержание', validators=[DataRequired()])
-    image = FileField('Изображение')
-
-
-class ContactForm(FlaskForm):
-    email = StringField('Email', validators=[DataRequired(), Email()])
-    phone = StringField('Телефон', validators=[DataRequired()])
-    address = TextAreaField('Адрес', validators=[DataRequired()])
-    telegram = StringField('Telegram', validators=[Optional()])
-    github = StringField('GitHub', validators=[Optional()])
-
-
-class SolutionForm(FlaskForm):
-    name = StringField('Название решения', validators=[DataRequired()])
-    slug = StringField('URL-идентификатор', validators=[DataRequired()])
-    description = TextAreaField('Описание', validators=[DataRequired()])
-    image = FileField('Изображение')
-    price = IntegerField('Цена', validators=[DataRequired()])
-    delivery_days = IntegerField('Срок разработки (дни)', validators=[DataRequired()])
-    is_new = BooleanField('Новинка')
-    is_popular = BooleanField('Популярное')
-    category = SelectField('Категория', choices=[
-        ('package', 'Пакетное решение'),
-        ('module', 'Дополнительный модуль')
-    ], validators=[DataRequired()])
-
-
-class PortfolioForm(FlaskForm):
-    title = StringField('Название проекта', validators=[DataRequired()])
-    slug = StringField('URL-идентификатор', validators=[DataRequired()])
-    category = StringField('Категория', validators=[DataRequired()])
-    package = StringField('Пакет', validators=[DataRequired()])
-    duration = StringField('Срок разработки', validators=[DataRequired()])
-    geo = StringField('Локация', validators=[DataRequired()])
-    images = FileField('Изображения', render_kw={'multiple': True})
-    features = TextAreaField('Особенности (каждая с новой строки)')
-    testimonial = TextAreaField('Отзыв клиента')
-    client = StringField('Имя клиента')
-    live_url = StringField('Ссылка на сайт')
+from datetime import datetime
+
+from flask_login import UserMixin
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app import db, login_manager
+
+
+class Admin(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+
+@login_manager.user_loader
+def load_admin(admin_id):
+    return db.session.get(Admin, int(admin_id))
+
+
+# Разделы страницы "Обо мне": biography / philosophy / tools
+class AboutContent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    section = db.Column(db.String(50), unique=True, index=True, nullable=False)
+    content = db.Column(db.Text, nullable=False, default='')
+    image_path = db.Column(db.String(300))
+
+
+class ContactInfo(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120))
+    phone = db.Column(db.String(50))
+    address = db.Column(db.Text)
+    telegram = db.Column(db.String(100))
+    github = db.Column(db.String(200))
+
+
+# Готовые решения: category - package (пакет) или module (доп. модуль)
+class Solution(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    slug = db.Column(db.String(200), unique=True, index=True)
+    description = db.Column(db.Text, nullable=False, default='')
+    image_path = db.Column(db.String(300))
+    price = db.Column(db.Integer, nullable=False, default=0)
+    delivery_days = db.Column(db.Integer, nullable=False, default=14)
+    is_new = db.Column(db.Boolean, nullable=False, default=False)
+    is_popular = db.Column(db.Boolean, nullable=False, default=False)
+    category = db.Column(db.String(50), index=True, nullable=False,
+                         default='package')
+
+    @property
+    def short_description(self):
+        # Первое предложение описания - для карточек и микроразметки
+        text = ' '.join((self.description or '').split())
+        end = text.find('. ')
+        return text[:end + 1] if 0 < end < 200 else text[:200]
+
+
+# Категории портфолио: ключ совпадает с data-filter кнопок на /portfolio
+PORTFOLIO_CATEGORIES = [
+    ('startap', 'Стартап-Лаунч'),
+    ('profi', 'Профи-Портфолио'),
+    ('magazin', 'Магазин-Мини'),
+    ('kofeynya', 'Кофейня-Бистро'),
+    ('uslugi', 'Услуги-Мастер'),
+    ('salon', 'Салон-Клиника'),
+    ('agentstvo', 'Агентство-Студия'),
+    ('other', 'Индивидуальный проект'),
+]
+
+
+# Проекты портфолио; images - имена файлов в UPLOAD_FOLDER, summary и
+# image_alt - текст и alt обложки для карточки (по умолчанию - из features
+# и title)
+class PortfolioItem(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    slug = db.Column(db.String(200), unique=True, index=True)
+    category = db.Column(db.String(50))
+    package = db.Column(db.String(100))
+    duration = db.Column(db.String(50))
+    geo = db.Column(db.String(100))
+    images = db.Column(db.JSON, nullable=False, default=list)
+    image_alt = db.Column(db.String(300))
+    summary = db.Column(db.String(300))
+    features = db.Column(db.JSON, nullable=False, default=list)
+    testimonial = db.Column(db.Text)
+    client = db.Column(db.String(200))
+    live_url = db.Column(db.String(300))
+
+
+# Даты изменения страниц для sitemap (kind: page / solution / portfolio)
+class SitemapEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    slug = db.Column(db.String(200), nullable=False)
+    title = db.Column(db.String(200))
+    category = db.Column(db.String(50))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.UniqueConstraint('kind', 'slug'),)
+
+
+# Заявки с формы /order; уведомление отправляет фоновая задача
+class Order(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    contact = db.Column(db.String(200), nullable=False)
+    package = db.Column(db.String(100))
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Просмотры страниц по дням; slug пустой для страниц без параметров
+class PageView(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    slug = db.Column(db.String(200), nullable=False, default='')
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint('day', 'endpoint', 'slug'),)
@@ -0,0 +1,91 @@
+# Уведомления о заказах. Отправка выполняется задачей notify_order из
+# фоновой очереди, поэтому медленный Telegram не задерживает ответ формы.
+# NOTIFY_TRANSPORT: 'telegram' - Bot API, 'stub' - сообщения
+# складываются в память и в лог (для разработки и тестов).
+import json
+import logging
+import urllib.request
+
+from flask import current_app
+
+from . import db
+from .models import Order
+
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API = 'https://api.telegram.org'
+
+
+class NotificationError(Exception):
+    pass
+
+
+class StubTransport:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, chat_id, text):
+        self.sent.append((chat_id, text))
+        logger.info('Уведомление для %s:\n%s', chat_id, text)
+
+
+class TelegramTransport:
+    def __init__(self, token, timeout=10):
+        self.token = token
+        self.timeout = timeout
+
+    def send(self, chat_id, text):
+        body = json.dumps({'chat_id': chat_id, 'text': text,
+                           'disable_web_page_preview': True}).encode('utf-8')
+        request = urllib.request.Request(
+            f'{TELEGRAM_API}/bot{self.token}/sendMessage', data=body,
+            headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            result = json.load(response)
+        if not result.get('ok'):
+            raise NotificationError(result.get('description', 'Telegram error'))
+
+
+stub_transport = StubTransport()
+
+
+def get_transport():
+    config = current_app.config
+    if config.get('NOTIFY_TRANSPORT', 'stub') == 'telegram':
+        if not config.get('TELEGRAM_BOT_TOKEN'):
+            raise NotificationError('Не задан TELEGRAM_BOT_TOKEN')
+        return TelegramTransport(config['TELEGRAM_BOT_TOKEN'],
+                                 config.get('NOTIFY_TIMEOUT', 10))
+    return stub_transport
+
+
+def _chat_id(transport):
+    # Бот не может написать пользователю по @username - нужен числовой
+    # chat_id чата, в котором владелец сайта запустил бота
+    chat_id = current_app.config.get('TELEGRAM_CHAT_ID')
+    if chat_id:
+        return chat_id
+    if transport is stub_transport:
+        return 'stub'
+    raise NotificationError('Не задан TELEGRAM_CHAT_ID')
+
+
+def format_order(order):
+    lines = [f'Новый заказ #{order.id}',
+             f'Имя: {order.name}',
+             f'Контакт: {order.contact}']
+    if order.package:
+        lines.append(f'Пакет: {order.package}')
+    if order.message:
+        lines += ['', order.message]
+    return '\n'.join(lines)
+
+
+def notify_order(order_id):
+    order = db.session.get(Order, order_id)
+    if order is None:
+        logger.warning('Заказ #%s не найден, уведомление пропущено', order_id)
+        return
+    transport = get_transport()
+    transport.send(_chat_id(transport), format_order(order))
@@ -0,0 +1,108 @@
+# Кэш готовых HTML-страниц с ETag / 304.
+# Ключ: версия контента + endpoint + аргументы view + полный URL
+# (шаблоны выводят request.url в canonical и og:url).
+# Потоковый ответ (render_page) при промахе отдаётся как есть, а в кэш
+# попадает, когда клиент дочитал его до конца.
+# Страница, при рендеринге которой менялась сессия (flash, вход в админку),
+# зависит от посетителя и в кэш не попадает: cookie сессии добавляется уже
+# после view, поэтому смотреть на Set-Cookie мало. Посетитель с
+# непоказанными flash-сообщениями получает страницу мимо кэша.
+import hashlib
+from collections import namedtuple
+from functools import wraps
+
+from flask import request, make_response, current_app, session
+
+from .cache import LRUStore, cache, content_changed
+
+
+CachedPage = namedtuple('CachedPage', 'body content_type etag')
+
+
+class PageCache:
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_age = 0
+        self.store = LRUStore()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.max_age = app.config.get('PAGE_CACHE_MAX_AGE', 0)
+        self.store = LRUStore(app.config.get('PAGE_CACHE_MAX_ENTRIES', 512),
+                              app.config.get('PAGE_CACHE_TTL', 300))
+        content_changed.connect(self._purge, weak=False)
+        app.extensions['page_cache'] = self
+
+    def _purge(self, sender, **kwargs):
+        self.store.clear()
+
+    def _key(self, kwargs):
+        return (cache.current_version, request.endpoint,
+                tuple(sorted(kwargs.items())), request.url)
+
+    def _store(self, key, response):
+        body = response.get_data()
+        page = CachedPage(body, response.headers.get('Content-Type'),
+                          hashlib.sha1(body).hexdigest())
+        self.store.set(key, page)
+        return page
+
+    def _tee(self, key, stream, content_type, state):
+        chunks = []
+        try:
+            for chunk in stream:
+                chunks.append(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                yield chunk
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+        # Шаблон мог обратиться к сессии уже во время отдачи
+        if state.modified:
+            return
+        body = b''.join(chunks)
+        self.store.set(key, CachedPage(body, content_type,
+                                       hashlib.sha1(body).hexdigest()))
+
+    def _respond(self, page, hit):
+        response = current_app.response_class(page.body,
+                                              content_type=page.content_type)
+        response.set_etag(page.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        response.cache_control.must_revalidate = True
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response.make_conditional(request)
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or request.method not in ('GET', 'HEAD') \
+                    or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            key = self._key(kwargs)
+            page = self.store.get(key)
+            if page is not None:
+                return self._respond(page, hit=True)
+
+            response = make_response(view(*args, **kwargs))
+            # Кэшируем только обычные 200-ответы без cookies и сессии
+            state = session._get_current_object()
+            if response.status_code != 200 or 'Set-Cookie' in response.headers \
+                    or state.modified:
+                return response
+            if response.is_streamed:
+                response.response = self._tee(key, response.response,
+                                              response.headers.get('Content-Type'),
+                                              state)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return self._respond(self._store(key, response), hit=False)
+
+        return wrapper
+
+
+page_cache = PageCache()
@@ -0,0 +1,72 @@
+# Keyset-пагинация для страниц со списками.
+# Порядок задаётся набором колонок, последняя из которых уникальна (id),
+# поэтому он стабилен при вставках. Курсор - значения ключа последней
+# (или первой) строки страницы в base64; OFFSET не используется, из БД
+# читается только видимая страница и одна лишняя строка.
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+from flask import request, current_app, abort
+from sqlalchemy import tuple_, literal
+
+
+Page = namedtuple('Page', 'items limit next_cursor prev_cursor')
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, binascii.Error):
+        abort(400)
+    # В курсоре только скаляры: вложенные объекты сломали бы сравнение в SQL
+    if not isinstance(values, list) or len(values) != size or not all(
+            isinstance(value, (int, float, str)) and not isinstance(value, bool)
+            for value in values):
+        abort(400)
+    return values
+
+
+def page_args(default_key='PAGE_SIZE'):
+    # after/before/limit из query string; размер страницы ограничен PAGE_SIZE_MAX
+    config = current_app.config
+    default = config.get(default_key, 20)
+    limit = request.args.get('limit', default, type=int)
+    limit = max(1, min(limit, config.get('PAGE_SIZE_MAX', 100)))
+    return request.args.get('after'), request.args.get('before'), limit
+
+
+def paginate(query, columns, after=None, before=None, limit=20):
+    key = tuple_(*columns)
+    if before:
+        values = decode_cursor(before, len(columns))
+        query = query.filter(key < tuple_(*map(literal, values)))
+        query = query.order_by(*[column.desc() for column in columns])
+    else:
+        if after:
+            values = decode_cursor(after, len(columns))
+            query = query.filter(key > tuple_(*map(literal, values)))
+        query = query.order_by(*columns)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before:
+        rows.reverse()
+
+    def cursor(row):
+        return encode_cursor(getattr(row, column.key) for column in columns)
+
+    # Назад можно, если пришли по after; вперёд - если пришли по before
+    has_next = has_more if not before else True
+    has_prev = has_more if before else bool(after)
+    next_cursor = cursor(rows[-1]) if rows and has_next else None
+    prev_cursor = cursor(rows[0]) if rows and has_prev else None
+    return Page(rows, limit, next_cursor, prev_cursor)
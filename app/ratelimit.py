@@ -0,0 +1,156 @@
+# Общее для всех воркеров хранилище счётчиков Flask-Limiter.
+# По умолчанию limits держит счётчики в памяти процесса: у каждого
+# воркера gunicorn свои, и лимит фактически умножается на их число.
+# SqliteStorage регистрирует схему sqlite:// (путь как в SQLAlchemy:
+# sqlite:///относительный, sqlite:////абсолютный) и хранит счётчики в
+# одной таблице WAL-базы (по умолчанию instance/ratelimit.db). Проверка
+# по алгоритму sliding-window-counter - одна короткая транзакция
+# BEGIN IMMEDIATE на локальном диске; synchronous=OFF, потому что потеря
+# счётчиков при сбое питания безвредна.
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from limits.storage import SlidingWindowCounterSupport, Storage
+from limits.storage.base import TimestampedSlidingWindow
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS counter (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID
+'''
+# Просроченные строки удаляются раз в CLEANUP_EVERY записей
+CLEANUP_EVERY = 1000
+
+
+class SqliteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, busy_timeout=5000, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split('://', 1)[1]
+        self.path = path[1:] if path.startswith('/') else path
+        self.busy_timeout = int(busy_timeout)
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @property
+    def _db(self):
+        # Соединение на поток; после fork открываем заново
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _get(self, db, key, now):
+        row = db.execute('SELECT value, expires FROM counter WHERE key = ?',
+                         (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return 0, now
+        return row
+
+    def _incr(self, db, key, expiry, amount, now):
+        db.execute(
+            'INSERT INTO counter (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = CASE WHEN expires <= ? THEN excluded.value ELSE value + excluded.value END, '
+            'expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END',
+            (key, amount, now + expiry, now, now))
+        self._writes += 1
+        if self._writes % CLEANUP_EVERY == 0:
+            db.execute('DELETE FROM counter WHERE expires <= ?', (now,))
+
+    def _transaction(self, work):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            result = work(db, time.time())
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return result
+
+    def incr(self, key, expiry, amount=1):
+        def work(db, now):
+            self._incr(db, key, expiry, amount, now)
+            return self._get(db, key, now)[0]
+        return self._transaction(work)
+
+    def get(self, key):
+        return self._get(self._db, key, time.time())[0]
+
+    def get_expiry(self, key):
+        return self._get(self._db, key, time.time())[1]
+
+    def check(self):
+        try:
+            self._db.execute('SELECT 1').fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def reset(self):
+        return self._transaction(
+            lambda db, now: db.execute('DELETE FROM counter').rowcount)
+
+    def clear(self, key):
+        self._db.execute('DELETE FROM counter WHERE key = ?', (key,))
+
+    def _window(self, db, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous = self._get(db, previous_key, now)[0]
+        current = self._get(db, current_key, now)[0]
+        # Доля предыдущего окна, которая ещё попадает в скользящее
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous, previous_ttl, current, current_ttl, current_key
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+
+        def work(db, now):
+            previous, previous_ttl, current, _, current_key = \
+                self._window(db, key, expiry, now)
+            if floor(previous * previous_ttl / expiry + current) + amount > limit:
+                return False
+            # Текущее окно нужно и как «предыдущее» следующему: храним 2 * expiry
+            self._incr(db, current_key, 2 * expiry, amount, now)
+            return True
+        return self._transaction(work)
+
+    def get_sliding_window(self, key, expiry):
+        return self._window(self._db, key, expiry, time.time())[:4]
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self._db.execute('DELETE FROM counter WHERE key IN (?, ?)',
+                         (previous_key, current_key))
+
+
+def configure(app):
+    # До limiter.init_app: общий SQLite вместо памяти процесса
+    config = app.config
+    if not config.get('RATELIMIT_STORAGE_URI'):
+        path = os.path.join(app.instance_path, 'ratelimit.db')
+        config['RATELIMIT_STORAGE_URI'] = f'sqlite:///{path}'
+    config.setdefault('RATELIMIT_STRATEGY', 'sliding-window-counter')
@@ -0,0 +1,355 @@
+# Полнотекстовый поиск по решениям и портфолио.
+# Основной вариант - виртуальная таблица SQLite FTS5 с ранжированием bm25,
+# запасной (другая СУБД или SQLite без FTS5) - инвертированный индекс в
+# памяти воркера. Текст и запрос приводятся к основам слов (app.stemmer),
+# поиск идёт по префиксам основ. Индекс обновляется по сигналу
+# content_changed только для сохранённой записи. Таблицу FTS5 создают и
+# заполняют flask init-db и flask search reindex; запросы чтения её только
+# читают, а без таблицы воркер ищет по индексу в памяти.
+import bisect
+import itertools
+import math
+import re
+import threading
+from collections import namedtuple, defaultdict
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from . import db
+from .cache import cache, content_changed
+from .models import Solution, PortfolioItem
+from .stemmer import stem
+
+
+TABLE = 'search_index'
+EXCERPT_LENGTH = 200
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+STOPWORDS = frozenset((
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то',
+    'все', 'она', 'так', 'его', 'но', 'да', 'ты', 'к', 'у', 'же', 'вы', 'за',
+    'бы', 'по', 'только', 'ее', 'мне', 'было', 'вот', 'от', 'меня', 'еще',
+    'нет', 'о', 'из', 'ему', 'для', 'при', 'или', 'это', 'до', 'под', 'без',
+))
+
+_WORD = re.compile('[a-zа-яё0-9]+')
+
+Document = namedtuple('Document', 'kind slug title excerpt title_terms body_terms')
+Hit = namedtuple('Hit', 'kind slug title excerpt score')
+
+
+def tokenize(value):
+    return [stem(word) for word in _WORD.findall((value or '').lower())
+            if word not in STOPWORDS]
+
+
+def _excerpt(value):
+    value = ' '.join((value or '').split())
+    if len(value) <= EXCERPT_LENGTH:
+        return value
+    return value[:EXCERPT_LENGTH].rsplit(' ', 1)[0] + '…'
+
+
+def _solution_document(solution):
+    return Document('solution', solution.slug, solution.name,
+                    _excerpt(solution.description),
+                    tokenize(solution.name), tokenize(solution.description))
+
+
+def _portfolio_document(item):
+    features = ' '.join(item.features or [])
+    body = ' '.join(filter(None, (item.category, features, item.testimonial)))
+    return Document('portfolio', item.slug, item.title,
+                    _excerpt(item.testimonial or features),
+                    tokenize(item.title), tokenize(body))
+
+
+def _all_documents():
+    # Записи без slug не индексируются: на них нельзя сослаться, а в
+    # индексе они совпали бы по ключу (kind, slug)
+    for solution in Solution.query.filter(Solution.slug.isnot(None)) \
+            .order_by(Solution.id):
+        yield _solution_document(solution)
+    for item in PortfolioItem.query.filter(PortfolioItem.slug.isnot(None)) \
+            .order_by(PortfolioItem.id):
+        yield _portfolio_document(item)
+
+
+def _load_document(kind, slug):
+    if not slug:
+        return None
+    if kind == 'solution':
+        solution = Solution.query.filter_by(slug=slug).first()
+        return _solution_document(solution) if solution else None
+    item = PortfolioItem.query.filter_by(slug=slug).first()
+    return _portfolio_document(item) if item else None
+
+
+class Fts5Index:
+    name = 'fts5'
+
+    @staticmethod
+    def supported():
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        with db.engine.connect() as conn:
+            options = conn.exec_driver_sql('PRAGMA compile_options').scalars()
+            return 'ENABLE_FTS5' in set(options)
+
+    @staticmethod
+    def exists():
+        return db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': TABLE}).first() is not None
+
+    def _insert(self, documents):
+        rows = [{'kind': doc.kind, 'slug': doc.slug, 'display_title': doc.title,
+                 'excerpt': doc.excerpt, 'title': ' '.join(doc.title_terms),
+                 'body': ' '.join(doc.body_terms)} for doc in documents]
+        if rows:
+            db.session.execute(text(
+                f'INSERT INTO {TABLE} (kind, slug, display_title, excerpt, '
+                'title, body) VALUES (:kind, :slug, :display_title, :excerpt, '
+                ':title, :body)'), rows)
+
+    def rebuild(self):
+        db.session.execute(text(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+            'kind UNINDEXED, slug UNINDEXED, display_title UNINDEXED, '
+            "excerpt UNINDEXED, title, body, tokenize = 'unicode61')"))
+        db.session.execute(text(f'DELETE FROM {TABLE}'))
+        count = 0
+        batch = []
+        for document in _all_documents():
+            batch.append(document)
+            if len(batch) >= 1000:
+                self._insert(batch)
+                count += len(batch)
+                batch = []
+        self._insert(batch)
+        db.session.commit()
+        return count + len(batch)
+
+    def reset(self):
+        self.rebuild()
+
+    def update(self, kind, slug):
+        db.session.execute(text(
+            f'DELETE FROM {TABLE} WHERE kind = :kind AND slug = :slug'),
+            {'kind': kind, 'slug': slug})
+        document = _load_document(kind, slug)
+        if document is not None:
+            self._insert([document])
+        db.session.commit()
+
+    def search(self, terms, kind, offset, limit):
+        params = {'query': ' '.join(f'"{term}"*' for term in terms),
+                  'kind': kind, 'offset': offset, 'limit': limit}
+        where = f'{TABLE} MATCH :query'
+        if kind:
+            where += ' AND kind = :kind'
+        total = db.session.execute(
+            text(f'SELECT count(*) FROM {TABLE} WHERE {where}'), params).scalar()
+        rows = db.session.execute(text(
+            f'SELECT kind, slug, display_title, excerpt, '
+            f'bm25({TABLE}, 0, 0, 0, 0, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank '
+            f'FROM {TABLE} WHERE {where} ORDER BY rank LIMIT :limit OFFSET :offset'),
+            params)
+        return total, [Hit(row.kind, row.slug, row.display_title, row.excerpt,
+                           round(-row.rank, 6)) for row in rows]
+
+
+class MemoryIndex:
+    # BM25 по двум полям; индекс пересобирается, если версия контента
+    # изменилась в другом воркере
+    name = 'memory'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.version = None
+        self.documents = {}
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        self.terms = []
+        self._lock = threading.RLock()
+
+    def ensure(self):
+        if self.version != cache.current_version:
+            self.rebuild()
+
+    def rebuild(self):
+        with self._lock:
+            self.documents = {}
+            self.postings = defaultdict(dict)
+            self.lengths = {}
+            for document in _all_documents():
+                self._add(document)
+            self.terms = sorted(self.postings)
+            self.version = cache.current_version
+            return len(self.documents)
+
+    def reset(self):
+        # Пересборка откладывается до следующего поиска
+        with self._lock:
+            self.version = None
+
+    def _add(self, document):
+        key = (document.kind, document.slug)
+        self.documents[key] = document
+        self.lengths[key] = (len(document.title_terms) * TITLE_WEIGHT
+                             + len(document.body_terms) * BODY_WEIGHT)
+        weights = defaultdict(float)
+        for term in document.title_terms:
+            weights[term] += TITLE_WEIGHT
+        for term in document.body_terms:
+            weights[term] += BODY_WEIGHT
+        for term, weight in weights.items():
+            self.postings[term][key] = weight
+
+    def _remove(self, key):
+        document = self.documents.pop(key, None)
+        if document is None:
+            return
+        del self.lengths[key]
+        for term in set(document.title_terms) | set(document.body_terms):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+
+    def update(self, kind, slug):
+        with self._lock:
+            if self.version is None:
+                return
+            self._remove((kind, slug))
+            document = _load_document(kind, slug)
+            if document is not None:
+                self._add(document)
+            self.terms = sorted(self.postings)
+            self.version = cache.current_version
+
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self.terms, prefix)
+        for term in itertools.islice(self.terms, start, None):
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, terms, kind, offset, limit):
+        self.ensure()
+        with self._lock:
+            count = len(self.documents) or 1
+            average = sum(self.lengths.values()) / count or 1
+            scores = None
+            for prefix in terms:
+                term_scores = defaultdict(float)
+                for term in self._expand(prefix):
+                    postings = self.postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5)
+                                   / (len(postings) + 0.5))
+                    for key, weight in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b
+                                          * self.lengths[key] / average)
+                        term_scores[key] += idf * weight * (self.k1 + 1) / (weight + norm)
+                # Все слова запроса должны встретиться в документе
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {key: score + term_scores[key]
+                              for key, score in scores.items() if key in term_scores}
+                if not scores:
+                    return 0, []
+            ranked = sorted(((score, key) for key, score in scores.items()
+                             if not kind or key[0] == kind),
+                            key=lambda item: (-item[0], item[1]))
+            hits = []
+            for score, key in ranked[offset:offset + limit]:
+                document = self.documents[key]
+                hits.append(Hit(document.kind, document.slug, document.title,
+                                document.excerpt, round(score, 4)))
+            return len(ranked), hits
+
+
+class Search:
+    def __init__(self, app=None):
+        self.backend = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend_name = app.config.get('SEARCH_BACKEND', 'auto')
+        self.max_terms = app.config.get('SEARCH_MAX_TERMS', 10)
+        app.extensions['search'] = self
+        app.cli.add_command(search_cli)
+        content_changed.connect(self._on_content_changed, weak=False)
+
+    def _use_fts5(self):
+        if self.backend_name == 'auto':
+            return Fts5Index.supported()
+        return self.backend_name == 'fts5'
+
+    def _backend(self):
+        if self.backend is None:
+            with self._lock:
+                if self.backend is None:
+                    if self._use_fts5() and Fts5Index.exists():
+                        self.backend = Fts5Index()
+                    else:
+                        if self._use_fts5():
+                            current_app.logger.warning(
+                                'Таблицы %s нет: поиск по индексу в памяти до '
+                                'flask search reindex и перезапуска', TABLE)
+                        self.backend = MemoryIndex()
+        return self.backend
+
+    def query(self, value, kind=None, offset=0, limit=20):
+        terms = list(dict.fromkeys(tokenize(value)))[:self.max_terms]
+        if not terms:
+            return 0, []
+        return self._backend().search(terms, kind, offset, limit)
+
+    def rebuild(self):
+        # Явная пересборка (CLI, init-db) создаёт таблицу FTS5, если её нет
+        with self._lock:
+            self.backend = Fts5Index() if self._use_fts5() else MemoryIndex()
+        return self.backend.rebuild()
+
+    def _on_content_changed(self, sender, key=None, **kwargs):
+        if sender not in ('solution', 'portfolio'):
+            return
+        try:
+            # Без ключа неизвестно, какая запись изменилась (массовая
+            # правка, переименование slug) - индекс собирается заново
+            if key:
+                self._backend().update(sender, key)
+            else:
+                self._backend().reset()
+        except Exception:
+            # Поиск не должен ломать сохранение в админке
+            db.session.rollback()
+            current_app.logger.exception('Не удалось обновить поисковый '
+                                         'индекс для %s %s', sender, key)
+
+
+@click.group('search')
+def search_cli():
+    """Поисковый индекс."""
+
+
+@search_cli.command('reindex')
+@with_appcontext
+def reindex_command():
+    """Полностью перестраивает поисковый индекс."""
+    count = search.rebuild()
+    click.echo(f'Проиндексировано документов: {count} '
+               f'({search.backend.name})')
+
+
+search = Search()
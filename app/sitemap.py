@@ -0,0 +1,360 @@
+# Предрассчитанная карта сайта.
+# Даты изменения хранятся в SitemapEntry и обновляются при сохранении в
+# админке; пересобираются только затронутые части. При числе URL больше
+# SITEMAP_MAX_URLS sitemap.xml становится индексом gzip-частей.
+# Файлы пишут только `flask sitemap build`, сохранение в админке и импорт
+# каталога; публичные запросы их лишь отдают. Пока файла нет (первый запуск
+# до `flask sitemap build`), /sitemap.xml строится из каталога в памяти,
+# тоже без записи в БД и на диск. Адреса строятся от SITEMAP_BASE_URL, а не
+# от заголовка Host запроса, поэтому без этой настройки sitemap не пишется
+# и не отдаётся.
+import gzip
+import os
+from collections import namedtuple
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+import click
+from flask import current_app, url_for, send_file
+from flask.cli import with_appcontext
+
+from . import db
+from .cache import cache, content_changed
+from .models import Solution, PortfolioItem, SitemapEntry
+
+
+# endpoint, название, раздел HTML-карты, changefreq, priority
+FIXED_PAGES = [
+    ('main.index', 'Главная', 'Основные страницы', 'weekly', '1.0'),
+    ('main.solutions', 'Магазин решений', 'Основные страницы', 'weekly', '1.0'),
+    ('main.portfolio', 'Портфолио', 'Основные страницы', 'weekly', '1.0'),
+    ('main.about', 'Обо мне', 'Основные страницы', 'weekly', '1.0'),
+    ('main.contacts', 'Контакты', 'Основные страницы', 'weekly', '1.0'),
+    ('main.privacy', 'Политика конфиденциальности', 'Правовая информация',
+     'yearly', '0.3'),
+    ('main.sitemap_html', 'Карта сайта', 'Правовая информация', 'monthly', '0.3'),
+]
+
+PAGE_TITLES = {endpoint: title for endpoint, title, *_ in FIXED_PAGES}
+
+SECTIONS = {
+    'Основные страницы': 'home',
+    'Пакетные решения': 'box-open',
+    'Дополнительные модули': 'puzzle-piece',
+    'Портфолио': 'briefcase',
+    'Правовая информация': 'file-alt',
+}
+
+# Какие фиксированные страницы меняются вместе с сущностью
+AFFECTED_PAGES = {
+    'solution': ['main.solutions'],
+    'portfolio': ['main.portfolio'],
+    'about': ['main.about'],
+    'contacts': ['main.contacts'],
+}
+
+
+# Запись карты сайта, ещё не сохранённая в SitemapEntry
+Entry = namedtuple('Entry', 'kind slug title category')
+
+
+class SitemapError(Exception):
+    pass
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _folder(app):
+    return app.config.get('SITEMAP_FOLDER') or os.path.join(app.instance_path,
+                                                            'sitemap')
+
+
+def _limit(app):
+    return app.config.get('SITEMAP_MAX_URLS', 50000)
+
+
+def _url_builders(external):
+    # url_for один раз на вид сущности, дальше - подстановка slug
+    solution_url = url_for('main.package_details', package_slug='__slug__',
+                           _external=external)
+    portfolio_url = url_for('main.portfolio_detail', slug='__slug__',
+                            _external=external)
+    pages = {endpoint: url_for(endpoint, _external=external)
+             for endpoint, *_ in FIXED_PAGES}
+
+    def build(entry):
+        if entry.kind == 'solution':
+            return solution_url.replace('__slug__', entry.slug)
+        if entry.kind == 'portfolio':
+            return portfolio_url.replace('__slug__', entry.slug)
+        return pages[entry.slug]
+
+    return build
+
+
+def _page_meta():
+    return {endpoint: (changefreq, priority)
+            for endpoint, _, _, changefreq, priority in FIXED_PAGES}
+
+
+def _render_urlset(entries, build_url):
+    meta = _page_meta()
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for entry in entries:
+        changefreq, priority = meta.get(entry.slug, ('monthly', '0.8')) \
+            if entry.kind == 'page' else ('monthly', '0.8')
+        # У Entry (каталог без SitemapEntry) даты изменения нет
+        updated_at = getattr(entry, 'updated_at', None)
+        lastmod = f'<lastmod>{updated_at:%Y-%m-%d}</lastmod>' if updated_at else ''
+        lines.append(
+            f'<url><loc>{escape(build_url(entry))}</loc>{lastmod}'
+            f'<changefreq>{changefreq}</changefreq>'
+            f'<priority>{priority}</priority></url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _render_index(shards, shard_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for number, lastmod in shards:
+        lines.append(f'<sitemap><loc>{escape(shard_url(number))}</loc>'
+                     f'<lastmod>{lastmod:%Y-%m-%d}</lastmod></sitemap>')
+    lines.append('</sitemapindex>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _shard_query(number, limit):
+    return (SitemapEntry.query.order_by(SitemapEntry.id)
+            .offset((number - 1) * limit).limit(limit))
+
+
+def _shard_of(entry, limit):
+    position = SitemapEntry.query.filter(SitemapEntry.id < entry.id).count()
+    return position // limit + 1
+
+
+def write_sitemap(app, shards=None):
+    # shards=None - пересобрать все части
+    base_url = app.config.get('SITEMAP_BASE_URL')
+    if not base_url:
+        raise SitemapError('Не задан SITEMAP_BASE_URL (например, '
+                           'https://example.ru): без него в sitemap попадёт '
+                           'чужой или локальный адрес')
+    folder = _folder(app)
+    limit = _limit(app)
+    total = SitemapEntry.query.count()
+    shard_count = max(1, -(-total // limit))
+    if shards is None:
+        shards = range(1, shard_count + 1)
+
+    with app.test_request_context(base_url=base_url):
+        build_url = _url_builders(external=True)
+        for number in shards:
+            if number > shard_count:
+                continue
+            data = _render_urlset(_shard_query(number, limit), build_url)
+            _write(os.path.join(folder, f'sitemap-{number}.xml.gz'),
+                   gzip.compress(data, mtime=0))
+            if shard_count == 1:
+                _write(os.path.join(folder, 'sitemap.xml'), data)
+
+        if shard_count > 1:
+            lastmods = []
+            for number in range(1, shard_count + 1):
+                subquery = _shard_query(number, limit).with_entities(
+                    SitemapEntry.updated_at).subquery()
+                lastmods.append((number, db.session.query(
+                    db.func.max(subquery.c.updated_at)).scalar()))
+            _write(os.path.join(folder, 'sitemap.xml'), _render_index(
+                lastmods, lambda n: url_for('main.sitemap_shard', number=n,
+                                            _external=True)))
+
+        # Лишние части после уменьшения каталога
+        number = shard_count + 1
+        while os.path.exists(os.path.join(folder, f'sitemap-{number}.xml.gz')):
+            os.remove(os.path.join(folder, f'sitemap-{number}.xml.gz'))
+            number += 1
+
+
+def _upsert(kind, slug, title=None, category=None, now=None):
+    entry = SitemapEntry.query.filter_by(kind=kind, slug=slug).first()
+    if entry is None:
+        entry = SitemapEntry(kind=kind, slug=slug)
+        db.session.add(entry)
+    entry.title = title
+    entry.category = category
+    entry.updated_at = now or _now()
+    return entry
+
+
+def _wanted_entries():
+    # Все URL каталога: {(kind, slug): (title, category)}
+    wanted = {('page', endpoint): (title, None)
+              for endpoint, title in PAGE_TITLES.items()}
+    wanted.update({('solution', s.slug): (s.name, s.category)
+                   for s in Solution.query.order_by(Solution.id) if s.slug})
+    wanted.update({('portfolio', p.slug): (p.title, None)
+                   for p in PortfolioItem.query.order_by(PortfolioItem.id)
+                   if p.slug})
+    return wanted
+
+
+def sync_entries():
+    # Полная сверка SitemapEntry с каталогом
+    existing = {(e.kind, e.slug): e for e in SitemapEntry.query}
+    wanted = _wanted_entries()
+
+    now = _now()
+    for key, (title, category) in wanted.items():
+        entry = existing.get(key)
+        if entry is None:
+            db.session.add(SitemapEntry(kind=key[0], slug=key[1], title=title,
+                                        category=category, updated_at=now))
+        elif (entry.title, entry.category) != (title, category):
+            entry.title, entry.category, entry.updated_at = title, category, now
+    for key, entry in existing.items():
+        if key not in wanted:
+            db.session.delete(entry)
+    db.session.commit()
+
+
+def _on_content_changed(sender, key=None, **kwargs):
+    app = current_app._get_current_object()
+    if sender in ('solution', 'portfolio') and not key:
+        # Массовое изменение (импорт каталога): полная сверка, все части
+        sync_entries()
+        _write_logged(app)
+        return
+    if SitemapEntry.query.first() is None:
+        # Первое сохранение до `flask sitemap build`: заполняем таблицу целиком
+        sync_entries()
+    now = _now()
+    touched = []
+    for endpoint in AFFECTED_PAGES.get(sender, []):
+        touched.append(_upsert('page', endpoint, PAGE_TITLES[endpoint], now=now))
+    if sender == 'solution' and key:
+        solution = Solution.query.filter_by(slug=key).first()
+        if solution:
+            touched.append(_upsert('solution', key, solution.name,
+                                   solution.category, now=now))
+    elif sender == 'portfolio' and key:
+        item = PortfolioItem.query.filter_by(slug=key).first()
+        if item:
+            touched.append(_upsert('portfolio', key, item.title, now=now))
+    if not touched:
+        return
+    db.session.commit()
+
+    limit = _limit(app)
+    _write_logged(app, {_shard_of(entry, limit) for entry in touched})
+
+
+def _write_logged(app, shards=None):
+    try:
+        write_sitemap(app, shards)
+    except SitemapError as exc:
+        # Сохранение в админке или импорт не должны падать из-за карты сайта
+        app.logger.warning('Sitemap не обновлён: %s', exc)
+
+
+def shard_numbers(app):
+    # Номера уже записанных gzip-частей
+    numbers = []
+    while os.path.exists(os.path.join(_folder(app),
+                                      f'sitemap-{len(numbers) + 1}.xml.gz')):
+        numbers.append(len(numbers) + 1)
+    return numbers
+
+
+def _render_fallback(app):
+    # sitemap.xml до первой сборки: первые SITEMAP_MAX_URLS адресов
+    base_url = app.config.get('SITEMAP_BASE_URL')
+    if not base_url:
+        return None
+
+    def load():
+        limit = _limit(app)
+        entries = SitemapEntry.query.order_by(SitemapEntry.id).limit(limit).all()
+        if not entries:
+            entries = [Entry(kind, slug, title, category) for (kind, slug),
+                       (title, category) in _wanted_entries().items()][:limit]
+        with app.test_request_context(base_url=base_url):
+            return _render_urlset(entries, _url_builders(external=True))
+
+    return cache.get_or_load(('sitemap_xml', None), load)
+
+
+def sitemap_response(filename):
+    # Отдаёт готовый файл; собирает его `flask sitemap build`
+    path = os.path.join(_folder(current_app), filename)
+    if not os.path.exists(path):
+        if filename != 'sitemap.xml':
+            return None
+        data = _render_fallback(current_app._get_current_object())
+        if data is None:
+            return None
+        return current_app.response_class(data, mimetype='application/xml')
+    if filename.endswith('.gz'):
+        return send_file(path, mimetype='application/gzip', conditional=True)
+    return send_file(path, mimetype='application/xml', conditional=True)
+
+
+def sitemap_sections():
+    # Разделы HTML-карты сайта: {раздел: [(url, название), ...]}
+    def load():
+        sections = {name: [] for name in SECTIONS}
+        groups = {endpoint: section for endpoint, _, section, *_ in FIXED_PAGES}
+        build_url = _url_builders(external=False)
+        entries = SitemapEntry.query.order_by(SitemapEntry.id).all()
+        if not entries:
+            # Таблица ещё не заполнена - читаем каталог, ничего не записывая
+            entries = [Entry(kind, slug, title, category) for (kind, slug),
+                       (title, category) in _wanted_entries().items()]
+        for entry in entries:
+            if entry.kind == 'page':
+                section = groups.get(entry.slug)
+            elif entry.kind == 'portfolio':
+                section = 'Портфолио'
+            elif entry.category == 'module':
+                section = 'Дополнительные модули'
+            else:
+                section = 'Пакетные решения'
+            if section:
+                sections[section].append((build_url(entry), entry.title))
+        return sections
+
+    return cache.get_or_load(('sitemap_sections', None), load)
+
+
+@click.group('sitemap')
+def sitemap_cli():
+    """Карта сайта."""
+
+
+@sitemap_cli.command('build')
+@with_appcontext
+def build_command():
+    """Сверяет даты изменения с каталогом и пересобирает sitemap."""
+    sync_entries()
+    try:
+        write_sitemap(current_app._get_current_object())
+    except SitemapError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f'URL в карте сайта: {SitemapEntry.query.count()}')
+
+
+def init_app(app):
+    app.cli.add_command(sitemap_cli)
+    content_changed.connect(_on_content_changed, weak=False)
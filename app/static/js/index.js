@@ -368,12 +368,26 @@ document.addEventListener('DOMContentLoaded', function() {
     if (form) {
         form.addEventListener('submit', function(e) {
             e.preventDefault();
-
-            // Показываем кастомное модальное окно
-            modal.style.display = 'block';
-
-            // Сбрасываем форму
-            form.reset();
+            const button = form.querySelector('button[type="submit"]');
+            if (button) button.disabled = true;
+
+            // Заявка уходит на /order в JSON (страница кэшируется, поэтому
+            // без CSRF-токена); уведомление сервер отправляет в фоне
+            fetch(form.action, {
+                method: 'POST',
+                body: JSON.stringify(Object.fromEntries(new FormData(form))),
+                headers: {'Accept': 'application/json',
+                          'Content-Type': 'application/json'}
+            })
+                .then(response => {
+                    if (!response.ok) throw new Error(response.status);
+                    // Показываем кастомное модальное окно
+                    modal.style.display = 'block';
+                    // Сбрасываем форму
+                    form.reset();
+                })
+                .catch(() => alert('Не удалось отправить заявку. Напишите мне в Telegram.'))
+                .finally(() => { if (button) button.disabled = false; });
         });
     }
 
@@ -403,6 +417,13 @@ document.addEventListener('DOMContentLoaded', function() {
 document.addEventListener('DOMContentLoaded', () => {
     // Фильтрация проектов - добавлена проверка на существование элементов
     const portfolioFilterButtons = document.querySelectorAll('.portfolio-filters button');
+    // Текущий фильтр применяется и к карточкам, подгруженным позже
+    let portfolioFilter = 'all';
+
+    function matchesPortfolioFilter(card) {
+        return portfolioFilter === 'all' || card.dataset.category === portfolioFilter;
+    }
+
     if (portfolioFilterButtons.length > 0) {
         portfolioFilterButtons.forEach(btn => {
             btn.addEventListener('click', () => {
@@ -412,11 +433,11 @@ document.addEventListener('DOMContentLoaded', () => {
                 // Добавляем активный класс текущей кнопке
                 btn.classList.add('active');
 
-                const filter = btn.dataset.filter;
+                portfolioFilter = btn.dataset.filter;
                 const portfolioCards = document.querySelectorAll('.portfolio-card');
 
                 portfolioCards.forEach(card => {
-                    if (filter === 'all' || card.dataset.category === filter) {
+                    if (matchesPortfolioFilter(card)) {
                         card.style.display = 'block';
                         card.style.opacity = '0';
                         // Анимация появления
@@ -431,6 +452,10 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Поля проекта, которые показывает модальное окно
+    const projectModalFields = 'title,geo,images,features,package,duration,' +
+        'testimonial,client,live_url';
+
     // Улучшенная функция загрузки модального окна проекта
     function loadProjectModal(id) {
         const modal = document.getElementById('projectModal');
@@ -445,8 +470,9 @@ document.addEventListener('DOMContentLoaded', () => {
         // Показываем модальное окно сразу с лоадером
         modal.style.display = 'block';
 
-        // Загружаем данные проекта
-        fetch(`/api/projects/${id}`)
+        // Загружаем данные проекта: по умолчанию API отдаёт только поля
+        // карточки, для модального окна нужна полная запись
+        fetch(`/api/projects/${id}?fields=${projectModalFields}`)
             .then(response => {
                 if (!response.ok) throw new Error('Ошибка загрузки');
                 return response.json();
@@ -515,15 +541,18 @@ document.addEventListener('DOMContentLoaded', () => {
             });
     }
 
-    // Обработка кликов по карточкам проектов
-    document.querySelectorAll('.portfolio-card').forEach(card => {
-        card.addEventListener('click', (e) => {
+    // Обработка кликов по карточкам проектов: один обработчик на сетку,
+    // чтобы работали и карточки, подгруженные кнопкой "Показать ещё"
+    const portfolioGrid = document.querySelector('.portfolio-grid');
+    if (portfolioGrid) {
+        portfolioGrid.addEventListener('click', (e) => {
+            const card = e.target.closest('.portfolio-card');
             // Проверяем, не был ли клик по ссылке внутри карточки
-            if (!e.target.closest('a') && card.dataset.id) {
+            if (card && !e.target.closest('a') && card.dataset.id) {
                 loadProjectModal(card.dataset.id);
             }
         });
-    });
+    }
 
     // Закрытие модального окна проекта
     const modalCloseBtn = document.querySelector('.portfolio-modal__close');
@@ -542,21 +571,63 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
-    // Кнопка "Показать ещё" - базовая реализация
-    const loadMoreBtn = document.querySelector('.portfolio-pagination button');
-    if (loadMoreBtn) {
-        loadMoreBtn.addEventListener('click', () => {
-            loadMoreBtn.textContent = 'Загрузка...';
-            loadMoreBtn.disabled = true;
-
-            // Здесь должен быть реальный запрос на сервер
-            setTimeout(() => {
-                // Это пример - нужно заменить на реальную загрузку
-                console.log('Загружаем дополнительные проекты...');
-                loadMoreBtn.textContent = 'Показать ещё';
-                loadMoreBtn.disabled = false;
-            }, 1000);
+    // Кнопка "Показать ещё": следующая страница карточек подгружается
+    // фрагментом /fragments/portfolio; с data-infinite - при прокрутке
+    const loadMoreLink = document.querySelector('.portfolio-pagination a[rel="next"]');
+    if (loadMoreLink && portfolioGrid && window.fetch) {
+        let loading = false;
+        let observer = null;
+
+        const loadMore = () => {
+            if (loading || !loadMoreLink.dataset.fragment) return;
+            loading = true;
+            loadMoreLink.textContent = 'Загрузка...';
+
+            fetch(loadMoreLink.dataset.fragment)
+                .then(response => {
+                    if (!response.ok) throw new Error(response.status);
+                    return response.text();
+                })
+                .then(html => {
+                    const fragment = document.createElement('template');
+                    fragment.innerHTML = html;
+                    const next = fragment.content.querySelector('.portfolio-next');
+                    fragment.content.querySelectorAll('.portfolio-card')
+                        .forEach(card => {
+                            if (!matchesPortfolioFilter(card)) card.style.display = 'none';
+                            portfolioGrid.appendChild(card);
+                        });
+
+                    if (next) {
+                        loadMoreLink.href = next.getAttribute('href');
+                        loadMoreLink.dataset.fragment = next.dataset.fragment;
+                        loadMoreLink.textContent = 'Показать ещё';
+                    } else {
+                        if (observer) observer.disconnect();
+                        loadMoreLink.remove();
+                    }
+                })
+                .catch(() => {
+                    // При ошибке остаётся обычный переход по ссылке
+                    loadMoreLink.textContent = 'Показать ещё';
+                    if (observer) observer.disconnect();
+                    delete loadMoreLink.dataset.fragment;
+                })
+                .finally(() => { loading = false; });
+        };
+
+        loadMoreLink.addEventListener('click', event => {
+            if (!loadMoreLink.dataset.fragment) return;
+            event.preventDefault();
+            loadMore();
         });
+
+        if ('infinite' in loadMoreLink.dataset && 'IntersectionObserver' in window) {
+            observer = new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) loadMore();
+            }, {rootMargin: '400px'});
+            observer.observe(loadMoreLink);
+        }
     }
 });
 
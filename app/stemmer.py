@@ -0,0 +1,114 @@
+# Стеммер для русского языка по алгоритму Snowball (Портер).
+# Используется поиском: и индекс, и запросы приводятся к основам слов.
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND_1 = ('вшись', 'вши', 'в')
+PERFECTIVE_GERUND_2 = ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв')
+ADJECTIVE = ('ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое',
+             'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую',
+             'юю', 'ая', 'яя', 'ою', 'ею')
+PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+REFLEXIVE = ('ся', 'сь')
+VERB_1 = ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет',
+          'ют', 'ны', 'ть', 'й', 'л', 'н')
+VERB_2 = ('ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило',
+          'ыло', 'ено', 'ует', 'уют', 'ены', 'ить', 'ыть', 'ишь', 'ей', 'уй',
+          'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю')
+NOUN = ('иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие',
+        'ье', 'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях',
+        'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я')
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+_CYRILLIC = re.compile('^[а-яё]+$')
+
+
+def _regions(word):
+    # RV - после первой гласной; R2 - по определению Snowball
+    rv = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    r1 = len(word)
+    for i in range(1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+    r2 = len(word)
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _among(part, groups):
+    # Как among в Snowball: берётся самое длинное подходящее окончание;
+    # окончания с флагом after_a удаляются только после "а" или "я"
+    best = None
+    for endings, after_a in groups:
+        for ending in endings:
+            if part.endswith(ending):
+                if best is None or len(ending) > len(best[0]):
+                    best = (ending, after_a)
+                break
+    if best is None:
+        return None
+    ending, after_a = best
+    rest = part[:-len(ending)]
+    if after_a and rest[-1:] not in ('а', 'я'):
+        return None
+    return rest
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    if not _CYRILLIC.match(word):
+        return word
+    rv, r2 = _regions(word)
+    prefix, part = word[:rv], word[rv:]
+
+    # Шаг 1: деепричастие, иначе возвратность + прилагательное/глагол/сущ.
+    result = _among(part, ((PERFECTIVE_GERUND_1, True),
+                           (PERFECTIVE_GERUND_2, False)))
+    if result is not None:
+        part = result
+    else:
+        part = _among(part, ((REFLEXIVE, False),)) or part
+        adjective = _among(part, ((ADJECTIVE, False),))
+        if adjective is not None:
+            participle = _among(adjective, ((PARTICIPLE_1, True),
+                                            (PARTICIPLE_2, False)))
+            part = participle if participle is not None else adjective
+        else:
+            result = _among(part, ((VERB_1, True), (VERB_2, False)))
+            if result is None:
+                result = _among(part, ((NOUN, False),))
+            if result is not None:
+                part = result
+
+    # Шаг 2
+    if part.endswith('и'):
+        part = part[:-1]
+
+    # Шаг 3: словообразовательные окончания только в R2
+    result = _among(part, ((DERIVATIONAL, False),))
+    if result is not None and rv + len(result) >= r2:
+        part = result
+
+    # Шаг 4
+    result = _among(part, ((SUPERLATIVE, False),))
+    if result is not None:
+        part = result
+        if part.endswith('нн'):
+            part = part[:-1]
+    elif part.endswith('нн'):
+        part = part[:-1]
+    elif part.endswith('ь'):
+        part = part[:-1]
+
+    return prefix + part
@@ -0,0 +1,39 @@
+# Потоковый рендеринг больших страниц.
+# render_page() вместо render_template() отдаёт страницу по частям через
+# stream_template: всё до </head> уходит первым куском, и браузер начинает
+# загружать стили и шрифты, пока рендерится остальная страница. Дальше
+# вывод Jinja собирается в куски не меньше STREAM_CHUNK_SIZE. Ошибку
+# посреди страницы уже не превратить в 500, поэтому данные для шаблона
+# view готовит до вызова render_page. STREAM_TEMPLATES=0 возвращает
+# обычный render_template.
+from flask import current_app, render_template, stream_template
+
+
+HEAD_END = '</head>'
+
+
+def render_page(template_name, **context):
+    config = current_app.config
+    if not config.get('STREAM_TEMPLATES', True):
+        return render_template(template_name, **context)
+    chunks = _chunked(stream_template(template_name, **context),
+                      config.get('STREAM_CHUNK_SIZE', 8192))
+    return current_app.response_class(chunks, mimetype='text/html')
+
+
+def _chunked(stream, size):
+    buffer, length, head_sent = [], 0, False
+    try:
+        for part in stream:
+            buffer.append(part)
+            length += len(part)
+            if length >= size or (not head_sent and HEAD_END in part):
+                head_sent = True
+                yield ''.join(buffer)
+                buffer, length = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
@@ -0,0 +1,300 @@
+# Фоновые задачи: обработка загрузок, удаление осиротевших файлов,
+# уведомления о заказах.
+# Очередь хранится в отдельной SQLite-базе (WAL), поэтому задачи
+# переживают перезапуск воркеров и не зависят от основной СУБД. Задачи
+# выполняет пул потоков в каждом воркере gunicorn (запускается в post_fork,
+# см. gunicorn.conf.py; под `flask run` - при первой постановке задачи из
+# запроса), либо отдельный процесс `flask tasks worker` - он нужен при
+# TASK_WORKERS=0. Команды CLI только ставят задачи в очередь. Пока задача
+# выполняется, её блокировка продлевается, поэтому долгую задачу не
+# подхватит другой воркер. Тяжёлая работа с изображениями уходит в пул
+# процессов ImagePipeline. Упавшие задачи повторяются с экспоненциальной
+# задержкой до TASK_MAX_ATTEMPTS раз.
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+import click
+from flask import current_app, has_request_context
+from flask.cli import with_appcontext
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS task (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_task_status_run_at ON task (status, run_at);
+'''
+
+
+class TaskQueue:
+    def __init__(self, app=None):
+        self.registry = {}
+        self.app = None
+        self._threads = []
+        self._pid = None
+        self._wakeup = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.eager = app.config.get('TASKS_EAGER', False)
+        self.workers = app.config.get('TASK_WORKERS', 2)
+        self.max_attempts = app.config.get('TASK_MAX_ATTEMPTS', 5)
+        self.retry_delay = app.config.get('TASK_RETRY_DELAY', 10)
+        self.lock_timeout = app.config.get('TASK_LOCK_TIMEOUT', 300)
+        self.path = app.config.get('TASK_DATABASE') or os.path.join(
+            app.instance_path, 'tasks.db')
+        app.extensions['tasks'] = self
+        app.cli.add_command(tasks_cli)
+
+    def task(self, name):
+        def decorator(func):
+            self.registry[name] = func
+            return func
+        return decorator
+
+    # Хранилище
+
+    def _connection(self):
+        # Соединение на поток и на процесс: sqlite3 нельзя делить после fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def enqueue(self, name, delay=0, **payload):
+        if name not in self.registry:
+            raise KeyError(f'Неизвестная задача: {name}')
+        if self.eager:
+            self._call(name, payload)
+            return None
+        now = time.time()
+        cursor = self._connection().execute(
+            'INSERT INTO task (name, payload, run_at, created_at) '
+            'VALUES (?, ?, ?, ?)',
+            (name, json.dumps(payload, ensure_ascii=False), now + delay, now))
+        # Из CLI потоки не запускаем: процесс завершится раньше задач
+        if has_request_context():
+            self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return cursor.lastrowid
+
+    def _claim(self):
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Задачи "running" с истёкшей блокировкой - от упавшего воркера
+            row = conn.execute(
+                "SELECT id, name, payload, attempts FROM task "
+                "WHERE (status = 'pending' AND run_at <= ?) "
+                "OR (status = 'running' AND locked_until < ?) "
+                "ORDER BY run_at, id LIMIT 1", (now, now)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE task SET status = 'running', attempts = attempts + 1, "
+                    "locked_until = ? WHERE id = ?",
+                    (now + self.lock_timeout, row['id']))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _finish(self, row, error=None):
+        conn = self._connection()
+        if error is None:
+            conn.execute('DELETE FROM task WHERE id = ?', (row['id'],))
+            return
+        attempts = row['attempts'] + 1
+        if attempts >= self.max_attempts:
+            conn.execute("UPDATE task SET status = 'failed', last_error = ?, "
+                         "locked_until = NULL WHERE id = ?", (error, row['id']))
+            logger.error('Задача %s #%d не выполнена после %d попыток: %s',
+                         row['name'], row['id'], attempts, error)
+            return
+        conn.execute("UPDATE task SET status = 'pending', last_error = ?, "
+                     "locked_until = NULL, run_at = ? WHERE id = ?",
+                     (error, time.time() + self.retry_delay * 2 ** (attempts - 1),
+                      row['id']))
+
+    # Выполнение
+
+    def _call(self, name, payload):
+        with self.app.app_context():
+            self.registry[name](**payload)
+
+    def _extend_lock(self, task_id, stop):
+        # Продлеваем блокировку, пока задача выполняется
+        while not stop.wait(self.lock_timeout / 3):
+            try:
+                self._connection().execute(
+                    "UPDATE task SET locked_until = ? "
+                    "WHERE id = ? AND status = 'running'",
+                    (time.time() + self.lock_timeout, task_id))
+            except sqlite3.Error:
+                logger.exception('Не удалось продлить блокировку задачи #%d',
+                                 task_id)
+
+    def run_one(self):
+        row = self._claim()
+        if row is None:
+            return False
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._extend_lock,
+                                     args=(row['id'], stop), daemon=True,
+                                     name=f'task-lock-{row["id"]}')
+        heartbeat.start()
+        try:
+            self._call(row['name'], json.loads(row['payload']))
+        except Exception:
+            error = traceback.format_exc(limit=5)
+            logger.warning('Задача %s #%d упала', row['name'], row['id'],
+                           exc_info=True)
+        else:
+            error = None
+        finally:
+            stop.set()
+            heartbeat.join()
+        self._finish(row, error)
+        return True
+
+    def _next_run_in(self):
+        row = self._connection().execute(
+            "SELECT min(run_at) FROM task WHERE status = 'pending'").fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def work(self, poll_interval=5.0, stop=None):
+        while stop is None or not stop.is_set():
+            try:
+                if self.run_one():
+                    continue
+                timeout = self._next_run_in()
+            except sqlite3.Error:
+                logger.exception('Ошибка очереди задач')
+                timeout = None
+            # Ждём новую задачу, ближайший повтор или опрос других процессов
+            timeout = poll_interval if timeout is None else min(timeout, poll_interval)
+            with self._wakeup:
+                self._wakeup.wait(timeout)
+
+    def start(self):
+        if not self.workers or (self._pid == os.getpid() and self._threads):
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            # Потоки не переживают fork: в новом процессе запускаем заново
+            self._pid = os.getpid()
+            self._threads = []
+            for number in range(self.workers):
+                thread = threading.Thread(target=self.work, daemon=True,
+                                          name=f'task-worker-{number}')
+                thread.start()
+                self._threads.append(thread)
+
+    def stats(self):
+        rows = self._connection().execute(
+            'SELECT status, count(*) FROM task GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+    def retry_failed(self):
+        cursor = self._connection().execute(
+            "UPDATE task SET status = 'pending', attempts = 0, run_at = ? "
+            "WHERE status = 'failed'", (time.time(),))
+        return cursor.rowcount
+
+
+tasks = TaskQueue()
+
+
+@tasks.task('process_upload')
+def process_upload(filepath, filename):
+    # Варианты считаются в пуле процессов; ждём результат, чтобы ошибка
+    # привела к повтору задачи
+    from .images import images
+    future = images.submit_upload(filepath, filename)
+    if future is not None:
+        future.result()
+
+
+@tasks.task('delete_upload')
+def delete_upload(filename):
+    from .images import images
+    from .uploads import reference_counts
+    # Одно содержимое - один файл: он может быть нужен другой записи
+    if reference_counts()[filename]:
+        return
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    if os.path.exists(path):
+        os.remove(path)
+    images.remove(f'uploads/{filename}')
+
+
+@tasks.task('notify_order')
+def notify_order(order_id):
+    from .notifications import notify_order as send
+    send(order_id)
+
+
+@click.group('tasks')
+def tasks_cli():
+    """Фоновые задачи."""
+
+
+@tasks_cli.command('worker')
+@click.option('--once', is_flag=True, help='Выполнить готовые задачи и выйти.')
+@with_appcontext
+def worker_command(once):
+    """Выполняет задачи из очереди в текущем процессе."""
+    if once:
+        count = 0
+        while tasks.run_one():
+            count += 1
+        click.echo(f'Выполнено задач: {count}')
+        return
+    click.echo(f'Очередь задач: {tasks.path}')
+    tasks.work()
+
+
+@tasks_cli.command('status')
+@with_appcontext
+def status_command():
+    """Число задач по статусам."""
+    for status, count in sorted(tasks.stats().items()):
+        click.echo(f'{status}: {count}')
+
+
+@tasks_cli.command('retry-failed')
+@with_appcontext
+def retry_failed_command():
+    """Возвращает упавшие задачи в очередь."""
+    click.echo(f'Возвращено задач: {tasks.retry_failed()}')
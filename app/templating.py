@@ -0,0 +1,115 @@
+# Ускорение рендеринга шаблонов.
+# Байткод скомпилированных шаблонов хранится в TEMPLATE_BYTECODE_CACHE_DIR
+# (по умолчанию instance/jinja-cache) и общий для всех воркеров и
+# перезапусков; ключ включает контрольную сумму исходника, поэтому после
+# деплоя устаревший байткод не используется. `flask templates compile`
+# заполняет кэш заранее.
+# Тег {% cache key, ... %}...{% endcache %} кэширует готовый HTML
+# фрагмента в памяти воркера; к ключу добавляется версия контента (общая
+# для воркеров при CACHE_BACKEND=file), так что после сохранения в админке
+# фрагменты строятся заново, а TEMPLATE_FRAGMENT_TTL ограничивает срок
+# жизни остальных. Части ключа должны зависеть от данных, а не от
+# параметров запроса: иначе каждый новый query string - новая запись.
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from .cache import LRUStore, cache, content_changed
+
+
+class SharedBytecodeCache(FileSystemBytecodeCache):
+    # Каталог создаётся при первой записи, а не в create_app
+    def __init__(self, directory):
+        super().__init__(directory, pattern='__jinja2_%s.cache')
+        self._ready = False
+
+    def dump_bytecode(self, bucket):
+        if not self._ready:
+            os.makedirs(self.directory, exist_ok=True)
+            self._ready = True
+        super().dump_bytecode(bucket)
+
+
+class FragmentCache:
+    # Ключи длиннее не кэшируются: это почти наверняка ввод пользователя
+    max_key_length = 512
+
+    def __init__(self, max_entries=512, ttl=None):
+        self.enabled = True
+        self.store = LRUStore(max_entries, ttl)
+
+    def render(self, parts, caller):
+        if not self.enabled or current_app.debug:
+            return caller()
+        parts = repr(parts)
+        if len(parts) > self.max_key_length:
+            return caller()
+        key = (cache.current_version, parts)
+        html = self.store.get(key)
+        if html is None:
+            html = caller()
+            self.store.set(key, html)
+        return html
+
+    def clear(self, *args, **kwargs):
+        self.store.clear()
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        fragments = self.environment.fragment_cache
+        if fragments is None:
+            return caller()
+        return fragments.render(parts, caller)
+
+
+def init_app(app):
+    config = app.config
+    directory = config.get('TEMPLATE_BYTECODE_CACHE_DIR') or os.path.join(
+        app.instance_path, 'jinja-cache')
+    if config.get('TEMPLATE_BYTECODE_CACHE', True):
+        app.jinja_env.bytecode_cache = SharedBytecodeCache(directory)
+
+    fragments = FragmentCache(config.get('TEMPLATE_FRAGMENT_MAX_ENTRIES', 512),
+                              config.get('TEMPLATE_FRAGMENT_TTL', 300))
+    fragments.enabled = config.get('TEMPLATE_FRAGMENT_CACHE', True)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = fragments
+    content_changed.connect(fragments.clear, weak=False)
+    app.extensions['fragment_cache'] = fragments
+    app.cli.add_command(templates_cli)
+
+
+@click.group('templates')
+def templates_cli():
+    """Кэш шаблонов."""
+
+
+@templates_cli.command('compile')
+@with_appcontext
+def compile_command():
+    """Компилирует все шаблоны в кэш байткода."""
+    env = current_app.jinja_env
+    names = env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        env.get_template(name)
+    click.echo(f'Скомпилировано шаблонов: {len(names)}')
@@ -0,0 +1,203 @@
+# Загрузки с адресацией по содержимому.
+# Файл пишется на диск потоком, попутно считается sha256; имя файла -
+# <первые 32 символа хеша>.<расширение>. Повторная загрузка тех же байтов
+# не занимает места, а содержимое по URL никогда не меняется, поэтому
+# serve_static отдаёт такие файлы с Cache-Control: immutable.
+# Ссылки на файлы хранятся в Solution.image_path, AboutContent.image_path
+# и PortfolioItem.images; счётчики ссылок считаются по БД
+# (reference_counts). `flask uploads gc` удаляет файлы без ссылок старше
+# UPLOAD_GC_GRACE секунд - запас на загрузку, ещё не сохранённую в БД.
+# Принимаются только расширения из ALLOWED_EXTENSIONS.
+# `flask uploads dedupe` переводит старые файлы вида uuid_имя на новые имена.
+import hashlib
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+
+import click
+from flask.cli import with_appcontext
+from werkzeug.utils import secure_filename
+
+from .images import images
+
+
+HASH_LENGTH = 32
+CHUNK_SIZE = 64 * 1024
+TMP_PREFIX = '.upload-'
+_NAME_RE = re.compile(r'^[0-9a-f]{%d}\.[a-z0-9]+$' % HASH_LENGTH)
+_EXTENSION_RE = re.compile(r'^[a-z0-9]{1,10}$')
+
+
+def _extension(filename):
+    name = secure_filename(filename or '')
+    extension = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+    return extension if _EXTENSION_RE.match(extension) else 'bin'
+
+
+class UploadError(ValueError):
+    pass
+
+
+def is_content_addressed(name):
+    return bool(_NAME_RE.match(name))
+
+
+class UploadStore:
+    def __init__(self, app=None):
+        self.folder = None
+        self.static_prefix = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.folder = app.config['UPLOAD_FOLDER']
+        self.grace = app.config.get('UPLOAD_GC_GRACE', 3600)
+        self.allowed_extensions = set(app.config.get('ALLOWED_EXTENSIONS', ()))
+        relpath = os.path.relpath(self.folder, app.static_folder)
+        # Префикс загрузок в URL static, если они лежат внутри static
+        self.static_prefix = None if relpath.startswith('..') \
+            else relpath.replace(os.sep, '/') + '/'
+        app.cli.add_command(uploads_cli)
+        app.extensions['uploads'] = self
+
+    def allowed(self, filename):
+        return _extension(filename) in self.allowed_extensions
+
+    def save(self, stream, filename):
+        """Сохраняет поток или FileStorage; -> (имя в UPLOAD_FOLDER, новый ли файл)."""
+        if not self.allowed(filename):
+            raise UploadError(f'Недопустимый тип файла: {filename}')
+        source = getattr(stream, 'stream', stream)
+        os.makedirs(self.folder, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+            name = f'{digest.hexdigest()[:HASH_LENGTH]}.{_extension(filename)}'
+            target = os.path.join(self.folder, name)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+                # Новая ссылка появится после коммита: отодвигаем gc
+                os.utime(target)
+                return name, False
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+            return name, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def is_immutable(self, static_filename):
+        # static_filename - путь относительно static, как в url_for
+        if self.static_prefix is None or not static_filename.startswith(self.static_prefix):
+            return False
+        return is_content_addressed(static_filename[len(self.static_prefix):])
+
+    def collect_garbage(self, dry_run=False):
+        """Удаляет файлы без ссылок; -> [(имя, размер)]."""
+        counts = reference_counts()
+        deadline = time.time() - self.grace
+        removed = []
+        if not os.path.isdir(self.folder):
+            return removed
+        for entry in os.scandir(self.folder):
+            if not entry.is_file() or counts[entry.name]:
+                continue
+            stat = entry.stat()
+            if stat.st_mtime > deadline:
+                continue
+            removed.append((entry.name, stat.st_size))
+            if not dry_run:
+                os.remove(entry.path)
+                images.remove(f'uploads/{entry.name}')
+        return removed
+
+
+uploads = UploadStore()
+
+
+def reference_counts():
+    """Counter: имя файла -> сколько записей каталога на него ссылается."""
+    from . import db
+    from .models import AboutContent, PortfolioItem, Solution
+    counts = Counter()
+    for model in (Solution, AboutContent):
+        counts.update(name for (name,) in db.session.query(model.image_path)
+                      .filter(model.image_path.isnot(None)) if name)
+    for (names,) in db.session.query(PortfolioItem.images):
+        counts.update(name for name in names or () if name)
+    return counts
+
+
+@click.group('uploads')
+def uploads_cli():
+    """Загруженные файлы."""
+
+
+@uploads_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='Только показать, что будет удалено.')
+@with_appcontext
+def gc_command(dry_run):
+    """Удаляет файлы, на которые не ссылается ни одна запись."""
+    removed = uploads.collect_garbage(dry_run=dry_run)
+    for name, size in removed:
+        click.echo(f'{name} ({size} Б)')
+    total = sum(size for _, size in removed)
+    verb = 'Будет удалено' if dry_run else 'Удалено'
+    click.echo(f'{verb} файлов: {len(removed)}, {total / 1024 / 1024:.1f} МБ')
+
+
+@uploads_cli.command('dedupe')
+@with_appcontext
+def dedupe_command():
+    """Переименовывает старые загрузки по хешу и обновляет ссылки в БД."""
+    from . import db
+    from .cache import cache
+    from .models import AboutContent, PortfolioItem, Solution
+    from .tasks import tasks
+
+    renamed, created = {}, []
+    for name in reference_counts():
+        path = uploads.path(name)
+        if is_content_addressed(name) or not os.path.isfile(path):
+            continue
+        try:
+            with open(path, 'rb') as f:
+                new_name, new = uploads.save(f, name)
+        except UploadError as exc:
+            click.echo(f'Пропущен: {exc}', err=True)
+            continue
+        renamed[name] = new_name
+        if new:
+            created.append(new_name)
+    if not renamed:
+        click.echo('Все загрузки уже адресованы по содержимому.')
+        return
+
+    for model in (Solution, AboutContent):
+        for record in model.query.filter(model.image_path.in_(list(renamed))):
+            record.image_path = renamed[record.image_path]
+    for item in PortfolioItem.query:
+        names = [renamed.get(name, name) for name in item.images or []]
+        if names != (item.images or []):
+            item.images = names
+    db.session.commit()
+    # Отсчёт UPLOAD_GC_GRACE для старых копий - с момента переименования
+    for name in renamed:
+        os.utime(uploads.path(name))
+
+    for name in created:
+        tasks.enqueue('process_upload', filepath=uploads.path(name), filename=name)
+    cache.bump()
+    click.echo(f'Переименовано ссылок на файлы: {len(renamed)}, новых файлов: '
+               f'{len(created)}. Старые копии удалит `flask uploads gc` '
+               f'через UPLOAD_GC_GRACE секунд.')
@@ -0,0 +1,310 @@
+# Бенчмарк маршрутов main_bp, api и /panel на синтетическом каталоге.
+#
+#   python benchmarks/run.py --scale 100 --scale 10000 -o bench.json
+#   python benchmarks/run.py --scale 10000 --baseline bench.json
+#
+# Для каждого endpoint считаются p50/p95 задержки, пропускная способность,
+# число SQL-запросов на запрос и пиковая память (tracemalloc) - отдельно
+# для промаха (перед каждым запросом версия контента сдвигается, кэши
+# каталога, страниц, фрагментов и API пусты) и для попадания в кэш; с
+# --no-cache кэши выключены и замеряется только промах. С --baseline
+# результаты сравниваются с сохранёнными, код возврата 1 при регрессии.
+# Лимитер, аналитика и фоновые задачи выключены, всё, что приложение
+# пишет на диск, остаётся во временном каталоге.
+import argparse
+import http.cookiejar
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+
+from flask import url_for
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ADMIN_USERNAME = 'bench'
+ADMIN_PASSWORD = 'bench-password'
+SEED_BATCH = 5000
+SKIP_ENDPOINTS = {'admin.logout', 'admin.login', 'static'}
+# Параметры запроса, без которых endpoint отвечает ошибкой
+QUERY_ARGS = {'api.search': {'q': 'решение'}}
+
+
+def build_app(tmp, use_cache):
+    from app import create_app
+
+    # Настройки передаются в create_app: расширения читают их в init_app
+    return create_app({
+        'SECRET_KEY': 'bench',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        'ANALYTICS_ENABLED': False,
+        'TASK_WORKERS': 0,
+        'IMAGE_VARIANTS_ENABLED': False,
+        'UPLOAD_FOLDER': os.path.join(tmp, 'uploads'),
+        'SITEMAP_BASE_URL': 'https://bench.example',
+        'CACHE_BACKEND': 'file',
+        'CACHE_ENABLED': use_cache,
+        'PAGE_CACHE_ENABLED': use_cache,
+        'TEMPLATE_FRAGMENT_CACHE': use_cache,
+    }, instance_path=os.path.join(tmp, 'instance'))
+
+
+def seed(app, scale):
+    from app import db
+    from app.models import Solution, PortfolioItem, AboutContent, ContactInfo, Admin
+    from app.sitemap import sync_entries, write_sitemap
+    from app.search import search
+
+    with app.app_context():
+        db.create_all()
+        for start in range(0, scale, SEED_BATCH):
+            stop = min(start + SEED_BATCH, scale)
+            db.session.execute(db.insert(Solution), [
+                {'name': f'Решение {i}', 'slug': f'solution-{i}',
+                 'description': 'Синтетическое описание решения. ' * 5,
+                 'price': 10000 + i, 'delivery_days': 7 + i % 30,
+                 'is_new': i % 7 == 0, 'is_popular': i % 5 == 0,
+                 'category': 'package' if i % 3 else 'module'}
+                for i in range(start, stop)])
+            db.session.execute(db.insert(PortfolioItem), [
+                {'title': f'Проект {i}', 'slug': f'project-{i}',
+                 'category': f'category-{i % 10}', 'package': 'Бизнес',
+                 'duration': '14 дней', 'geo': 'Санкт-Петербург',
+                 'images': [], 'features': ['Адаптивная вёрстка', 'SEO'],
+                 'testimonial': 'Отличная работа', 'client': f'Клиент {i}',
+                 'live_url': f'https://example.com/{i}'}
+                for i in range(start, stop)])
+        for section in ('biography', 'philosophy', 'tools'):
+            db.session.add(AboutContent(section=section, content=section * 50))
+        db.session.add(ContactInfo(email='bench@example.com', phone='+7 000',
+                                   address='СПб', telegram='@bench'))
+        admin = Admin(username=ADMIN_USERNAME)
+        admin.set_password(ADMIN_PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+        sync_entries()
+        write_sitemap(app)
+        search.rebuild()
+
+
+def collect_urls(app, scale):
+    # URL для каждого GET-маршрута main, api и admin
+    middle = scale // 2
+    values = {'package_slug': f'solution-{middle}', 'slug': f'project-{middle}',
+              'project_id': middle + 1, 'number': 1}
+    urls = {}
+    with app.test_request_context():
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint in SKIP_ENDPOINTS or 'GET' not in rule.methods:
+                continue
+            if not rule.endpoint.startswith(('main.', 'api.', 'admin.')):
+                continue
+            if any(arg not in values for arg in rule.arguments):
+                continue
+            urls[rule.endpoint] = url_for(
+                rule.endpoint, **{arg: values[arg] for arg in rule.arguments},
+                **QUERY_ARGS.get(rule.endpoint, {}))
+    return urls
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _client_fetch(app):
+    client = app.test_client()
+    client.post('/panel/login', data={'username': ADMIN_USERNAME,
+                                      'password': ADMIN_PASSWORD})
+
+    def fetch(url):
+        response = client.get(url)
+        response.get_data()
+        return response.status_code
+
+    return fetch, lambda: None
+
+
+def _server_fetch(app):
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    # Сессия администратора через cookie
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    opener.open(base + '/panel/login', data=urlencode(
+        {'username': ADMIN_USERNAME, 'password': ADMIN_PASSWORD}).encode())
+
+    def fetch(url):
+        try:
+            with opener.open(base + url) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    return fetch, server.shutdown
+
+
+def _measure(fetch, url, requests, counter, before=None):
+    statuses = set()
+    timings = []
+    queries = 0
+    for _ in range(requests):
+        if before is not None:
+            before()
+        counter.count = 0
+        request_started = time.perf_counter()
+        statuses.add(fetch(url))
+        timings.append(time.perf_counter() - request_started)
+        queries += counter.count
+
+    if before is not None:
+        before()
+    tracemalloc.start()
+    fetch(url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'status': sorted(statuses),
+        'p50_ms': round(_percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(_percentile(timings, 95) * 1000, 3),
+        'mean_ms': round(statistics.mean(timings) * 1000, 3),
+        'rps': round(requests / sum(timings), 1),
+        'queries': round(queries / requests, 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_scale(scale, requests, warmup, mode, use_cache):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(tmp, use_cache)
+        started = time.perf_counter()
+        seed(app, scale)
+        seed_seconds = time.perf_counter() - started
+
+        from app import db
+        from app.cache import cache
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+        fetch, stop = (_server_fetch if mode == 'wsgi' else _client_fetch)(app)
+
+        def invalidate():
+            # Новая версия контента без сигнала content_changed: кэши
+            # становятся недостижимы, а sitemap и поиск не пересобираются
+            cache.version.bump()
+
+        results = {}
+        try:
+            for endpoint, url in sorted(collect_urls(app, scale).items()):
+                for _ in range(warmup):
+                    fetch(url)
+                results[endpoint] = {
+                    'url': url,
+                    'miss': _measure(fetch, url, requests, counter,
+                                     invalidate if use_cache else None),
+                    'hit': _measure(fetch, url, requests, counter)
+                    if use_cache else None,
+                }
+        finally:
+            stop()
+            with app.app_context():
+                db.engine.dispose()
+    return {'seed_seconds': round(seed_seconds, 2), 'endpoints': results}
+
+
+def compare(current, baseline, threshold):
+    # Регрессия: p95 или число запросов выросли больше порога; промахи и
+    # попадания сравниваются отдельно
+    regressions = []
+    for scale, data in current['scales'].items():
+        base_data = baseline.get('scales', {}).get(scale)
+        if not base_data:
+            continue
+        for endpoint, result in data['endpoints'].items():
+            base_result = base_data['endpoints'].get(endpoint)
+            if not base_result:
+                continue
+            for kind in ('miss', 'hit'):
+                stats, base = result.get(kind), base_result.get(kind)
+                if not stats or not base:
+                    continue
+                name = f'{scale} {endpoint} ({kind})'
+                if base['p95_ms'] and stats['p95_ms'] > base['p95_ms'] * (1 + threshold):
+                    regressions.append(f"{name}: p95 {base['p95_ms']} -> "
+                                       f"{stats['p95_ms']} мс")
+                if stats['queries'] > base['queries']:
+                    regressions.append(f"{name}: SQL {base['queries']} -> "
+                                       f"{stats['queries']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк маршрутов на синтетическом каталоге.')
+    parser.add_argument('--scale', type=int, action='append',
+                        help='Размер каталога (можно несколько раз); '
+                             'по умолчанию 100, 10000 и 100000.')
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Запросов на endpoint.')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--mode', choices=('client', 'wsgi'), default='client',
+                        help='client - test_client, wsgi - локальный сервер.')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Отключить кэш каталога и страниц.')
+    parser.add_argument('--output', '-o', help='Файл для JSON-результатов.')
+    parser.add_argument('--baseline', help='JSON с базовыми результатами.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Допустимый рост p95 относительно базы (0.2 = 20%%).')
+    args = parser.parse_args(argv)
+
+    report = {'mode': args.mode, 'requests': args.requests,
+              'cache': not args.no_cache, 'scales': {}}
+    for scale in args.scale or [100, 10000, 100000]:
+        print(f'Каталог {scale} строк...', file=sys.stderr)
+        report['scales'][str(scale)] = run_scale(
+            scale, args.requests, args.warmup, args.mode, not args.no_cache)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f'РЕГРЕССИЯ {line}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
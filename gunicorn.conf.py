@@ -0,0 +1,47 @@
+# Конфигурация gunicorn: gunicorn -c gunicorn.conf.py main:app
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5001')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Приложение импортируется один раз в мастере, воркеры получают его через
+# fork и разделяют память (copy-on-write)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def on_starting(server):
+    # Версия кэша в памяти у каждого воркера своя: правка в админке сбросила
+    # бы кэш только в одном из них, остальные отдавали бы старые страницы
+    from app.config import Config
+    if server.cfg.workers > 1 and Config.CACHE_BACKEND == 'local':
+        raise RuntimeError('CACHE_BACKEND=local допустим только с одним '
+                           'воркером gunicorn; используйте CACHE_BACKEND=file')
+
+
+def when_ready(server):
+    # Объекты, созданные при импорте, больше не трогает сборщик мусора,
+    # поэтому их страницы памяти не копируются в воркеры
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Соединения с БД нельзя делить между процессами
+    from app import db
+    from app.tasks import tasks
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    # Потоки очереди задач запускаются в каждом воркере сразу, а не при
+    # первой постановке задачи: иначе задачи из CLI и отложенные повторы
+    # ждали бы ближайшего заказа. При TASK_WORKERS=0 нужен отдельный
+    # процесс `flask tasks worker`.
+    tasks.start()
+
+
+def worker_exit(server, worker):
+    # Несохранённые просмотры страниц пишутся в БД до выхода воркера
+    from app.analytics import analytics
+    analytics.flush()
@@ -0,0 +1,83 @@
+"""initial schema: admin, about, contacts, solutions and portfolio
+
+Revision ID: 0c6d2e9a4b17
+Revises: 
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c6d2e9a4b17'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'admin',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('password_hash', sa.String(length=256), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username'),
+    )
+    op.create_table(
+        'about_content',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=50), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('image_path', sa.String(length=300), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'contact_info',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=True),
+        sa.Column('phone', sa.String(length=50), nullable=True),
+        sa.Column('address', sa.Text(), nullable=True),
+        sa.Column('telegram', sa.String(length=100), nullable=True),
+        sa.Column('github', sa.String(length=200), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'solution',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('slug', sa.String(length=200), nullable=True),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('image_path', sa.String(length=300), nullable=True),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.Column('delivery_days', sa.Integer(), nullable=False),
+        sa.Column('is_new', sa.Boolean(), nullable=False),
+        sa.Column('is_popular', sa.Boolean(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'portfolio_item',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('slug', sa.String(length=200), nullable=True),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('package', sa.String(length=100), nullable=True),
+        sa.Column('duration', sa.String(length=50), nullable=True),
+        sa.Column('geo', sa.String(length=100), nullable=True),
+        sa.Column('images', sa.JSON(), nullable=False),
+        sa.Column('features', sa.JSON(), nullable=False),
+        sa.Column('testimonial', sa.Text(), nullable=True),
+        sa.Column('client', sa.String(length=200), nullable=True),
+        sa.Column('live_url', sa.String(length=300), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade():
+    op.drop_table('portfolio_item')
+    op.drop_table('solution')
+    op.drop_table('contact_info')
+    op.drop_table('about_content')
+    op.drop_table('admin')
@@ -0,0 +1,33 @@
+"""catalog indexes on slug, category and section
+
+Revision ID: 3f1c2a7b9d10
+Revises: 0c6d2e9a4b17
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9d10'
+down_revision = '0c6d2e9a4b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Индексы для выборок по slug / category / section
+    op.create_index('ix_solution_slug', 'solution', ['slug'], unique=True)
+    op.create_index('ix_solution_category', 'solution', ['category'])
+    op.create_index('ix_portfolio_item_slug', 'portfolio_item', ['slug'],
+                    unique=True)
+    op.create_index('ix_about_content_section', 'about_content', ['section'],
+                    unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_about_content_section', table_name='about_content')
+    op.drop_index('ix_portfolio_item_slug', table_name='portfolio_item')
+    op.drop_index('ix_solution_category', table_name='solution')
+    op.drop_index('ix_solution_slug', table_name='solution')
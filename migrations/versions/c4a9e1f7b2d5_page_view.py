@@ -0,0 +1,33 @@
+"""page_view table for buffered analytics
+
+Revision ID: c4a9e1f7b2d5
+Revises: 8b2e4d6f1a30
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e1f7b2d5'
+down_revision = '8b2e4d6f1a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'page_view',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('endpoint', sa.String(length=100), nullable=False),
+        sa.Column('slug', sa.String(length=200), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'endpoint', 'slug'),
+    )
+
+
+def downgrade():
+    op.drop_table('page_view')
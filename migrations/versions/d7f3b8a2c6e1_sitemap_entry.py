@@ -0,0 +1,34 @@
+"""sitemap_entry table for the precomputed sitemap
+
+Revision ID: d7f3b8a2c6e1
+Revises: c4a9e1f7b2d5
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7f3b8a2c6e1'
+down_revision = 'c4a9e1f7b2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sitemap_entry',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('slug', sa.String(length=200), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=True),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'slug'),
+    )
+
+
+def downgrade():
+    op.drop_table('sitemap_entry')
@@ -0,0 +1,29 @@
+"""portfolio_item image_alt and summary for portfolio cards
+
+Revision ID: e2a5c9d4f7b3
+Revises: d7f3b8a2c6e1
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a5c9d4f7b3'
+down_revision = 'd7f3b8a2c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('portfolio_item',
+                  sa.Column('image_alt', sa.String(length=300), nullable=True))
+    op.add_column('portfolio_item',
+                  sa.Column('summary', sa.String(length=300), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('portfolio_item') as batch_op:
+        batch_op.drop_column('summary')
+        batch_op.drop_column('image_alt')
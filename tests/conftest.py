@@ -0,0 +1,99 @@
+import pytest
+
+from app import create_app, db as _db
+
+
+ADMIN_PASSWORD = 'admin-password'
+
+
+@pytest.fixture
+def config(tmp_path):
+    # Всё, что приложение пишет на диск, - во временном каталоге теста
+    return {
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "app.db"}',
+        'WTF_CSRF_ENABLED': False,
+        'RATELIMIT_ENABLED': False,
+        'TASKS_EAGER': True,
+        'ANALYTICS_ENABLED': False,
+        'TEMPLATE_BYTECODE_CACHE': False,
+        'IMAGE_VARIANTS_ENABLED': False,
+        'SITEMAP_BASE_URL': 'https://example.com',
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+    }
+
+
+@pytest.fixture
+def app(config, tmp_path):
+    app = create_app(config, instance_path=str(tmp_path / 'instance'))
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        for engine in _db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(app, db):
+    from app.models import Admin
+    admin = Admin(username='admin')
+    admin.set_password(ADMIN_PASSWORD)
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    response = client.post('/panel/login', data={'username': 'admin',
+                                                 'password': ADMIN_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def make_solution(db):
+    from app.models import Solution
+
+    def make(**values):
+        number = Solution.query.count() + 1
+        values.setdefault('name', f'Решение {number}')
+        values.setdefault('slug', f'solution-{number}')
+        values.setdefault('description', 'Сайт под ключ. Подробности внутри.')
+        values.setdefault('price', 10000)
+        values.setdefault('category', 'package')
+        solution = Solution(**values)
+        db.session.add(solution)
+        db.session.commit()
+        return solution
+
+    return make
+
+
+@pytest.fixture
+def make_project(db):
+    from app.models import PortfolioItem
+
+    def make(**values):
+        number = PortfolioItem.query.count() + 1
+        values.setdefault('title', f'Проект {number}')
+        values.setdefault('slug', f'project-{number}')
+        values.setdefault('category', 'kofeynya')
+        values.setdefault('package', 'Кофейня-Бистро')
+        values.setdefault('duration', '14 дней')
+        values.setdefault('geo', 'Санкт-Петербург')
+        values.setdefault('features', ['Онлайн-меню', 'Бронирование'])
+        item = PortfolioItem(**values)
+        db.session.add(item)
+        db.session.commit()
+        return item
+
+    return make
@@ -0,0 +1,40 @@
+import pytest
+
+from app.analytics import analytics, daily_views
+
+
+@pytest.fixture
+def config(config):
+    config['ANALYTICS_ENABLED'] = True
+    # Фоновый поток не должен успеть сбросить буфер во время теста
+    config['ANALYTICS_FLUSH_INTERVAL'] = 3600
+    return config
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer(app):
+    analytics.flush()
+    yield
+    analytics.flush()
+
+
+def test_public_views_are_buffered(client):
+    client.get('/kontakty')
+    assert analytics.pending() == 1
+    assert daily_views(1)[-1][1] == 0
+
+    assert analytics.flush() == 1
+    assert daily_views(1)[-1][1] == 1
+
+
+def test_dashboard_reads_db_without_flushing(admin_client):
+    analytics.record('main.index')
+    analytics.flush()
+    analytics.record('main.index')
+
+    response = admin_client.get('/panel/')
+
+    assert response.status_code == 200
+    # Буфер воркера не тронут: дашборд показывает только записанное в БД
+    assert analytics.pending() == 1
+    assert daily_views(1)[-1][1] == 1
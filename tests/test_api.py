@@ -0,0 +1,87 @@
+import os
+from email.utils import parsedate_to_datetime
+
+from app.api import responses
+from app.cache import cache, FileVersion
+
+
+def test_projects_cursor_round_trip(client, make_project):
+    for _ in range(5):
+        make_project()
+    first = client.get('/api/projects?limit=2')
+    body = first.get_json()
+    assert [item['id'] for item in body['items']] == [1, 2]
+    assert body['prev'] is None
+    assert 'rel="next"' in first.headers['Link']
+
+    second = client.get(f"/api/projects?limit=2&after={body['next']}").get_json()
+    assert [item['id'] for item in second['items']] == [3, 4]
+    back = client.get(f"/api/projects?limit=2&before={second['prev']}").get_json()
+    assert [item['id'] for item in back['items']] == [1, 2]
+
+
+def test_limit_is_capped_by_page_size_max(app, client, make_solution):
+    app.config['PAGE_SIZE_MAX'] = 3
+    for _ in range(5):
+        make_solution()
+    assert len(client.get('/api/solutions?limit=50').get_json()['items']) == 3
+
+
+def test_bad_cursor_is_json_400(client):
+    response = client.get('/api/projects?after=W3t9XQ')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Некорректный курсор'}
+
+
+def test_unknown_args_share_one_cache_entry(client, make_solution):
+    make_solution()
+    for value in range(10):
+        client.get(f'/api/solutions?utm_source={value}')
+    client.get('/api/solutions?fields=id')
+    assert len(responses) == 2
+
+
+def test_cache_is_bounded(app, client, make_solution):
+    make_solution()
+    for limit in range(1, 300):
+        client.get(f'/api/solutions?limit={limit}')
+    assert len(responses) <= app.config['API_CACHE_MAX_ENTRIES']
+
+
+def test_content_change_invalidates_responses(client, make_solution):
+    make_solution(name='Старое')
+    assert client.get('/api/solutions').get_json()['items'][0]['name'] == 'Старое'
+    make_solution(name='Новое')
+    cache.bump('solution', 'solution-2')
+    assert len(client.get('/api/solutions').get_json()['items']) == 2
+
+
+def test_last_modified_is_shared_version_mtime(client):
+    response = client.get('/api/solutions')
+    other_worker = FileVersion(cache.version.path)
+    expected = int(os.stat(cache.version.path).st_mtime)
+    assert int(response.last_modified.timestamp()) == expected
+    assert int(other_worker.changed_at()) == expected
+
+
+def test_etag_revalidation(client):
+    etag = client.get('/api/solutions').headers['ETag']
+    assert client.get('/api/solutions',
+                      headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_project_returns_card_fields_by_default(client, make_project):
+    make_project(testimonial='Отличная работа')
+    card = client.get('/api/projects/1').get_json()
+    assert sorted(card) == ['category', 'geo', 'id', 'images', 'package',
+                            'slug', 'title']
+
+    full = client.get('/api/projects/1?fields=title,testimonial').get_json()
+    assert full == {'title': card['title'], 'testimonial': 'Отличная работа'}
+
+
+def test_solutions_list_is_an_object_with_cursors(client, make_solution):
+    make_solution()
+    body = client.get('/api/solutions').get_json()
+    assert sorted(body) == ['items', 'next', 'prev']
+    assert body['next'] is None and len(body['items']) == 1
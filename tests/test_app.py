@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from app import create_app
+from app.cache import cache
+from app.models import Admin, Solution
+
+
+PUBLIC_PAGES = ['/', '/resheniya', '/portfolio', '/o-mne', '/kontakty',
+                '/privacy', '/sitemap', '/order',
+                '/blog/kak-vybrat-frilansera-dlya-sajta-v-spb']
+
+
+def test_create_app_applies_overrides(tmp_path):
+    app = create_app({'SECRET_KEY': 'x', 'PAGE_SIZE_MAX': 7},
+                     instance_path=str(tmp_path))
+    assert app.config['PAGE_SIZE_MAX'] == 7
+    assert app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite:///app.db'
+
+
+@pytest.mark.parametrize('url', PUBLIC_PAGES)
+def test_public_pages_render(client, make_solution, make_project, url):
+    make_solution()
+    make_project()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).rstrip().endswith('</html>')
+
+
+def test_privacy_shows_fixed_update_date(client):
+    from app.main_routes import PRIVACY_UPDATED
+    html = client.get('/privacy').get_data(as_text=True)
+    assert PRIVACY_UPDATED.strftime('%d.%m.%Y') in html
+
+
+def test_package_page_falls_back_to_generic_template(client, make_solution):
+    make_solution(slug='individualnyy', name='Индивидуальный')
+    assert 'Индивидуальный' in client.get('/resheniya/individualnyy').get_data(as_text=True)
+    assert client.get('/resheniya/missing').status_code == 404
+
+
+def test_solutions_page_lists_packages_and_modules(client, make_solution):
+    make_solution(name='Сайт для кофейни', category='package')
+    make_solution(name='Онлайн-запись', category='module')
+    html = client.get('/resheniya').get_data(as_text=True)
+    assert 'Решения временно отсутствуют' not in html
+    assert html.index('Сайт для кофейни') < html.index('Онлайн-запись')
+    # Микроразметка перечисляет те же решения
+    assert json.dumps('Онлайн-запись') in html
+
+    make_solution(name='Сайт для салона', category='package')
+    cache.bump('solution')
+    assert 'Сайт для салона' in client.get('/resheniya').get_data(as_text=True)
+
+
+def test_admin_password_is_hashed(db):
+    admin = Admin(username='admin')
+    admin.set_password('secret-password')
+    assert admin.password_hash != 'secret-password'
+    assert admin.check_password('secret-password')
+    assert not admin.check_password('wrong')
+
+
+def test_admin_login_and_pages(admin_client):
+    for url in ('/panel/', '/panel/about', '/panel/contacts',
+                '/panel/solutions', '/panel/portfolio'):
+        assert admin_client.get(url).status_code == 200
+
+
+def test_admin_requires_login(client):
+    response = client.get('/panel/solutions')
+    assert response.status_code == 302
+    assert '/panel/login' in response.headers['Location']
+
+
+def test_short_description_is_first_sentence():
+    solution = Solution(description='Сайт за 14 дней. Поддержка включена.')
+    assert solution.short_description == 'Сайт за 14 дней.'
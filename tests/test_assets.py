@@ -0,0 +1,105 @@
+import gzip
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from flask import url_for
+from flask.cli import ScriptInfo
+
+from app.assets import assets, build_command, AssetManifest
+from app.uploads import uploads
+
+
+CSS = b'body { color: #333; }\n' * 20
+
+
+@pytest.fixture
+def static(app, tmp_path, monkeypatch):
+    # Сборка пишет в static/dist - подменяем static на временный каталог
+    folder = tmp_path / 'static'
+    (folder / 'css').mkdir(parents=True)
+    (folder / 'css' / 'site.css').write_bytes(CSS)
+    monkeypatch.setattr(app, 'static_folder', str(folder))
+    monkeypatch.setattr(assets, 'folders', ('css',))
+    monkeypatch.setattr(assets, 'critical', False)
+    monkeypatch.setattr(assets, 'manifest', AssetManifest(
+        str(folder / 'dist' / 'manifest.json')))
+    monkeypatch.setattr(uploads, 'folder', str(folder / 'uploads'))
+    monkeypatch.setattr(uploads, 'static_prefix', 'uploads/')
+    return folder
+
+
+@pytest.fixture
+def build(app, static):
+    result = CliRunner().invoke(build_command,
+                                obj=ScriptInfo(create_app=lambda: app))
+    assert result.exit_code == 0, result.output
+    assets.manifest.refresh()
+    return assets.manifest.files['css/site.css']
+
+
+def test_build_writes_manifest_and_compressed_copies(static, build):
+    with open(static / 'dist' / 'manifest.json', encoding='utf-8') as f:
+        assert json.load(f) == {'css/site.css': build}
+    assert build.startswith('dist/css/site.') and build.endswith('.css')
+    assert gzip.decompress((static / (build + '.gz')).read_bytes()) == CSS
+    assert build in assets.manifest.hashed
+
+
+def test_manifest_is_reloaded_when_file_changes(static, build):
+    path = static / 'dist' / 'manifest.json'
+    path.write_text(json.dumps({'css/site.css': 'dist/css/site.new.css'}))
+    os.utime(path, ns=(0, 0))
+    assets.manifest.refresh()
+    assert assets.manifest.files == {'css/site.css': 'dist/css/site.new.css'}
+
+
+def test_url_for_uses_hashed_name(app, build):
+    with app.test_request_context():
+        assert url_for('static', filename='css/site.css') == f'/static/{build}'
+        # Файлы вне манифеста остаются как есть
+        assert url_for('static', filename='css/other.css') == '/static/css/other.css'
+
+
+def test_url_for_without_assets_keeps_source_name(app, build, monkeypatch):
+    monkeypatch.setattr(assets, 'enabled', False)
+    with app.test_request_context():
+        assert url_for('static', filename='css/site.css') == '/static/css/site.css'
+
+
+@pytest.mark.parametrize('accept, encoding', [
+    ('br, gzip', 'br'),
+    ('gzip', 'gzip'),
+    ('', None),
+])
+def test_hashed_file_is_served_precompressed(client, static, build, accept,
+                                             encoding):
+    (static / (build + '.br')).write_bytes(b'brotli')
+    response = client.get(f'/static/{build}',
+                          headers={'Accept-Encoding': accept})
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == encoding
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.vary
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == assets.max_age
+    if encoding is None:
+        assert response.get_data() == CSS
+
+
+def test_source_file_is_not_immutable(client, build):
+    response = client.get('/static/css/site.css',
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert not response.cache_control.immutable
+
+
+def test_content_addressed_upload_is_immutable(client, static):
+    with open(static / 'css' / 'site.css', 'rb') as f:
+        name, _ = uploads.save(f, 'site.png')
+    response = client.get(f'/static/uploads/{name}')
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == assets.max_age
@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pytest
+
+from app.cache import LRUStore, FileVersion, ContentCache, cache, content_changed
+from app.catalog import get_solutions, get_solution, get_portfolio_item
+
+
+def test_lru_store_evicts_oldest():
+    store = LRUStore(max_entries=2)
+    store.set('a', 1)
+    store.set('b', 2)
+    store.get('a')
+    store.set('c', 3)
+    assert store.get('a') == 1
+    assert store.get('b') is None
+    assert len(store) == 2
+
+
+def test_lru_store_expires_by_ttl(monkeypatch):
+    now = [100.0]
+    # app.cache в пакете app перекрыт объектом кэша, модуль берём из sys.modules
+    monkeypatch.setattr(sys.modules['app.cache'].time, 'monotonic', lambda: now[0])
+    store = LRUStore(ttl=10)
+    store.set('a', 1)
+    now[0] += 11
+    assert store.get('a') is None
+
+
+def test_file_version_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'content.version')
+    first, second = FileVersion(path), FileVersion(path)
+    assert first.get() == second.get() == 0
+    # Файл создаёт первый обратившийся, время изменения общее
+    assert os.path.exists(path)
+    assert first.changed_at() == second.changed_at()
+    first.bump()
+    assert second.get() == 1
+
+
+def test_file_version_sees_same_length_bump_with_coarse_mtime(tmp_path):
+    path = str(tmp_path / 'content.version')
+    writer, reader = FileVersion(path), FileVersion(path)
+    writer.bump()
+    assert reader.get() == 1
+    before = os.stat(path)
+    writer.bump()
+    # Грубый mtime: время и длина файла не изменились, изменился inode
+    os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert os.stat(path).st_size == before.st_size
+    assert reader.get() == 2
+
+
+def test_cache_backend_defaults_to_file(app):
+    assert isinstance(cache.version, FileVersion)
+    assert cache.version.path.startswith(app.instance_path)
+
+
+def test_get_or_load_reads_once_until_bump(app):
+    calls = []
+    store = ContentCache(app)
+
+    def load():
+        calls.append(1)
+        return len(calls)
+
+    assert store.get_or_load('key', load) == 1
+    assert store.get_or_load('key', load) == 1
+    store.bump('solution', 'key')
+    assert store.get_or_load('key', load) == 2
+
+
+def test_bump_sends_content_changed(app):
+    received = []
+
+    def listener(sender, **extra):
+        received.append((sender, extra['key']))
+
+    with content_changed.connected_to(listener):
+        cache.bump('portfolio', 'flora')
+    assert received == [('portfolio', 'flora')]
+
+
+def test_catalog_returns_immutable_snapshots(app, make_solution, make_project):
+    make_solution(slug='startap')
+    make_project(slug='flora')
+    solution = get_solution('startap')
+    with pytest.raises(AttributeError):
+        solution.price = 1
+    project = get_portfolio_item('flora')
+    assert isinstance(project.features, tuple)
+    assert get_solutions() == (solution,)
+
+
+def test_admin_edit_invalidates_catalog(app, db, make_solution):
+    solution = make_solution(slug='startap', price=10000)
+    assert get_solution('startap').price == 10000
+    solution.price = 20000
+    db.session.commit()
+    # Без bump кэш отдаёт прежний снимок
+    assert get_solution('startap').price == 10000
+    cache.bump('solution', 'startap')
+    assert get_solution('startap').price == 20000
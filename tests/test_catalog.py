@@ -0,0 +1,117 @@
+import os
+
+import pytest
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+from flask_migrate.cli import db as db_cli
+from sqlalchemy import create_engine, event, inspect
+
+from app import create_app, db
+from app.cache import cache
+from app.commands import init_db_command
+from app.search import Fts5Index
+
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                          'migrations')
+
+
+@pytest.fixture
+def config(config):
+    # Считаем запросы самих представлений, а не попадания в кэш страниц
+    config['PAGE_CACHE_ENABLED'] = False
+    return config
+
+
+@pytest.fixture
+def queries(db):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def _selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+
+
+def test_solutions_page_loads_catalog_in_one_query(client, queries, make_solution):
+    for _ in range(3):
+        make_solution(category='package')
+        make_solution(category='module')
+    queries.clear()
+
+    assert client.get('/resheniya').get_data(as_text=True)
+    assert len(_selects(queries)) == 1
+    # Повторный запрос берёт снимок из кэша контента
+    queries.clear()
+    assert client.get('/resheniya').get_data(as_text=True)
+    assert _selects(queries) == []
+
+
+def test_portfolio_query_count_does_not_grow_with_items(client, queries,
+                                                        make_project):
+    make_project()
+    queries.clear()
+    assert client.get('/portfolio').get_data(as_text=True)
+    baseline = len(_selects(queries))
+
+    for _ in range(5):
+        make_project()
+    cache.bump('portfolio')
+    queries.clear()
+    assert client.get('/portfolio').get_data(as_text=True)
+    assert len(_selects(queries)) == baseline
+
+
+@pytest.fixture
+def migrated(config, tmp_path):
+    # flask init-db применяет миграции; повторный flask db upgrade - пустой
+    path = tmp_path / 'fresh.db'
+    config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app = create_app(config, instance_path=str(tmp_path / 'fresh-instance'))
+    obj = ScriptInfo(create_app=lambda: app)
+
+    def run(command, *args):
+        return CliRunner().invoke(command, list(args), obj=obj)
+
+    result = run(init_db_command)
+    assert result.exit_code == 0, result.output
+    result = run(db_cli, 'upgrade', '--directory', MIGRATIONS)
+    assert result.exit_code == 0, result.output
+    return app, path, run
+
+
+def test_migrations_upgrade_fresh_database(migrated):
+    app, path, run = migrated
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.connect() as connection:
+        version = connection.exec_driver_sql(
+            'SELECT version_num FROM alembic_version').scalar()
+    indexes = {index['name'] for index in inspect(engine).get_indexes('solution')}
+    engine.dispose()
+    assert version == 'e2a5c9d4f7b3'
+    assert {'ix_solution_slug', 'ix_solution_category'} <= indexes
+
+
+def test_init_db_refuses_unversioned_schema(app):
+    # Фикстура app создаёт таблицы через create_all, без alembic_version
+    obj = ScriptInfo(create_app=lambda: app)
+    result = CliRunner().invoke(init_db_command, [], obj=obj)
+    assert result.exit_code == 1
+    assert 'flask db stamp' in result.output
+
+
+def test_autogenerate_ignores_search_index(migrated):
+    app, path, run = migrated
+    with app.app_context():
+        if not Fts5Index.supported():
+            pytest.skip('SQLite без FTS5')
+        # Таблицу поиска создаёт flask init-db, а не первый запрос
+        assert Fts5Index.exists()
+    result = run(db_cli, 'check', '--directory', MIGRATIONS)
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,93 @@
+import json
+import os
+
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+
+from app.cache import content_changed
+from app.catalog_io import import_command
+from app.models import Solution
+from app.search import MemoryIndex, tokenize
+
+
+def _import(app, tmp_path, rows):
+    source = tmp_path / 'solutions.jsonl'
+    source.write_text(''.join(json.dumps(row, ensure_ascii=False) + '\n'
+                              for row in rows), encoding='utf-8')
+    return CliRunner().invoke(import_command, ['solution', str(source)],
+                              obj=ScriptInfo(create_app=lambda: app))
+
+
+def _row(slug, name):
+    return {'slug': slug, 'name': name, 'description': 'Готовый сайт',
+            'price': 1000, 'delivery_days': 14, 'category': 'package'}
+
+
+def test_import_sends_one_change_and_updates_sitemap(app, tmp_path):
+    signals = []
+
+    def receiver(sender, **kwargs):
+        signals.append((sender, kwargs.get('key')))
+
+    content_changed.connect(receiver)
+    try:
+        result = _import(app, tmp_path, [_row('startap', 'Стартап'),
+                                         _row('vizitka', 'Визитка')])
+    finally:
+        content_changed.disconnect(receiver)
+
+    assert result.exit_code == 0, result.output
+    assert signals == [('solution', None)]
+    sitemap = open(os.path.join(app.instance_path, 'sitemap', 'sitemap.xml')).read()
+    assert 'https://example.com/resheniya/startap' in sitemap
+    assert 'https://example.com/resheniya/vizitka' in sitemap
+
+
+def test_import_without_base_url_reports_sitemap(app, tmp_path):
+    app.config['SITEMAP_BASE_URL'] = None
+    result = _import(app, tmp_path, [_row('startap', 'Стартап')])
+    assert result.exit_code == 0, result.output
+    assert 'SITEMAP_BASE_URL' in result.output
+    assert Solution.query.count() == 1
+
+
+def test_worker_memory_index_sees_import(app, tmp_path):
+    # Индекс другого воркера: собран до импорта, в CLI не пересобирается
+    index = MemoryIndex()
+    terms = tokenize('визитка')
+    assert index.search(terms, None, 0, 10)[0] == 0
+
+    _import(app, tmp_path, [_row('vizitka', 'Визитка')])
+
+    assert index.search(terms, None, 0, 10)[0] == 1
+
+
+def test_rows_without_required_columns_are_reported(app, make_solution, tmp_path):
+    make_solution(slug='startap', name='Стартап')
+    nameless = _row('vizitka', 'Визитка')
+    del nameless['name']
+    result = _import(app, tmp_path, [
+        _row('magazin', 'Магазин'),
+        nameless,
+        {'slug': 'lending', 'name': None},
+        # Существующая запись обновляется без обязательных полей
+        {'slug': 'startap', 'price': 2000},
+    ])
+
+    assert result.exit_code == 1
+    assert 'Строка 2: нет обязательных полей: name' in result.output
+    assert 'Строка 3: name: значение обязательно' in result.output
+    assert 'добавлено 1, обновлено 1' in result.output
+    assert sorted(s.slug for s in Solution.query) == ['magazin', 'startap']
+    assert Solution.query.filter_by(slug='startap').one().price == 2000
+
+
+def test_rows_with_invalid_slug_are_reported(app, tmp_path):
+    result = _import(app, tmp_path, [_row('My Item', 'Пробел'),
+                                     _row('a/b', 'Слэш'),
+                                     _row('magazin', 'Магазин')])
+
+    assert result.exit_code == 1
+    assert "Строка 1: slug 'My Item'" in result.output
+    assert "Строка 2: slug 'a/b'" in result.output
+    assert [s.slug for s in Solution.query] == ['magazin']
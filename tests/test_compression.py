@@ -0,0 +1,93 @@
+import gzip
+import zlib
+
+import pytest
+from flask import Response, send_file
+
+from app.compression import compression
+
+
+BODY = 'Сайт под ключ. ' * 100
+
+
+@pytest.fixture
+def app(app, tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_text(BODY, encoding='utf-8')
+    app.add_url_rule('/test/big', 'big', lambda: BODY)
+    app.add_url_rule('/test/small', 'small', lambda: 'коротко')
+    app.add_url_rule('/test/file', 'file', lambda: send_file(path))
+    app.add_url_rule('/test/encoded', 'encoded', lambda: Response(
+        gzip.compress(BODY.encode()), mimetype='text/html',
+        headers={'Content-Encoding': 'gzip'}))
+    return app
+
+
+def test_gzip_when_accepted(client):
+    response = client.get('/test/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    body = response.get_data()
+    assert int(response.headers['Content-Length']) == len(body)
+    assert gzip.decompress(body).decode() == BODY
+
+
+def test_identity_without_accept_encoding(client):
+    response = client.get('/test/big', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_data(as_text=True) == BODY
+
+
+def test_brotli_is_preferred(client):
+    brotli = pytest.importorskip('brotli')
+    response = client.get('/test/big', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()).decode() == BODY
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get('/test/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == 'коротко'
+
+
+def test_already_encoded_response_is_untouched(client):
+    response = client.get('/test/encoded', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).decode() == BODY
+
+
+def test_passthrough_file_is_not_compressed(client):
+    response = client.get('/test/file', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == BODY
+
+
+def test_head_reports_compressed_length(client):
+    get = client.get('/test/big', headers={'Accept-Encoding': 'gzip'})
+    head = client.head('/test/big', headers={'Accept-Encoding': 'gzip'})
+    assert head.headers['Content-Encoding'] == 'gzip'
+    assert head.headers['Content-Length'] == get.headers['Content-Length']
+    assert head.get_data() == b''
+
+
+def test_streamed_page_is_compressed_by_chunks(client):
+    response = client.get('/portfolio', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    chunks = list(response.response)
+    # Каждый кусок сброшен отдельно: первый уже распаковывается целиком
+    head = zlib.decompressobj(31).decompress(chunks[0]).decode()
+    assert '</head>' in head
+    html = gzip.decompress(b''.join(chunks)).decode()
+    assert html.rstrip().endswith('</html>')
+
+
+def test_compressed_body_is_reused_for_same_etag(client):
+    client.get('/kontakty', headers={'Accept-Encoding': 'gzip'}).get_data()
+    entries = len(compression.store)
+    response = client.get('/kontakty', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['ETag'].startswith('W/')
+    assert len(compression.store) == entries
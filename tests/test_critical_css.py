@@ -0,0 +1,32 @@
+import os
+
+from app.critical_css import page_styles
+
+
+LIMIT = 14 * 1024
+
+
+def _styles(app, **options):
+    with open(os.path.join(app.static_folder, 'css', 'style.css'),
+              encoding='utf-8') as f:
+        return page_styles(app.jinja_env, f.read(), **options)
+
+
+def test_sections_shrink_to_fit_budget(app):
+    unbounded = _styles(app)
+    assert len(unbounded['about.html'].critical.encode('utf-8')) > LIMIT
+
+    styles = _styles(app, max_bytes=LIMIT, exclude=('admin/',))
+
+    for name, style in styles.items():
+        assert len(style.critical.encode('utf-8')) <= LIMIT, name
+    assert styles['about.html'].sections == 0
+    # Страницы, которые и так укладываются, секции не теряют
+    assert styles['index.html'].sections == 1
+    assert styles['index.html'].critical == unbounded['index.html'].critical
+
+
+def test_admin_templates_are_skipped(app):
+    styles = _styles(app, exclude=('admin/',))
+    assert 'index.html' in styles
+    assert not [name for name in styles if name.startswith('admin/')]
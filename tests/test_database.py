@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import insert
+
+from app.cache import cache, FileVersion
+from app.models import Solution
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    # Две настоящие SQLite-базы: реплика не получает записей основной
+    config['DATABASE_REPLICA_URL'] = f'sqlite:///{tmp_path / "replica.db"}'
+    config['DATABASE_REPLICA_LAG'] = 10
+    config['PAGE_CACHE_ENABLED'] = False
+    return config
+
+
+@pytest.fixture
+def replica(app, db):
+    engine = db.engines['replica']
+    db.metadata.create_all(engine)
+
+    def add(slug):
+        with engine.begin() as connection:
+            connection.execute(insert(Solution), {
+                'name': slug, 'slug': slug, 'description': 'Только на реплике',
+                'price': 1000, 'category': 'package'})
+
+    yield add
+    # init_app завёл метаданные для bind'а на общем объекте db; следующие
+    # приложения без реплики на них споткнутся в create_all
+    db.metadatas.pop('replica', None)
+
+
+def _age_version(seconds):
+    cache.current_version
+    past = time.time() - seconds
+    os.utime(cache.version.path, (past, past))
+
+
+def test_public_reads_go_to_replica(client, replica, make_solution):
+    replica('on-replica')
+    make_solution(slug='on-primary')
+    _age_version(60)
+
+    assert client.get('/resheniya/on-replica').status_code == 200
+    assert client.get('/resheniya/on-primary').status_code == 404
+    # Публичное API тоже читает с реплики
+    items = client.get('/api/solutions').get_json()['items']
+    assert [item['name'] for item in items] == ['on-replica']
+
+
+def test_change_in_another_worker_switches_to_primary(client, replica,
+                                                      make_solution):
+    make_solution(slug='on-primary')
+    _age_version(60)
+    assert client.get('/resheniya/on-primary').status_code == 404
+
+    # Другой воркер сохранил контент: видна только общая версия в файле
+    FileVersion(cache.version.path).bump()
+    assert client.get('/resheniya/on-primary').status_code == 200
+
+
+def test_admin_session_reads_primary_after_commit(admin_client, replica):
+    _age_version(60)
+    response = admin_client.post('/panel/solutions', data={
+        'name': 'Новое', 'slug': 'novoe', 'description': 'Описание',
+        'price': 1000, 'delivery_days': 14, 'category': 'package'})
+    assert response.status_code == 302
+    # Изменение контента сдвигает общую версию; убираем этот фактор,
+    # остаётся только метка в сессии администратора
+    _age_version(60)
+    assert admin_client.get('/resheniya/novoe').status_code == 200
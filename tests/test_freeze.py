@@ -0,0 +1,129 @@
+import os
+
+import pytest
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+
+from app.analytics import analytics, daily_views
+from app.cache import cache
+from app.freeze import freeze_command
+from app.sitemap import sync_entries, write_sitemap
+
+
+@pytest.fixture
+def config(config):
+    # Экспорт не должен попадать в статистику просмотров
+    config['ANALYTICS_ENABLED'] = True
+    config['ANALYTICS_FLUSH_INTERVAL'] = 3600
+    return config
+
+
+@pytest.fixture
+def output(tmp_path):
+    return tmp_path / 'build'
+
+
+@pytest.fixture
+def freeze(app, output):
+    def run(*args):
+        result = CliRunner().invoke(
+            freeze_command, ['--output', str(output), *args],
+            obj=ScriptInfo(create_app=lambda: app))
+        assert result.exit_code == 0, result.output
+        return result
+
+    return run
+
+
+def _files(output, folder):
+    return sorted(os.listdir(output / folder))
+
+
+def test_journal_is_empty_until_first_freeze(app, make_project):
+    make_project()
+    cache.bump('portfolio', 'project-1')
+    assert not os.path.exists(os.path.join(app.instance_path, 'freeze.journal'))
+
+
+def test_freeze_exports_pagination_fragments_and_shards(app, make_project,
+                                                        freeze, output):
+    app.config['PORTFOLIO_PAGE_SIZE'] = 2
+    for _ in range(5):
+        make_project()
+    sync_entries()
+    write_sitemap(app)
+
+    freeze()
+
+    assert (output / 'sitemap-1.xml.gz').exists()
+    pages = _files(output, 'portfolio')
+    assert len([name for name in pages if name.startswith('after-')]) == 2
+    assert len([name for name in pages if name.startswith('before-')]) == 2
+    assert len(_files(output, 'fragments/portfolio')) == 2
+    # Каждая ссылка "Показать ещё" ведёт на выгруженный фрагмент
+    html = (output / 'portfolio' / 'index.html').read_text()
+    cursor = html.split('/fragments/portfolio?after=')[1].split('"')[0]
+    assert (output / 'fragments' / 'portfolio' / f'after-{cursor}.html').exists()
+
+
+def test_incremental_freeze_removes_renamed_pages(app, db, make_project,
+                                                  freeze, output):
+    project = make_project(slug='old-slug')
+    freeze()
+    assert (output / 'portfolio' / 'old-slug' / 'index.html').exists()
+
+    project.slug = 'new-slug'
+    db.session.commit()
+    cache.bump('portfolio', 'new-slug')
+    result = freeze('--incremental')
+
+    assert (output / 'portfolio' / 'new-slug' / 'index.html').exists()
+    assert not (output / 'portfolio' / 'old-slug').exists()
+    assert 'удалено: 1' in result.output
+
+
+def test_freeze_does_not_count_views(app, client, make_project, freeze):
+    make_project()
+    analytics.flush()
+    client.get('/kontakty')
+    assert analytics.pending() == 1
+
+    freeze()
+
+    assert analytics.pending() == 1
+    analytics.flush()
+    assert daily_views(1)[-1][1] == 1
+
+
+def test_failed_and_concurrent_changes_stay_in_journal(app, make_project,
+                                                       freeze, output):
+    from flask import abort
+
+    make_project(slug='broken')
+    freeze()
+    journal = os.path.join(app.instance_path, 'freeze.journal')
+    cache.bump('portfolio', 'broken')
+    detail = app.view_functions['main.portfolio_detail']
+
+    def failing(slug):
+        # Правка в админке во время экспорта
+        cache.bump('about', 'biography')
+        abort(500)
+
+    app.view_functions['main.portfolio_detail'] = failing
+    result = CliRunner().invoke(
+        freeze_command, ['--output', str(output), '--incremental'],
+        obj=ScriptInfo(create_app=lambda: app))
+    assert result.exit_code == 1
+    assert 'Ошибка 500: /portfolio/broken' in result.output
+
+    app.view_functions['main.portfolio_detail'] = detail
+    with open(journal + '.processing', encoding='utf-8') as f:
+        assert '"broken"' in f.read()
+    with open(journal, encoding='utf-8') as f:
+        assert '"about"' in f.read()
+
+    result = freeze('--incremental')
+    assert 'Страниц: 0' not in result.output
+    assert not os.path.exists(journal)
+    assert not os.path.exists(journal + '.processing')
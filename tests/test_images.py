@@ -0,0 +1,49 @@
+import os
+import time
+
+import pytest
+
+from app.images import ImagePipeline
+
+Image = pytest.importorskip('PIL.Image')
+
+
+@pytest.fixture
+def pipeline(app, tmp_path):
+    app.config.update(IMAGE_VARIANTS_ENABLED=True, IMAGE_WORKERS=1,
+                      IMAGE_VARIANT_FOLDER=str(tmp_path / 'variants'),
+                      IMAGE_VARIANT_FORMATS=('webp',),
+                      IMAGE_VARIANT_WIDTHS=(100, 200))
+    pipeline = ImagePipeline(app)
+    yield pipeline
+    if pipeline._executor is not None:
+        pipeline._executor.shutdown()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'photo.png'
+    Image.new('RGB', (300, 150), 'red').save(path)
+    return str(path)
+
+
+def test_variants_are_built_in_spawned_processes(pipeline, source):
+    assert pipeline.executor._mp_context.get_start_method() == 'spawn'
+    entry = pipeline.submit(source, 'uploads/photo.png').result(timeout=60)
+    assert entry['width'] == 300
+    assert [v['width'] for v in entry['variants']] == [100, 200]
+    assert all(os.path.exists(os.path.join(pipeline.folder, v['file']))
+               for v in entry['variants'])
+    # Манифест обновляет колбэк future, он может отстать от result()
+    deadline = time.monotonic() + 5
+    while pipeline.manifest.get('uploads/photo.png') is None \
+            and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pipeline.manifest.get('uploads/photo.png') == entry
+
+
+def test_submit_after_pool_shutdown_runs_inline(pipeline, source):
+    pipeline.executor.shutdown()
+    future = pipeline.submit(source, 'uploads/photo.png')
+    assert future.done()
+    assert pipeline.manifest.get('uploads/photo.png')['height'] == 150
@@ -0,0 +1,80 @@
+import cProfile
+import json
+import os
+import subprocess
+import sys
+
+from app.metrics import metrics, _profile_lock
+
+
+def _count(histogram, *label_values):
+    series = histogram._series.get(label_values)
+    return series[2] if series else 0
+
+
+def test_streamed_page_is_measured_after_body(client):
+    before = _count(metrics.request_duration, 'main.about', 'GET', '200')
+    response = client.get('/o-mne')
+    assert response.is_streamed
+    # Тело ещё не отдано - замер не закрыт
+    assert _count(metrics.request_duration, 'main.about', 'GET', '200') == before
+
+    response.get_data()
+    response.close()
+    assert _count(metrics.request_duration, 'main.about', 'GET', '200') == before + 1
+    assert _count(metrics.template_duration, 'about.html') >= 1
+
+
+def test_profile_sampling_skips_busy_or_failing_profiler(client, monkeypatch):
+    monkeypatch.setattr(metrics, 'profile_rate', 1.0)
+    lock = _profile_lock
+    # Профиль снимает другой поток - запрос обслуживается без профиля
+    assert lock.acquire(blocking=False)
+    try:
+        assert client.get('/kontakty').status_code == 200
+    finally:
+        lock.release()
+
+    assert client.get('/kontakty').status_code == 200
+    assert not lock.locked()
+
+    def busy(self):
+        raise ValueError('Another profiling tool is already active')
+
+    monkeypatch.setattr(cProfile.Profile, 'enable', busy)
+    assert client.get('/kontakty').status_code == 200
+    assert not lock.locked()
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_render_merges_workers_with_pid_label(app):
+    folder = metrics.folder
+    os.makedirs(folder, exist_ok=True)
+    sibling = os.getppid()
+    series = [[['main.index', 'GET', '200'], [1] + [0] * 12, 0.001, 1]]
+    with open(os.path.join(folder, f'{sibling}.json'), 'w') as target:
+        json.dump({'http_request_duration_seconds': series}, target)
+    dead = os.path.join(folder, f'{_dead_pid()}.json')
+    with open(dead, 'w') as target:
+        json.dump({'http_request_duration_seconds': series}, target)
+
+    output = metrics.render()
+
+    assert (f'http_request_duration_seconds_count{{endpoint="main.index",'
+            f'method="GET",status="200",pid="{sibling}"}} 1') in output
+    assert not os.path.exists(dead)
+    # Свои серии воркер тоже сбросил в общий каталог
+    assert os.path.exists(os.path.join(folder, f'{os.getpid()}.json'))
+
+
+def test_metrics_endpoint_requires_token(app, client):
+    app.config['METRICS_TOKEN'] = 'secret'
+    assert client.get('/panel/metrics').status_code == 401
+    response = client.get('/panel/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert f'pid="{os.getpid()}"' in response.get_data(as_text=True)
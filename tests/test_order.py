@@ -0,0 +1,79 @@
+import re
+
+import pytest
+
+from app import create_app, db as _db
+from app.models import Order
+from app.notifications import stub_transport, notify_order, NotificationError
+
+
+@pytest.fixture
+def csrf_app(config, tmp_path):
+    config.update(WTF_CSRF_ENABLED=True)
+    app = create_app(config, instance_path=str(tmp_path / 'instance'))
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+
+
+ORDER = {'name': 'Анна', 'contact': '@anna', 'message': 'Нужен лендинг'}
+
+
+def test_form_post_without_token_is_rejected(csrf_app):
+    client = csrf_app.test_client()
+    response = client.post('/order', data=ORDER)
+    assert response.status_code == 200
+    assert Order.query.count() == 0
+
+
+def test_form_post_with_token_is_accepted(csrf_app):
+    client = csrf_app.test_client()
+    html = client.get('/order').get_data(as_text=True)
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', html).group(1)
+    response = client.post('/order', data={**ORDER, 'csrf_token': token})
+    assert response.status_code == 302
+    assert Order.query.one().name == 'Анна'
+
+
+def test_json_post_is_accepted_without_token(csrf_app):
+    client = csrf_app.test_client()
+    response = client.post('/order', json=ORDER)
+    assert response.status_code == 201
+    assert response.get_json()['ok'] is True
+
+
+def test_json_post_validation_errors(csrf_app):
+    response = csrf_app.test_client().post('/order', json={'name': 'Анна'})
+    assert response.status_code == 400
+    assert 'contact' in response.get_json()['errors']
+
+
+def test_order_limit_comes_from_config(config, tmp_path):
+    config.update(RATELIMIT_ENABLED=True, RATELIMIT_ORDER='2 per minute',
+                  RATELIMIT_STORAGE_URI='memory://')
+    app = create_app(config, instance_path=str(tmp_path / 'instance'))
+    with app.app_context():
+        _db.create_all()
+        client = app.test_client()
+        codes = [client.post('/order', json=ORDER).status_code for _ in range(3)]
+    assert codes == [201, 201, 429]
+
+
+def test_order_notification_uses_chat_id(app, client):
+    app.config['TELEGRAM_CHAT_ID'] = '123456'
+    stub_transport.sent.clear()
+    client.post('/order', json=ORDER)
+    chat_id, text = stub_transport.sent[-1]
+    assert chat_id == '123456'
+    assert 'Анна' in text and 'Нужен лендинг' in text
+
+
+def test_telegram_requires_chat_id(app, db):
+    app.config.update(NOTIFY_TRANSPORT='telegram', TELEGRAM_BOT_TOKEN='token',
+                      TELEGRAM_CHAT_ID=None)
+    order = Order(name='Анна', contact='@anna')
+    db.session.add(order)
+    db.session.commit()
+    with pytest.raises(NotificationError, match='TELEGRAM_CHAT_ID'):
+        notify_order(order.id)
@@ -0,0 +1,79 @@
+from flask import session, flash, render_template_string, stream_with_context
+
+from app.cache import cache
+from app.page_cache import page_cache
+
+
+def get(client, url, **kwargs):
+    response = client.get(url, **kwargs)
+    # Потоковый ответ попадает в кэш, только когда дочитан до конца
+    response.get_data()
+    return response
+
+
+def test_second_request_is_a_hit(client, make_project):
+    make_project()
+    assert get(client, '/portfolio').headers['X-Cache'] == 'MISS'
+    response = get(client, '/portfolio')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert response.headers['ETag']
+
+
+def test_matching_etag_returns_304(client):
+    get(client, '/kontakty')
+    etag = get(client, '/kontakty').headers['ETag']
+    response = client.get('/kontakty', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_content_change_purges_pages(client, make_project):
+    make_project(title='Старый проект')
+    get(client, '/portfolio')
+    assert 'Старый проект' in get(client, '/portfolio').get_data(as_text=True)
+    make_project(title='Новый проект')
+    cache.bump('portfolio', 'project-2')
+    response = get(client, '/portfolio')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert 'Новый проект' in response.get_data(as_text=True)
+
+
+def test_pages_changing_session_are_not_cached(app):
+    @page_cache.cached
+    def plain():
+        session['seen'] = True
+        return 'ok'
+
+    @page_cache.cached
+    def streamed():
+        @stream_with_context
+        def generate():
+            session['seen'] = True
+            yield 'ok'
+        return app.response_class(generate())
+
+    app.add_url_rule('/test-plain', view_func=plain)
+    app.add_url_rule('/test-stream', view_func=streamed)
+    client = app.test_client()
+    assert 'session=' in get(client, '/test-plain').headers['Set-Cookie']
+    for url in ('/test-plain', '/test-stream'):
+        get(client, url)
+        assert get(client, url).headers.get('X-Cache') != 'HIT'
+    assert len(page_cache.store) == 0
+
+
+def test_flash_is_not_lost_to_cached_page(app):
+    @page_cache.cached
+    def page():
+        return render_template_string(
+            '{% for m in get_flashed_messages() %}{{ m }}{% endfor %}')
+
+    def add_flash():
+        flash('Сохранено')
+        return 'ok'
+
+    app.add_url_rule('/test-page', view_func=page)
+    app.add_url_rule('/test-add-flash', view_func=add_flash)
+    client = app.test_client()
+    get(client, '/test-page')
+    client.get('/test-add-flash')
+    assert 'Сохранено' in get(client, '/test-page').get_data(as_text=True)
@@ -0,0 +1,80 @@
+import base64
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+
+from app.catalog import get_portfolio_page
+from app.catalog_io import seed_command
+from app.models import PortfolioItem, PORTFOLIO_CATEGORIES
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_cursor_round_trip(app, make_project):
+    for _ in range(5):
+        make_project()
+    first = get_portfolio_page(limit=2)
+    second = get_portfolio_page(after=first.next_cursor, limit=2)
+    back = get_portfolio_page(before=second.prev_cursor, limit=2)
+    assert [item.id for item in second.items] == [3, 4]
+    assert back.items == first.items
+    assert back.prev_cursor is None
+    last = get_portfolio_page(after=second.next_cursor, limit=2)
+    assert [item.id for item in last.items] == [5]
+    assert last.next_cursor is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-base64!', raw_cursor([{}]), raw_cursor([[1]]), raw_cursor([1, 2]),
+    raw_cursor({'id': 1}), raw_cursor([True]), raw_cursor([None]),
+])
+def test_bad_cursor_is_400(client, make_project, cursor):
+    make_project()
+    assert client.get(f'/portfolio?after={cursor}').status_code == 400
+    assert client.get(f'/fragments/portfolio?before={cursor}').status_code == 400
+
+
+def test_cards_match_filter_buttons(client, make_project):
+    make_project(category='salon')
+    make_project(category='Кафе')
+    html = client.get('/portfolio').get_data(as_text=True)
+    for key, label in PORTFOLIO_CATEGORIES:
+        assert f'data-filter="{key}"' in html
+    assert 'data-category="salon"' in html
+    # Незнакомая категория попадает в «Индивидуальный проект»
+    assert 'data-category="other"' in html
+    assert 'data-category="Кафе"' not in html
+
+
+def test_admin_rejects_unknown_category(admin_client):
+    admin_client.post('/panel/portfolio', data={
+        'title': 'Проект', 'slug': 'proekt', 'category': 'кафе',
+        'package': 'Стандарт', 'duration': '10 дней', 'geo': 'СПб'})
+    assert PortfolioItem.query.count() == 0
+
+
+def test_seed_imports_curated_projects(app, client):
+    runner = CliRunner()
+    obj = ScriptInfo(create_app=lambda: app)
+    result = runner.invoke(seed_command, obj=obj)
+    assert result.exit_code == 0, result.output
+    items = {item.slug: item for item in PortfolioItem.query}
+    assert len(items) == 6
+    flora = items['flora-flowers']
+    assert flora.category == 'magazin'
+    assert flora.image_alt == 'Сайт для цветочного магазина Flora в СПб'
+    assert os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], flora.images[0]))
+
+    html = client.get('/portfolio').get_data(as_text=True)
+    assert 'Интернет-магазин цветов с доставкой по СПб' in html
+    assert 'alt="Сайт для цветочного магазина Flora в СПб"' in html
+
+    # Повторный запуск обновляет те же записи
+    result = runner.invoke(seed_command, obj=obj)
+    assert 'обновлено 6' in result.output
+    assert PortfolioItem.query.count() == 6
@@ -0,0 +1,65 @@
+import sys
+
+import pytest
+from limits import parse
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from app.ratelimit import SqliteStorage
+
+
+WINDOW_START = 60_000.0
+
+
+@pytest.fixture
+def config(config):
+    config['RATELIMIT_ENABLED'] = True
+    config['RATELIMIT_ORDER'] = '2 per minute'
+    return config
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [WINDOW_START]
+    monkeypatch.setattr(sys.modules['app.ratelimit'].time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def storage_uri(tmp_path):
+    return f'sqlite:///{tmp_path / "ratelimit.db"}'
+
+
+def _hits(limiter, limit, count, key='client'):
+    return [limiter.hit(limit, key) for _ in range(count)]
+
+
+def test_sliding_window_weights_previous_window(clock, storage_uri):
+    limiter = SlidingWindowCounterRateLimiter(SqliteStorage(storage_uri))
+    limit = parse('10 per minute')
+    assert _hits(limiter, limit, 11) == [True] * 10 + [False]
+
+    # Середина следующего окна: из предыдущего учитывается половина
+    clock[0] = WINDOW_START + 90
+    assert _hits(limiter, limit, 6) == [True] * 5 + [False]
+
+    # Через два окна прошлые запросы уже не считаются
+    clock[0] = WINDOW_START + 180
+    assert _hits(limiter, limit, 10) == [True] * 10
+
+
+def test_workers_share_counters(clock, storage_uri):
+    # Два воркера - два экземпляра хранилища на одном файле
+    first = SlidingWindowCounterRateLimiter(SqliteStorage(storage_uri))
+    second = SlidingWindowCounterRateLimiter(SqliteStorage(storage_uri))
+    limit = parse('4 per minute')
+    assert _hits(first, limit, 2) == [True, True]
+    assert _hits(second, limit, 3) == [True, True, False]
+    assert not first.hit(limit, 'client')
+    # Другой ключ (адрес) считается отдельно
+    assert first.hit(limit, 'other')
+
+
+def test_order_form_is_limited(client):
+    payload = {'name': 'Иван', 'contact': '@ivan'}
+    statuses = [client.post('/order', json=payload).status_code for _ in range(3)]
+    assert statuses == [201, 201, 429]
@@ -0,0 +1,104 @@
+import pytest
+
+from app.cache import cache
+from app.models import Solution
+from app.search import search, MemoryIndex, tokenize
+
+
+@pytest.fixture(params=['memory', 'fts5'])
+def backend(request, app):
+    if request.param == 'fts5':
+        from app.search import Fts5Index
+        if not Fts5Index.supported():
+            pytest.skip('SQLite собран без FTS5')
+    search.backend_name = request.param
+    # Таблицу FTS5 создаёт явная пересборка, как flask search reindex
+    search.rebuild()
+    yield request.param
+    search.backend = None
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize('для кофейни') == tokenize('Кофейня')
+
+
+def test_search_finds_by_prefix(backend, make_solution, make_project):
+    make_solution(slug='magazin', name='Интернет-магазин',
+                  description='Каталог товаров и корзина.')
+    make_project(slug='flora', title='Магазин цветов Flora')
+    search.rebuild()
+    total, hits = search.query('магазин')
+    assert total == 2
+    assert {hit.slug for hit in hits} == {'magazin', 'flora'}
+    total, hits = search.query('магазин', kind='portfolio')
+    assert [hit.slug for hit in hits] == ['flora']
+
+
+def test_slugless_rows_are_not_indexed(backend, db, make_solution):
+    make_solution(slug='magazin', name='Интернет-магазин')
+    db.session.add_all([Solution(name='Магазин без адреса', description=''),
+                        Solution(name='Ещё магазин без адреса', description='')])
+    db.session.commit()
+    cache.bump('solution', None)
+    total, hits = search.query('магазин')
+    assert [hit.slug for hit in hits] == ['magazin']
+
+
+def test_api_search_with_slugless_solution(client, db, make_solution):
+    make_solution(slug='magazin', name='Интернет-магазин')
+    db.session.add(Solution(name='Магазин без адреса', description=''))
+    db.session.commit()
+    cache.bump('solution', None)
+    response = client.get('/api/search?q=магазин')
+    assert response.status_code == 200
+    assert [item['slug'] for item in response.get_json()['items']] == ['magazin']
+
+
+def test_content_changed_updates_one_document(backend, db, make_solution):
+    solution = make_solution(slug='magazin', name='Интернет-магазин')
+    assert search.query('кофейня') == (0, [])
+    solution.name = 'Кофейня'
+    db.session.commit()
+    cache.bump('solution', 'magazin')
+    total, hits = search.query('кофейня')
+    assert [hit.slug for hit in hits] == ['magazin']
+
+
+def test_search_request_does_not_create_fts5_table(app, client, make_solution):
+    from app.search import Fts5Index
+    if not Fts5Index.supported():
+        pytest.skip('SQLite собран без FTS5')
+    make_solution(slug='magazin', name='Интернет-магазин')
+    search.backend_name = 'fts5'
+    search.backend = None
+    try:
+        response = client.get('/api/search?q=магазин')
+        assert [item['slug'] for item in response.get_json()['items']] == ['magazin']
+        assert not Fts5Index.exists()
+        assert isinstance(search.backend, MemoryIndex)
+    finally:
+        search.backend = None
+
+
+def test_memory_index_reset_defers_rebuild(app, make_solution):
+    make_solution(slug='magazin', name='Интернет-магазин')
+    index = MemoryIndex()
+    index.rebuild()
+    index.reset()
+    assert index.version is None
+    assert index.search(['магазин'], None, 0, 10)[0] == 1
+
+
+def test_admin_creates_solution_with_slug(admin_client):
+    response = admin_client.post('/panel/solutions', data={
+        'name': 'Лендинг', 'slug': 'lending', 'description': 'Одна страница.',
+        'price': 15000, 'delivery_days': 7, 'category': 'package'})
+    assert response.status_code == 302
+    assert Solution.query.filter_by(slug='lending').one().name == 'Лендинг'
+
+
+def test_admin_rejects_invalid_slug(admin_client):
+    admin_client.post('/panel/solutions', data={
+        'name': 'Лендинг', 'slug': 'Лендинг 1', 'description': 'Одна страница.',
+        'price': 15000, 'delivery_days': 7, 'category': 'package'})
+    assert Solution.query.count() == 0
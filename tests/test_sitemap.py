@@ -0,0 +1,87 @@
+import gzip
+import os
+
+import pytest
+from click.testing import CliRunner
+from flask.cli import ScriptInfo
+
+from app.cache import cache
+from app.models import SitemapEntry
+from app.sitemap import write_sitemap, sync_entries, SitemapError, build_command
+
+
+def app_script_info(app):
+    return ScriptInfo(create_app=lambda: app)
+
+
+def sitemap_path(app, name='sitemap.xml'):
+    return os.path.join(app.instance_path, 'sitemap', name)
+
+
+def test_public_requests_do_not_write(app, client, make_solution):
+    make_solution(slug='startap', name='Стартап')
+    # До `flask sitemap build` XML строится из каталога в памяти
+    response = client.get('/sitemap.xml', headers={'Host': 'evil.example'})
+    assert response.status_code == 200
+    xml = response.get_data(as_text=True)
+    assert '<loc>https://example.com/resheniya/startap</loc>' in xml
+    assert 'evil.example' not in xml
+    assert client.get('/sitemap-1.xml.gz').status_code == 404
+    html = client.get('/sitemap').get_data(as_text=True)
+    # HTML-карта строится из каталога без записи в БД
+    assert '/resheniya/startap' in html
+    assert SitemapEntry.query.count() == 0
+    assert not os.path.exists(sitemap_path(app))
+
+
+def test_build_uses_base_url_not_host(app, make_solution):
+    make_solution(slug='startap')
+    result = CliRunner().invoke(build_command, obj=app_script_info(app))
+    assert result.exit_code == 0, result.output
+    xml = open(sitemap_path(app)).read()
+    assert '<loc>https://example.com/resheniya/startap</loc>' in xml
+    assert 'localhost' not in xml
+
+
+def test_unbuilt_sitemap_without_base_url_is_404(app, client):
+    app.config['SITEMAP_BASE_URL'] = None
+    assert client.get('/sitemap.xml').status_code == 404
+
+
+def test_build_requires_base_url(app):
+    app.config['SITEMAP_BASE_URL'] = None
+    sync_entries()
+    with pytest.raises(SitemapError):
+        write_sitemap(app)
+    result = CliRunner().invoke(build_command, obj=app_script_info(app))
+    assert result.exit_code == 1
+    assert 'SITEMAP_BASE_URL' in result.output
+
+
+def test_served_file_ignores_spoofed_host(app, client):
+    sync_entries()
+    write_sitemap(app)
+    response = client.get('/sitemap.xml', headers={'Host': 'evil.example'})
+    assert response.status_code == 200
+    assert b'evil.example' not in response.get_data()
+
+
+def test_shards_over_limit(app, make_project):
+    app.config['SITEMAP_MAX_URLS'] = 5
+    for _ in range(6):
+        make_project()
+    sync_entries()
+    write_sitemap(app)
+    index = open(sitemap_path(app)).read()
+    assert '<sitemapindex' in index
+    assert 'https://example.com/sitemap-3.xml.gz' in index
+    with gzip.open(sitemap_path(app, 'sitemap-3.xml.gz')) as f:
+        assert f.read().count(b'<url>') == 3
+
+
+def test_admin_change_updates_sitemap(app, db, make_solution):
+    sync_entries()
+    write_sitemap(app)
+    make_solution(slug='novyy')
+    cache.bump('solution', 'novyy')
+    assert '/resheniya/novyy' in open(sitemap_path(app)).read()
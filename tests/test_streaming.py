@@ -0,0 +1,51 @@
+from app.main_routes import PRIVACY_UPDATED
+from app.streaming import render_page, _chunked
+
+
+class Stream:
+    def __init__(self, parts):
+        self.parts = parts
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.parts)
+
+    def close(self):
+        self.closed = True
+
+
+def test_head_is_sent_as_first_chunk():
+    stream = Stream(['<html><head>', '<title>x</title></head>', '<body>',
+                     'a' * 10, 'b' * 10, '</body></html>'])
+    chunks = list(_chunked(stream, 16))
+    assert chunks[0] == '<html><head><title>x</title></head>'
+    # Дальше куски не меньше size, кроме последнего
+    assert chunks[1:] == ['<body>' + 'a' * 10, 'b' * 10 + '</body></html>']
+    assert stream.closed
+
+
+def test_stream_is_closed_when_client_disconnects():
+    stream = Stream(['<head></head>', 'body'])
+    chunks = _chunked(stream, 1024)
+    next(chunks)
+    chunks.close()
+    assert stream.closed
+
+
+def test_render_page_streams_template(app, client):
+    app.config['STREAM_CHUNK_SIZE'] = 4096
+    response = client.get('/o-mne', headers={'Accept-Encoding': 'identity'})
+    chunks = [chunk.decode() for chunk in response.response]
+    assert '</head>' in chunks[0]
+    assert len(chunks) > 2
+    assert all(len(chunk) >= 4096 for chunk in chunks[1:-1])
+    assert ''.join(chunks).rstrip().endswith('</html>')
+
+
+def test_render_page_without_streaming(app):
+    app.config['STREAM_TEMPLATES'] = False
+    with app.test_request_context('/privacy'):
+        response = app.make_response(
+            render_page('privacy.html', updated=PRIVACY_UPDATED))
+    assert not response.is_streamed
+    assert response.get_data(as_text=True).rstrip().endswith('</html>')
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from app.tasks import TaskQueue
+
+
+@pytest.fixture
+def queue(app, tmp_path):
+    queue = TaskQueue()
+    app.config.update(TASK_DATABASE=str(tmp_path / 'tasks.db'), TASK_WORKERS=0,
+                      TASK_MAX_ATTEMPTS=3, TASK_RETRY_DELAY=10,
+                      TASKS_EAGER=False)
+    queue.init_app(app)
+    return queue
+
+
+def force_due(queue):
+    queue._connection().execute("UPDATE task SET run_at = 0")
+
+
+def test_task_runs_and_is_deleted(queue):
+    done = []
+    queue.task('ok')(lambda value: done.append(value))
+    queue.enqueue('ok', value=1)
+    assert queue.run_one()
+    assert done == [1]
+    assert queue.stats() == {}
+
+
+def test_failed_task_is_retried_with_backoff(queue):
+    queue.task('flaky')(lambda: 1 / 0)
+    queue.enqueue('flaky')
+    started = time.time()
+    assert queue.run_one()
+    row = queue._connection().execute('SELECT * FROM task').fetchone()
+    assert row['status'] == 'pending'
+    assert row['attempts'] == 1
+    assert row['run_at'] >= started + 10
+    assert 'ZeroDivisionError' in row['last_error']
+    # Повтор ещё не наступил
+    assert not queue.run_one()
+
+
+def test_task_is_dead_lettered_after_max_attempts(queue):
+    queue.task('broken')(lambda: 1 / 0)
+    queue.enqueue('broken')
+    for _ in range(3):
+        force_due(queue)
+        assert queue.run_one()
+    assert queue.stats() == {'failed': 1}
+    force_due(queue)
+    assert not queue.run_one()
+    assert queue.retry_failed() == 1
+    assert queue.stats() == {'pending': 1}
+
+
+def test_lock_is_extended_while_task_runs(queue):
+    queue.lock_timeout = 0.3
+    release = threading.Event()
+    queue.task('slow')(lambda: release.wait(5))
+    queue.enqueue('slow')
+    runner = threading.Thread(target=queue.run_one)
+    runner.start()
+    time.sleep(0.6)
+    # Блокировка продлена: второй исполнитель задачу не забирает
+    assert queue._claim() is None
+    release.set()
+    runner.join()
+    assert queue.stats() == {}
+
+
+def test_unknown_task_is_rejected(queue):
+    with pytest.raises(KeyError):
+        queue.enqueue('missing')
+
+
+def test_enqueue_outside_request_does_not_start_threads(queue):
+    queue.workers = 1
+    queue.task('noop')(lambda: None)
+    queue.enqueue('noop')
+    assert queue._threads == []
+    queue.start()
+    assert len(queue._threads) == 1
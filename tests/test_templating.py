@@ -0,0 +1,55 @@
+import sys
+
+from flask import render_template_string
+
+from app.cache import cache, FileVersion
+
+
+TEMPLATE = "{% cache 'counter', key %}{{ counter.pop() }}{% endcache %}"
+
+
+def render(key, counter):
+    return render_template_string(TEMPLATE, key=key, counter=counter)
+
+
+def fragments(app):
+    return app.extensions['fragment_cache']
+
+
+def test_fragment_is_cached_by_key(app):
+    with app.test_request_context():
+        assert render('a', [1]) == '1'
+        assert render('a', [2]) == '1'
+        assert render('b', [3]) == '3'
+
+
+def test_fragment_expires_after_version_bump_in_other_worker(app):
+    other_worker = FileVersion(cache.version.path)
+    with app.test_request_context():
+        assert render('a', [1]) == '1'
+        other_worker.bump()
+        # Сигнал content_changed в этом процессе не отправлялся
+        assert render('a', [2]) == '2'
+
+
+def test_fragment_ttl(app, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sys.modules['app.cache'].time, 'monotonic', lambda: now[0])
+    with app.test_request_context():
+        assert render('a', [1]) == '1'
+        now[0] += app.config['TEMPLATE_FRAGMENT_TTL'] + 1
+        assert render('a', [2]) == '2'
+
+
+def test_long_keys_are_not_cached(app):
+    with app.test_request_context():
+        render('x' * 1000, [1])
+    assert len(fragments(app).store) == 0
+
+
+def test_portfolio_cards_key_ignores_query_string(app, client, make_project):
+    make_project()
+    for value in range(5):
+        assert client.get(f'/portfolio?utm={value}').get_data(as_text=True)
+    keys = [key for key in fragments(app).store._data if 'portfolio-cards' in key[1]]
+    assert len(keys) == 1
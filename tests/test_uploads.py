@@ -0,0 +1,150 @@
+import io
+import os
+import time
+
+import pytest
+
+from app.config import Config
+from app.uploads import UploadStore, UploadError, uploads
+
+
+def _save(data, filename='photo.png'):
+    return uploads.save(io.BytesIO(data), filename)[0]
+
+
+def _age(name, seconds):
+    past = time.time() - seconds
+    os.utime(uploads.path(name), (past, past))
+
+
+def test_same_bytes_share_a_name(app):
+    first, new = uploads.save(io.BytesIO(b'image'), 'a.png')
+    second, again = uploads.save(io.BytesIO(b'image'), 'b.PNG')
+    assert first == second
+    assert (new, again) == (True, False)
+
+
+def test_save_rejects_disallowed_extension(app):
+    with pytest.raises(UploadError):
+        _save(b'<?php', 'shell.php')
+    assert not os.path.exists(uploads.folder) or os.listdir(uploads.folder) == []
+
+
+def test_default_folder_is_served_as_immutable(app):
+    app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
+    store = UploadStore()
+    store.init_app(app)
+    assert store.is_immutable('uploads/' + 'a' * 32 + '.png')
+    assert not store.is_immutable('uploads/logo.png')
+
+
+def test_gc_keeps_referenced_and_recent_files(app, make_project):
+    referenced = _save(b'referenced')
+    recent = _save(b'recent')
+    orphan = _save(b'orphan')
+    make_project(images=[referenced])
+    for name in (referenced, orphan):
+        _age(name, uploads.grace + 60)
+    _age(recent, uploads.grace - 60)
+
+    removed = uploads.collect_garbage()
+
+    assert [name for name, _ in removed] == [orphan]
+    assert os.path.exists(uploads.path(referenced))
+    assert os.path.exists(uploads.path(recent))
+    assert not os.path.exists(uploads.path(orphan))
+
+
+def test_resave_restarts_grace_period(app):
+    name = _save(b'again')
+    _age(name, uploads.grace + 60)
+    # Повторная загрузка тех же байтов ещё не в БД - gc ждёт коммита
+    _save(b'again')
+    assert uploads.collect_garbage() == []
+
+
+def test_admin_form_rejects_disallowed_extension(admin_client):
+    from app.models import Solution
+
+    def post(filename):
+        return admin_client.post('/panel/solutions', data={
+            'name': 'Стартап', 'slug': 'startap', 'description': 'Описание',
+            'price': 1000, 'delivery_days': 14, 'category': 'package',
+            'image': (io.BytesIO(b'data'), filename),
+        }, content_type='multipart/form-data')
+
+    assert post('shell.php').status_code == 200
+    assert Solution.query.count() == 0
+    assert post('photo.png').status_code == 302
+    assert Solution.query.count() == 1
+
+
+def test_admin_portfolio_saves_every_image(admin_client):
+    from app.models import PortfolioItem
+    from app.uploads import is_content_addressed
+
+    response = admin_client.post('/panel/portfolio', data={
+        'title': 'Кофейня', 'slug': 'kofeynya', 'category': 'kofeynya',
+        'package': 'Кофейня-Бистро', 'duration': '14 дней', 'geo': 'СПб',
+        'images': [(io.BytesIO(b'first'), 'first.png'),
+                   (io.BytesIO(b'second'), 'second.jpg')],
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 302
+    images = PortfolioItem.query.one().images
+    assert len(images) == 2
+    assert all(is_content_addressed(name) for name in images)
+    assert [name.rsplit('.', 1)[1] for name in images] == ['png', 'jpg']
+    assert all(os.path.exists(uploads.path(name)) for name in images)
+
+
+def test_admin_portfolio_rejects_disallowed_image(admin_client):
+    from app.models import PortfolioItem
+
+    response = admin_client.post('/panel/portfolio', data={
+        'title': 'Кофейня', 'slug': 'kofeynya', 'category': 'kofeynya',
+        'package': 'Кофейня-Бистро', 'duration': '14 дней', 'geo': 'СПб',
+        'images': [(io.BytesIO(b'ok'), 'ok.png'), (io.BytesIO(b'<?php'), 'x.php')],
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert PortfolioItem.query.count() == 0
+
+
+def test_admin_rejects_duplicate_slug_before_saving_files(admin_client):
+    from app.models import Solution, PortfolioItem
+
+    def post(url, **data):
+        return admin_client.post(url, data={
+            'package': 'Кофейня-Бистро', 'duration': '14 дней', 'geo': 'СПб',
+            'description': 'Описание', 'price': 1000, 'delivery_days': 14,
+            **data}, content_type='multipart/form-data')
+
+    solution = {'name': 'Стартап', 'slug': 'startap', 'category': 'package'}
+    assert post('/panel/solutions', **solution).status_code == 302
+    response = post('/panel/solutions', **solution,
+                    image=(io.BytesIO(b'duplicate'), 'photo.png'))
+    assert response.status_code == 200
+    assert Solution.query.count() == 1
+
+    project = {'title': 'Кофейня', 'slug': 'kofeynya', 'category': 'kofeynya'}
+    assert post('/panel/portfolio', **project).status_code == 302
+    response = post('/panel/portfolio', **project,
+                    images=[(io.BytesIO(b'duplicate'), 'photo.png')])
+    assert response.status_code == 200
+    assert PortfolioItem.query.count() == 1
+    # Файлы отклонённых форм не сохраняются
+    assert not os.path.isdir(uploads.folder) or not os.listdir(uploads.folder)
+
+
+@pytest.mark.parametrize('slug', ['a/b', 'Kofeynya', 'kofeynya-', 'x' * 201])
+def test_admin_portfolio_rejects_invalid_slug(admin_client, slug):
+    from app.models import PortfolioItem
+
+    response = admin_client.post('/panel/portfolio', data={
+        'title': 'Кофейня', 'slug': slug, 'category': 'kofeynya',
+        'package': 'Кофейня-Бистро', 'duration': '14 дней', 'geo': 'СПб',
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert PortfolioItem.query.count() == 0